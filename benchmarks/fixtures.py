@@ -0,0 +1,121 @@
+# Standard Library Imports
+import os
+import random
+import zlib
+
+# Local Imports
+import stockanalysis as sa
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def read_tickers(path: str = "stocks.txt") -> list[str]:
+	"""
+	Returns the tickers listed one per line in a watchlist file.
+	"""
+	with open(path) as file:
+		return [line.strip().lower() for line in file if line.strip()]
+
+def record(tickers: list[str], directory: str = FIXTURES_DIR) -> None:
+	"""
+	Download every document for each ticker from stockanalysis.com and save the raw pages as fixtures.
+
+	:param tickers: The tickers to record.
+	:param directory: The folder fixtures are saved in, one subfolder per ticker.
+	"""
+	for ticker in tickers:
+		pages = sa.fetch.fetch_documents(ticker, sa.ALL_DOCUMENTS)
+		os.makedirs(os.path.join(directory, ticker), exist_ok=True)
+		for document, content in zip(sa.ALL_DOCUMENTS, pages):
+			with open(_path(directory, ticker, document), "wb") as file:
+				file.write(content)
+		print(f"[*] {ticker.upper()} Recorded")
+
+def load(ticker: str, document: int, directory: str = FIXTURES_DIR) -> bytes:
+	"""
+	Returns the recorded page for a ticker and document, or a synthetic page with the same structure if none was 
+		recorded.
+	"""
+	try:
+		with open(_path(directory, ticker.lower(), document), "rb") as file:
+			return file.read()
+	except OSError:
+		return synthesize(ticker)[document]
+
+def _path(directory: str, ticker: str, document: int) -> str:
+	return os.path.join(directory, ticker, sa.utils.DOCUMENT_NAMES[document] + ".html")
+
+def synthesize(ticker: str) -> dict[int, bytes]:
+	"""
+	Generate stand-in pages for every document with the same layout stockanalysis.com uses. Numbers are random but 
+		seeded by the ticker, so each ticker always gets the same pages.
+	"""
+	r = random.Random(zlib.crc32(ticker.lower().encode()))
+	growth = [r.uniform(-0.05, 0.3) for _ in range(11)]
+	revenue = [r.uniform(5e3, 4e5)]
+	for i in growth[1:]:
+		revenue.append(revenue[-1] * (1 + i))
+	newest_first = revenue[:6][::-1]
+	net_margin = r.uniform(0.02, 0.25)
+	da_margin = r.uniform(0.02, 0.1)
+	capex_margin = r.uniform(0.02, 0.1)
+	shares = r.uniform(100, 10000)
+	price = revenue[0] / shares * r.uniform(1, 5)
+
+	def money(value):
+		return f"{value:,.0f}"
+
+	def units(value):
+		return f"{value/1000:.2f}B" if value > 1000 else f"{value:.2f}M"
+
+	def statement(rows):
+		headers = ["Year Ending", "TTM"] + [f"FY {year}" for year in range(2023, 2018, -1)] + ["5+ Years"]
+		head = "".join(f"<th>{i}</th>" for i in headers)
+		body = "".join(f"<tr><td>{name}</td>" + "".join(f"<td>\n {i} </td>" for i in values) + 
+				 	   "<td>Upgrade</td></tr>" for name, values in rows)
+		return f"<html><body><div><main><table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table></main>" \
+			   "</div></body></html>"
+
+	income = statement([
+		("Revenue", [money(i) for i in newest_first]),
+		("Revenue Growth (YoY)", [f"{(newest_first[i]/newest_first[i+1] - 1)*100:.2f}%" for i in range(5)] + ["-"]),
+		("Net Income", [money(i * net_margin * r.uniform(0.5, 1.5)) for i in newest_first]),
+	])
+	balance = statement([
+		("Cash & Equivalents", [money(i * 0.1) for i in newest_first]),
+		("Long-Term Debt", [money(i * 0.2) for i in newest_first]),
+	])
+	cash_flow = statement([
+		("Depreciation & Amortization", [money(i * da_margin * r.uniform(0.8, 1.2)) for i in newest_first]),
+		("Capital Expenditures", [money(-i * capex_margin * r.uniform(0.8, 1.2)) for i in newest_first]),
+	])
+
+	estimates = revenue[:5] + revenue[6:]
+	rows = [
+		("Revenue", [units(i) for i in estimates[:-1]] + ["-"]),
+		("Revenue Growth", [f"{i*100:.2f}%" for i in growth[:9]] + ["-"]),
+		("EPS", [f"{i * net_margin / shares:.2f}" for i in estimates]),
+		("EPS Growth", ["5%"] * 10),
+		("Forward PE", ["20"] * 10),
+		("No. Analysts", ["12"] * 10),
+	]
+	head = "<th>Year</th>" + "".join(f"<th>{year}</th>" for year in range(2019, 2029))
+	body = "".join(f"<tr><td>{name}</td>" + "".join(f"<td>{i}</td>" for i in values) + "</tr>" for name, values in rows)
+	forecast = f'<html><body><div data-test="forecast-financial-table"><table><thead><tr>{head}</tr></thead>' \
+			   f'<tbody>{body}</tbody></table></div></body></html>'
+
+	statistics = "<html><body><div><div><div></div><div><main>" \
+		f"<div><div></div><div><div><div>{price:,.2f}</div></div></div></div>" \
+		"<div><div><div></div><div></div><div></div><div><table><tbody>" \
+		f"<tr><td>Shares Outstanding</td><td>{units(shares)}</td></tr></tbody></table></div></div>" \
+		f"<div><div><table><tbody><tr><td>Beta (5Y)</td><td>{r.uniform(0.5, 2):.2f}</td></tr></tbody></table>" \
+		"</div></div></div></main></div></div></div></body></html>"
+
+	pages = {
+		sa.INCOME_STATEMENT: income,
+		sa.BALANCE_SHEET: balance,
+		sa.CASH_FLOW_STATEMENT: cash_flow,
+		sa.FORECAST: forecast,
+		sa.STATISTICS: statistics,
+	}
+	return {document: page.encode() for document, page in pages.items()}
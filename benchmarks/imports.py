@@ -0,0 +1,88 @@
+"""
+Import-time benchmark for stockanalysis. Every import runs in a fresh interpreter so nothing is already cached in
+	sys.modules, and fails the run when a module goes over its budget or loads a dependency it should not need.
+
+	python -m benchmarks.imports
+	python -m benchmarks.imports --repeat 20 --modules stockanalysis.valuation
+"""
+# Standard Library Imports
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# The most milliseconds each import may take, and the heavy dependencies it must not load. The valuation path only
+# needs numpy, which accounts for nearly all of its budget.
+BUDGETS = {
+	"stockanalysis": 50,
+	"stockanalysis.valuation": 150,
+	"stockanalysis.fetch": 200,
+	"stockanalysis.stock": 1000,
+}
+FORBIDDEN = {
+	"stockanalysis": ("numpy", "pandas", "openpyxl", "lxml", "requests", "aiohttp", "pyarrow"),
+	"stockanalysis.valuation": ("pandas", "openpyxl", "lxml", "requests", "aiohttp", "pyarrow"),
+	"stockanalysis.fetch": ("numpy", "pandas", "openpyxl", "lxml", "aiohttp", "pyarrow"),
+	"stockanalysis.stock": ("openpyxl", "lxml", "requests", "aiohttp"),
+}
+
+_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "modules": sorted({{name.split(".")[0] for name in sys.modules}})}}))
+"""
+
+
+def measure_import(module: str, repeat: int = 10) -> dict:
+	"""
+	Import module in repeat fresh interpreters.
+
+	:return dict: "p50_ms" and "max_ms" of the import, and "loaded", the top-level packages it left in sys.modules.
+	"""
+	times = []
+	for _ in range(repeat):
+		output = subprocess.run([sys.executable, "-c", _PROBE.format(module=module)], capture_output=True,
+								text=True, check=True).stdout
+		result = json.loads(output)
+		times.append(result["ms"])
+	return {
+		"p50_ms": round(statistics.median(times), 2),
+		"max_ms": round(max(times), 2),
+		"loaded": result["modules"],
+	}
+
+def check(module: str, result: dict) -> list[str]:
+	"""
+	Returns a message for every budget or forbidden dependency module breaks, empty if it is within limits.
+	"""
+	problems = []
+	if module in BUDGETS and result["p50_ms"] > BUDGETS[module]:
+		problems.append(f"{module} took {result['p50_ms']}ms, over its {BUDGETS[module]}ms budget")
+	for dependency in FORBIDDEN.get(module, ()):
+		if dependency in result["loaded"]:
+			problems.append(f"{module} loaded {dependency}")
+	return problems
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Measure stockanalysis import times in fresh interpreters.")
+	parser.add_argument("--modules", nargs="+", default=list(BUDGETS), help="Modules to import.")
+	parser.add_argument("--repeat", type=int, default=10, help="Fresh interpreters per module.")
+	args = parser.parse_args()
+
+	problems = []
+	print(f"{'module':<28}{'p50_ms':>10}{'max_ms':>10}{'budget':>10}")
+	for module in args.modules:
+		result = measure_import(module, args.repeat)
+		print(f"{module:<28}{result['p50_ms']:>10}{result['max_ms']:>10}{BUDGETS.get(module, ''):>10}")
+		problems += check(module, result)
+
+	for problem in problems:
+		print(problem)
+	sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,189 @@
+"""
+Offline benchmarks for stockanalysis. Every page comes from recorded fixtures (see fixtures.record()) served by a 
+	local stand-in server, so results do not depend on stockanalysis.com.
+
+	python -m benchmarks.run --save-baseline main
+	python -m benchmarks.run --compare main
+"""
+# Standard Library Imports
+import argparse
+import datetime
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+# Third Party Imports
+import numpy
+
+# Local Imports
+import stockanalysis as sa
+from benchmarks import fixtures
+from benchmarks.server import StandInServer
+
+BASELINES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+STAGES = ("parse_financials", "parse_forecast", "parse_statistics", "normalize_num", "gen_dcf", "export", 
+		  "multi_dcf", "backtest")
+
+
+def measure(function, items: list, repeat: int = 1) -> dict:
+	"""
+	Call function on every item repeat times, then once more under tracemalloc to find peak memory.
+
+	:return dict: "calls", "per_sec" (calls per second), "p50_ms", "p99_ms", and "peak_kb".
+	"""
+	latencies = []
+	for _ in range(repeat):
+		for item in items:
+			start = time.perf_counter()
+			function(item)
+			latencies.append(time.perf_counter() - start)
+
+	tracemalloc.start()
+	for item in items:
+		function(item)
+	peak = tracemalloc.get_traced_memory()[1]
+	tracemalloc.stop()
+
+	latencies = numpy.array(latencies)
+	return {
+		"calls": len(latencies),
+		"per_sec": round(len(latencies) / latencies.sum(), 2),
+		"p50_ms": round(float(numpy.percentile(latencies, 50)) * 1000, 4),
+		"p99_ms": round(float(numpy.percentile(latencies, 99)) * 1000, 4),
+		"peak_kb": round(peak / 1024, 1),
+	}
+
+def loaded_stock(ticker: str) -> sa.Stock:
+	"""
+	Returns a Stock with every document parsed from fixtures and nothing fetched.
+	"""
+	stock = sa.Stock(ticker)
+	for document in sa.ALL_DOCUMENTS:
+		stock._set_document(document, sa.scrape.parse_document(document, fixtures.load(ticker, document)))
+	return stock
+
+def store_snapshots(stocks: list, root: str, days: int = 30, seed: int = 0) -> int:
+	"""
+	Save a daily snapshot of every stock to a columnar store for days days, each at a randomly moved price.
+
+	:return int: The number of snapshots saved.
+	"""
+	rng = numpy.random.default_rng(seed)
+	first = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+	for stock in stocks:
+		price = stock.statistics["price"]
+		for day in range(days):
+			stock.statistics["price"] = round(price * float(numpy.exp(rng.normal(0, 0.02) * day**0.5)), 2)
+			sa.store.save_stock(stock, root, first + datetime.timedelta(days=day))
+		stock.statistics["price"] = price
+	return len(stocks) * days
+
+def run(tickers: list[str], stages: list[str] = STAGES, repeat: int = 3, latency: float = 0.05, 
+		jitter: float = 0.0, error_rate: float = 0.0, workers: int = 8, processes: int = None) -> dict:
+	"""
+	Run the selected benchmark stages over tickers and return their measurements keyed by stage.
+	"""
+	results = {}
+	pages = {document: [fixtures.load(ticker, document) for ticker in tickers] for document in sa.ALL_DOCUMENTS}
+	statements = pages[sa.INCOME_STATEMENT] + pages[sa.BALANCE_SHEET] + pages[sa.CASH_FLOW_STATEMENT]
+
+	if "parse_financials" in stages:
+		results["parse_financials"] = measure(sa.scrape.parse_financials, statements, repeat)
+	if "parse_forecast" in stages:
+		results["parse_forecast"] = measure(sa.scrape.parse_forecast, pages[sa.FORECAST], repeat)
+	if "parse_statistics" in stages:
+		results["parse_statistics"] = measure(sa.scrape.parse_statistics, pages[sa.STATISTICS], repeat)
+	if "normalize_num" in stages:
+		columns = [column for page in statements 
+				   for column in sa.scrape._extract_table(sa.scrape._parse_html(page).find(".//table"))[1][1:]]
+		results["normalize_num"] = measure(sa.numeric.to_numbers, columns, repeat)
+
+	stocks = [loaded_stock(ticker) for ticker in tickers]
+	if "gen_dcf" in stages:
+		results["gen_dcf"] = measure(lambda stock: stock.gen_dcf(regen_data=False), stocks, repeat)
+	if "export" in stages:
+		with tempfile.TemporaryDirectory() as directory:
+			def export(stock):
+				writer = sa.ExcelWriter(os.path.join(directory, "export.xlsx"), append=False)
+				writer.write_sheet(stock.ticker.upper(), stock.dcf)
+				writer.save()
+			results["export"] = measure(export, stocks, repeat)
+
+	if "backtest" in stages:
+		with tempfile.TemporaryDirectory() as directory:
+			snapshots = store_snapshots(stocks, directory)
+			start = time.perf_counter()
+			sa.backtest.backtest(directory)
+			elapsed = time.perf_counter() - start
+		results["backtest"] = {
+			"calls": snapshots,
+			"per_sec": round(snapshots / elapsed, 2),
+			"seconds": round(elapsed, 4),
+		}
+
+	if "multi_dcf" in stages:
+		with StandInServer(latency, jitter, error_rate) as server:
+			start = time.perf_counter()
+			summary = sa.multi_dcf(list(tickers), verbose=False, workers=workers, processes=processes)
+			elapsed = time.perf_counter() - start
+		results["multi_dcf"] = {
+			"calls": len(tickers),
+			"per_sec": round(len(tickers) / elapsed, 2),
+			"seconds": round(elapsed, 4),
+			"requests": server.requests,
+			"failures": len(summary.attrs["failures"]),
+		}
+
+	return results
+
+def compare(results: dict, baseline: dict) -> str:
+	"""
+	Returns a table of every measurement next to its baseline with the percent change.
+	"""
+	lines = [f"{'stage':<18}{'metric':<10}{'baseline':>12}{'current':>12}{'change':>9}"]
+	for stage, metrics in results.items():
+		for metric, value in metrics.items():
+			old = baseline.get(stage, {}).get(metric)
+			change = f"{(value - old) / old * 100:+.1f}%" if old else ""
+			lines.append(f"{stage:<18}{metric:<10}{old if old is not None else '':>12}{value:>12}{change:>9}")
+	return "\n".join(lines)
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Benchmark stockanalysis against recorded pages.")
+	parser.add_argument("--tickers", default="stocks.txt", help="Watchlist file with one ticker per line.")
+	parser.add_argument("--limit", type=int, help="Only use the first LIMIT tickers.")
+	parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+	parser.add_argument("--repeat", type=int, default=3, help="Timed passes per stage.")
+	parser.add_argument("--latency", type=float, default=0.05, help="Seconds of simulated server latency.")
+	parser.add_argument("--jitter", type=float, default=0.0, help="Up to this many extra seconds of latency.")
+	parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503.")
+	parser.add_argument("--workers", type=int, default=8, help="multi_dcf workers.")
+	parser.add_argument("--processes", type=int, help="multi_dcf worker processes instead of threads.")
+	parser.add_argument("--record", action="store_true", help="Record fixtures from stockanalysis.com first.")
+	parser.add_argument("--save-baseline", metavar="NAME", help="Save results to baselines/NAME.json.")
+	parser.add_argument("--compare", metavar="NAME", help="Compare results to baselines/NAME.json.")
+	args = parser.parse_args()
+
+	tickers = fixtures.read_tickers(args.tickers)[:args.limit]
+	if args.record:
+		fixtures.record(tickers)
+
+	results = run(tickers, args.stages, args.repeat, args.latency, args.jitter, args.error_rate, args.workers, 
+				  args.processes)
+
+	if args.compare:
+		with open(os.path.join(BASELINES_DIR, args.compare + ".json")) as file:
+			print(compare(results, json.load(file)))
+	else:
+		print(json.dumps(results, indent=4))
+
+	if args.save_baseline:
+		os.makedirs(BASELINES_DIR, exist_ok=True)
+		with open(os.path.join(BASELINES_DIR, args.save_baseline + ".json"), "w") as file:
+			json.dump(results, file, indent=4)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,108 @@
+# Standard Library Imports
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local Imports
+import stockanalysis as sa
+from benchmarks import fixtures
+
+
+class StandInServer:
+	def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, 
+			  	 error_status: int = 503, retry_after: float = None, fixtures_dir: str = fixtures.FIXTURES_DIR, 
+			  	 seed: int = 0, truncate_rate: float = 0.0) -> None:
+		"""
+		A local stand-in for stockanalysis.com that serves fixture pages with simulated latency and errors. 
+			Pointing stockanalysis.utils.BASE_URL at url routes every fetch to it.
+
+		:param latency: Seconds added to every response.
+		:param jitter: Up to this many extra seconds added at random to every response.
+		:param error_rate: The fraction of requests answered with error_status instead of the page.
+		:param error_status: The HTTP status of injected errors, e.g. 503 or 429.
+		:param retry_after: Seconds sent in a Retry-After header with injected errors. If None, no header is sent.
+		:param fixtures_dir: The folder recorded pages are read from. Synthetic pages fill any gaps.
+		:param seed: Seed for latency jitter and error injection.
+		:param truncate_rate: The fraction of pages whose connection is dropped halfway through the body.
+		"""
+		self.latency = latency
+		self.jitter = jitter
+		self.error_rate = error_rate
+		self.error_status = error_status
+		self.retry_after = retry_after
+		self.fixtures_dir = fixtures_dir
+		self.random = random.Random(seed)
+		self.truncate_rate = truncate_rate
+		self.requests = 0
+		self.errors = 0
+		self.lock = threading.Lock()
+
+		paths = {path.strip("/"): document for document, path in sa.utils.DOCUMENT_PATHS.items()}
+		server = self
+
+		class Handler(BaseHTTPRequestHandler):
+			protocol_version = "HTTP/1.1"
+
+			def do_GET(self):
+				with server.lock:
+					server.requests += 1
+					delay = server.latency + server.random.uniform(0, server.jitter)
+					fail = server.random.random() < server.error_rate
+					truncate = server.truncate_rate > 0 and server.random.random() < server.truncate_rate
+					if fail:
+						server.errors += 1
+				time.sleep(delay)
+
+				try:
+					ticker, path = self.path.split("/stocks/", 1)[1].split("/", 1)
+					body = fixtures.load(ticker, paths[path.strip("/")], server.fixtures_dir)
+					status = server.error_status if fail else 200
+				except (IndexError, KeyError, ValueError):
+					body, status = b"", 404
+				if status != 200:
+					body = b""
+
+				self.send_response(status)
+				self.send_header("Content-Type", "text/html; charset=utf-8")
+				self.send_header("Content-Length", str(len(body)))
+				if fail and server.retry_after is not None:
+					self.send_header("Retry-After", str(server.retry_after))
+				self.end_headers()
+				if truncate and status == 200:
+					self.wfile.write(body[:len(body)//2])
+					self.close_connection = True
+					return
+				self.wfile.write(body)
+
+			def log_message(self, format, *args):
+				pass
+
+		self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+		self.httpd.daemon_threads = True
+		self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/stocks/"
+		self.thread = None
+		self.base_url = None
+
+	def __enter__(self):
+		self.start()
+		return self
+
+	def __exit__(self, *args) -> None:
+		self.stop()
+
+	def start(self) -> None:
+		"""
+		Start serving in a background thread and point stockanalysis at this server.
+		"""
+		self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+		self.thread.start()
+		self.base_url, sa.utils.BASE_URL = sa.utils.BASE_URL, self.url
+
+	def stop(self) -> None:
+		"""
+		Stop serving and point stockanalysis back at stockanalysis.com.
+		"""
+		sa.utils.BASE_URL = self.base_url
+		self.httpd.shutdown()
+		self.httpd.server_close()
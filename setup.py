@@ -8,13 +8,18 @@ setup(
 	author="Vishal Mehta",
 	author_email="vvmehta06@gmail.com",
 	url="https://github.com/VishalMehta06/RADIUS",
-	requires=[
+	install_requires=[
+		"numpy",
 		"pandas",
-		"xlwings",
 		"requests",
-		"bs4",
+		"lxml",
 		"setuptools",
 		"openpyxl"
 	],
+	extras_require={
+		"excel": ["xlwings"],
+		"async": ["aiohttp"],
+		"store": ["pyarrow"],
+	},
 	packages=find_packages(),
 )
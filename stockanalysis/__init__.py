@@ -1,19 +1,76 @@
-from stockanalysis.stock import Stock
-from stockanalysis.dcf import single_dcf, multi_dcf
-from stockanalysis.sheets import create_workbook, export_dataframe
-from stockanalysis.scrape import scrape_financials, scrape_forecast, scrape_statistics
-from stockanalysis.utils import INCOME_STATEMENT, BALANCE_SHEET, CASH_FLOW_STATEMENT
+# Standard Library Imports
+import importlib
+
+# Local Imports
+from stockanalysis.utils import INCOME_STATEMENT, BALANCE_SHEET, CASH_FLOW_STATEMENT, FORECAST, STATISTICS, ALL_DOCUMENTS
+
+# Submodules and public names are imported on first use, so "import stockanalysis" stays cheap and pandas,
+# openpyxl, lxml, requests, aiohttp, and pyarrow only load once something needs them.
+_SUBMODULES = ("aio", "backtest", "cache", "cli", "dcf", "fetch", "metrics", "montecarlo", "numeric", "runner", 
+			   "scrape", "screen", "sheets", "stock", "store", "utils", "valuation")
+_ATTRIBUTES = {
+	"Stock": "stock",
+	"AsyncStock": "aio",
+	"run_watchlist": "runner",
+	"read_tickers": "runner",
+	"load_checkpoint": "runner",
+	"single_dcf": "dcf",
+	"multi_dcf": "dcf",
+	"create_workbook": "sheets",
+	"export_dataframe": "sheets",
+	"ExcelWriter": "sheets",
+	"scrape_financials": "scrape",
+	"scrape_forecast": "scrape",
+	"scrape_statistics": "scrape",
+	"scrape_documents": "scrape",
+	"configure_session": "fetch",
+	"set_rate_limit": "fetch",
+	"configure_retries": "fetch",
+	"set_circuit_breaker": "fetch",
+	"configure_cache": "fetch",
+}
 
 __all__ = [
 	"Stock",
+	"AsyncStock",
+	"run_watchlist",
+	"read_tickers",
+	"load_checkpoint",
 	"single_dcf",
 	"multi_dcf",
 	"create_workbook",
 	"export_dataframe",
+	"ExcelWriter",
 	"scrape_financials",
 	"scrape_forecast",
 	"scrape_statistics",
-	"INCOME_STATEMENT", 
-	"BALANCE_SHEET", 
-	"CASH_FLOW_STATEMENT"
+	"scrape_documents",
+	"configure_session",
+	"set_rate_limit",
+	"configure_retries",
+	"set_circuit_breaker",
+	"configure_cache",
+	"INCOME_STATEMENT",
+	"BALANCE_SHEET",
+	"CASH_FLOW_STATEMENT",
+	"FORECAST",
+	"STATISTICS",
+	"ALL_DOCUMENTS"
 ]
+
+
+def __getattr__(name: str):
+	"""
+	Import a submodule or public name the first time it is used and keep it on the package.
+	"""
+	if name in _SUBMODULES:
+		value = importlib.import_module(f"stockanalysis.{name}")
+	elif name in _ATTRIBUTES:
+		value = getattr(importlib.import_module(f"stockanalysis.{_ATTRIBUTES[name]}"), name)
+	else:
+		raise AttributeError(f"module 'stockanalysis' has no attribute {name!r}")
+	globals()[name] = value
+	return value
+
+def __dir__() -> list[str]:
+	return sorted(set(globals()) | set(_SUBMODULES) | set(_ATTRIBUTES))
@@ -0,0 +1,8 @@
+# Standard Library Imports
+import sys
+
+# Local Imports
+from stockanalysis.cli import main
+
+if __name__ == "__main__":
+	sys.exit(main())
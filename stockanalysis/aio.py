@@ -0,0 +1,241 @@
+# Standard Library Imports
+import asyncio
+
+# Third Party Imports
+import aiohttp
+import pandas
+
+# Local Imports
+import stockanalysis as sa
+
+# One aiohttp session per event loop, sharing its connection pool between every coroutine on that loop
+_sessions = {}
+
+# Stocks kept between incremental multi_dcf() calls, keyed by ticker and minimum discount rate
+_stocks = {}
+
+
+async def get_session() -> aiohttp.ClientSession:
+	"""
+	Returns the aiohttp session for the running event loop, creating it on first use. Its connector caps open 
+		connections at the pool_size and max_per_host set by stockanalysis.configure_session().
+	"""
+	loop = asyncio.get_running_loop()
+	# Sessions of loops that shut down without close() can no longer be used or closed, so let them go
+	for closed in [other for other in _sessions if other.is_closed()]:
+		del _sessions[closed]
+	config = sa.fetch.settings()["session"]
+	session, session_config = _sessions.get(loop, (None, None))
+	if session is not None and not session.closed and session_config == config:
+		return session
+	if session is not None:
+		await session.close()
+
+	connector = aiohttp.TCPConnector(limit=config["pool_size"], limit_per_host=config["max_per_host"])
+	session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=config["timeout"]))
+	_sessions[loop] = (session, config)
+	return session
+
+async def close() -> None:
+	"""
+	Close the session of the running event loop. Call before the loop shuts down, otherwise its open connections 
+		are only dropped, unclosed, once a session is next needed on another loop.
+	"""
+	session, _ = _sessions.pop(asyncio.get_running_loop(), (None, None))
+	if session is not None:
+		await session.close()
+
+async def fetch(url: str, headers: dict = None) -> tuple[int, bytes, dict]:
+	"""
+	Fetch a single page without blocking the event loop, respecting the process wide rate limit and circuit 
+		breaker. Retryable failures are retried as set by stockanalysis.fetch.configure_retries().
+
+	:param url: The full URL of the page.
+	:param headers: Extra request headers.
+	:return tuple: The status code, body, and response headers of a successful response.
+	:raises stockanalysis.fetch.FetchError: The page could not be fetched, even after retrying.
+	"""
+	session = await get_session()
+	attempt = 0
+	while True:
+		await _sleep(sa.fetch.request_delay())
+		try:
+			with sa.metrics.timer("fetch"):
+				async with session.get(url, headers=headers) as webpage:
+					content = await webpage.read()
+			sa.metrics.count("requests", status=webpage.status)
+			sa.metrics.count("bytes_downloaded", len(content))
+			sa.fetch.check_response(url, webpage.status, webpage.headers)
+			sa.fetch.record_success()
+			return webpage.status, content, webpage.headers
+		except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+			failure = sa.fetch.network_error(url, error)
+		except sa.fetch.FetchError as error:
+			failure = error
+		await _sleep(sa.fetch.retry_delay(failure, attempt))
+		attempt += 1
+
+async def _sleep(seconds: float) -> None:
+	if seconds > 0:
+		await asyncio.sleep(seconds)
+
+async def fetch_document(ticker: str, document: int) -> bytes:
+	"""
+	Returns the page source of a document for a ticker, going through the page cache when one is configured.
+
+	:param ticker: The string ticker of the company.
+	:param document: One of stockanalysis.INCOME_STATEMENT, BALANCE_SHEET, CASH_FLOW_STATEMENT, FORECAST, or 
+		STATISTICS.
+	"""
+	url = sa.fetch.document_url(ticker, document)
+	cache = sa.fetch.get_cache()
+	if cache is None:
+		return (await fetch(url))[1]
+
+	content, headers = sa.fetch.cached_document(cache, ticker, document)
+	if headers is None:
+		return content
+	status, body, response_headers = await fetch(url, headers)
+	return sa.fetch.store_document(cache, ticker, document, status, body, response_headers, content)
+
+async def scrape_financials(ticker: str, document: int) -> pandas.DataFrame:
+	"""
+	Async version of stockanalysis.scrape_financials().
+	"""
+	if document not in (sa.INCOME_STATEMENT, sa.BALANCE_SHEET, sa.CASH_FLOW_STATEMENT):
+		return
+	return sa.scrape.parse_financials(await fetch_document(ticker, document))
+
+async def scrape_forecast(ticker: str) -> pandas.DataFrame:
+	"""
+	Async version of stockanalysis.scrape_forecast().
+	"""
+	return sa.scrape.parse_forecast(await fetch_document(ticker, sa.FORECAST))
+
+async def scrape_statistics(ticker: str) -> dict[str:float]:
+	"""
+	Async version of stockanalysis.scrape_statistics().
+	"""
+	return sa.scrape.parse_statistics(await fetch_document(ticker, sa.STATISTICS))
+
+async def scrape_documents(ticker: str, documents: list[int] = None) -> dict:
+	"""
+	Async version of stockanalysis.scrape_documents(). Every page is fetched at the same time.
+	"""
+	if documents is None:
+		documents = sa.ALL_DOCUMENTS
+
+	pages = await asyncio.gather(*[fetch_document(ticker, document) for document in documents])
+	return {document: sa.scrape.parse_document(document, html) for document, html in zip(documents, pages)}
+
+
+class AsyncStock(sa.Stock):
+	"""
+	A Stock whose gen_* methods are coroutines, so valuations never block the event loop. Every attribute and the 
+		synchronous analysis methods like gen_sensitivity() work the same as on Stock once data is generated, but 
+		they cannot fetch it themselves.
+	"""
+
+	async def gen_financials(self, document: int) -> None:
+		self._set_document(document, await scrape_financials(self.ticker, document))
+
+	async def gen_forecast(self) -> None:
+		self._set_document(sa.FORECAST, await scrape_forecast(self.ticker))
+
+	async def gen_statistics(self) -> None:
+		self._set_document(sa.STATISTICS, await scrape_statistics(self.ticker))
+
+	async def gen_data(self) -> None:
+		for document, data in (await scrape_documents(self.ticker)).items():
+			self._set_document(document, data)
+
+	async def refresh(self, max_age: dict = None) -> list[int]:
+		stale = self.stale_documents(max_age)
+		if stale:
+			for document, data in (await scrape_documents(self.ticker, stale)).items():
+				self._set_document(document, data)
+		return stale
+
+	async def gen_dcf(self, auto_terminal_growth_rate: bool = True, regen_data = True, incremental: bool = False, 
+				   	  max_age: dict = None) -> None:
+		"""
+		Async version of Stock.gen_dcf(). Pages are always fetched at the same time.
+		"""
+		if incremental:
+			await self.refresh(max_age)
+		elif regen_data:
+			await self.gen_data()
+		else:
+			self._changed.update(sa.ALL_DOCUMENTS)
+
+		with sa.metrics.timer("dcf"):
+			self._revalue(auto_terminal_growth_rate)
+
+	def gen_sensitivity(self, *args, regen_data: bool = False, **kwargs) -> pandas.DataFrame:
+		"""
+		Stock.gen_sensitivity() on data generated before with await gen_data() or await gen_dcf().
+		"""
+		self._require_data(regen_data)
+		return super().gen_sensitivity(*args, **kwargs)
+
+	def gen_monte_carlo(self, *args, regen_data: bool = False, **kwargs) -> dict:
+		"""
+		Stock.gen_monte_carlo() on data generated before with await gen_data() or await gen_dcf().
+		"""
+		self._require_data(regen_data)
+		return super().gen_monte_carlo(*args, **kwargs)
+
+	def _require_data(self, regen_data: bool) -> None:
+		"""
+		Raise instead of letting a synchronous method call the gen_data() coroutine without awaiting it.
+		"""
+		if regen_data or self.forecast.empty:
+			raise TypeError(f"{type(self).__name__} fetches data with coroutines, await stock.gen_data() first and "
+							"leave regen_data False")
+
+
+async def multi_dcf(tickers: list[str], min_discount_rate: float = None, max_concurrency: int = 50, 
+					incremental: bool = False, max_age: dict = None):
+	"""
+	Value many tickers at once and yield each result as soon as it completes, in completion order.
+
+		async for ticker, stock, error in stockanalysis.aio.multi_dcf(tickers):
+			...
+
+	:param tickers: The tickers to value.
+	:param min_discount_rate: The minimum discount rate percentage for all valuations. For 6%, enter 6 as the value.
+	:param max_concurrency: The maximum number of tickers being valued at the same time. Open connections are 
+		separately capped by stockanalysis.configure_session().
+	:param incremental: True = Reuse stocks from earlier incremental calls, refetching only stale documents.
+	:param max_age: Seconds each document may be reused for when incremental is True.
+	:return: An async iterator of (ticker, AsyncStock, None) on success or (ticker, None, error message) on failure.
+	"""
+	semaphore = asyncio.Semaphore(max_concurrency)
+
+	async def value(ticker):
+		async with semaphore:
+			key = (ticker.lower(), min_discount_rate)
+			if incremental and key in _stocks:
+				stock = _stocks[key]
+			elif min_discount_rate:
+				stock = AsyncStock(ticker, min_discount_rate=(min_discount_rate/100.0))
+			else:
+				stock = AsyncStock(ticker)
+			try:
+				await stock.gen_dcf(incremental=incremental, max_age=max_age)
+				if incremental:
+					_stocks[key] = stock
+			except Exception as error:
+				sa.metrics.count("errors", kind=sa.dcf.error_kind(error))
+				sa.metrics.count("tickers", status="failed")
+				return ticker, None, sa.dcf.error_message(error)
+			sa.metrics.count("tickers", status="complete")
+			return ticker, stock, None
+
+	tasks = [asyncio.ensure_future(value(ticker)) for ticker in tickers]
+	try:
+		for task in asyncio.as_completed(tasks):
+			yield await task
+	finally:
+		for task in tasks:
+			task.cancel()
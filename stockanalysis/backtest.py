@@ -0,0 +1,245 @@
+# Third Party Imports
+import numpy
+import pandas
+
+# Local Imports
+import stockanalysis as sa
+
+# Forward return horizons, as anything pandas.Timedelta accepts
+HORIZONS = ("30D", "90D", "180D", "365D")
+
+# Margin of safety bucket edges, as fractions
+MARGIN_BINS = (-numpy.inf, -0.5, -0.25, 0.0, 0.25, 0.5, 1.0, numpy.inf)
+
+_SNAPSHOT = ["ticker", "run"]
+
+
+def signals(root: str = "results/store", tickers: list[str] = None, start=None, end=None,
+			terminal_growth_rate: float = 0.03, min_discount_rate: float = 0.05, risk_free_rate: float = 0.047,
+			market_return: float = 0.08, default_beta: float = 1.3,
+			auto_terminal_growth_rate: bool = True) -> pandas.DataFrame:
+	"""
+	Replay every stored snapshot of a columnar store through the same DCF as Stock.gen_dcf(). Every
+		snapshot's inputs are stacked into one array per input, so all tickers and dates are valued in a few
+		broadcasted computations and no Stock is built.
+
+	Snapshots are the runs written by stockanalysis.store.save_stock(), e.g. by a daily
+		multi_dcf(store_root=...). The assumptions match the arguments of Stock.
+
+	:param root: The folder the store lives in.
+	:param tickers: The tickers to replay. If None, every ticker is replayed.
+	:param start: The earliest run to replay, as anything pandas.Timestamp accepts.
+	:param end: The latest run to replay, inclusive.
+	:param auto_terminal_growth_rate: True = Generate each terminal growth rate from revenue estimates, capped at
+		terminal_growth_rate. False = Use terminal_growth_rate.
+	:return pandas.DataFrame: One row per snapshot indexed by ("ticker", "run") with the "price",
+		"implied_price", "margin" (margin of safety as a fraction), "discount_rate", and "terminal_growth_rate".
+		Snapshots missing a value the DCF needs have NaN results.
+	"""
+	statistics = sa.store.load_dataset("statistics", root, tickers, start, end)
+	columns = ["price", "implied_price", "margin", "discount_rate", "terminal_growth_rate"]
+	if statistics.empty:
+		return pandas.DataFrame(columns=columns, index=pandas.MultiIndex.from_arrays([[], []], names=_SNAPSHOT))
+	statistics = statistics.drop_duplicates(_SNAPSHOT, keep="last").set_index(_SNAPSHOT)
+	index = statistics.index
+
+	# One (snapshots, periods) array per statement row, newest period first as scraped
+	labels = [label for _, row_labels in sa.valuation.INPUT_ROWS.values() for label in row_labels]
+	financials = sa.store.load_dataset("financials", root, tickers, start, end, items=labels)
+	rows = {name: _statement_rows(financials, index, document, row_labels) 
+			for name, (document, row_labels) in sa.valuation.INPUT_ROWS.items()}
+	estimates, years = _estimates(sa.store.load_dataset("forecast", root, tickers, start, end), index)
+
+	beta = statistics["beta"].to_numpy(dtype=float)
+	beta = numpy.where(numpy.isnan(beta), default_beta, beta)
+	discount_rate = numpy.maximum(risk_free_rate + beta*(market_return - risk_free_rate), min_discount_rate)
+	result = pandas.DataFrame({
+		"price": statistics["price"].to_numpy(dtype=float),
+		"implied_price": numpy.nan,
+		"margin": numpy.nan,
+		"discount_rate": discount_rate,
+		"terminal_growth_rate": float(terminal_growth_rate),
+	}, index=index)
+
+	# Snapshots only stack when they have as many periods, so value each shape in one batch. Snapshots missing a 
+	# row are left NaN, where Stock.gen_dcf() would raise MissingFieldError.
+	shapes = pandas.DataFrame({name: periods for name, (_, periods) in rows.items()})
+	shapes["forecast"] = years
+	shapes = shapes[(shapes > 0).all(axis=1)]
+	for shape, group in shapes.groupby(list(shapes.columns)):
+		shape = dict(zip(shapes.columns, shape))
+		if len({shape["past_revenue"], shape["past_net_income"], shape["past_da"], shape["past_capex"]}) > 1:
+			continue
+		_value_batch(result, group.index.to_numpy(), shape, rows, estimates, statistics, terminal_growth_rate, 
+					 auto_terminal_growth_rate)
+	return result
+
+def forward_returns(signals: pandas.DataFrame, horizons: list[str] = HORIZONS,
+					tolerance: str = "7D") -> pandas.DataFrame:
+	"""
+	Add the return of each ticker's price over every horizon after each snapshot, using the first later snapshot
+		at or after the horizon.
+
+	:param signals: The table returned by signals(), or any table indexed by ("ticker", "run") with a "price".
+	:param horizons: How far ahead to look, as anything pandas.Timedelta accepts, e.g. "90D".
+	:param tolerance: How long after the horizon a snapshot may be and still count. Returns without a snapshot
+		within the tolerance are NaN.
+	:return pandas.DataFrame: signals with a "return_<horizon>" column per horizon, as fractions.
+	"""
+	result = signals.copy()
+	if signals.empty:
+		for horizon in horizons:
+			result[f"return_{horizon}"] = pandas.Series(dtype=float)
+		return result
+
+	prices = signals["price"].reset_index()
+	prices["position"] = numpy.arange(len(prices))
+	later = prices[["ticker", "run", "price"]].rename(columns={"run": "later_run", "price": "later_price"})
+	later = later.sort_values("later_run", kind="stable")
+
+	for horizon in horizons:
+		targets = prices.assign(target=prices["run"] + pandas.Timedelta(horizon))
+		targets = targets.sort_values("target", kind="stable")
+		matched = pandas.merge_asof(targets, later, left_on="target", right_on="later_run", by="ticker",
+									direction="forward", tolerance=pandas.Timedelta(tolerance))
+		returns = numpy.full(len(prices), numpy.nan)
+		returns[matched["position"].to_numpy()] = (matched["later_price"] / matched["price"] - 1).to_numpy()
+		result[f"return_{horizon}"] = returns
+	return result
+
+def bucket_returns(returns: pandas.DataFrame, bins: list[float] = MARGIN_BINS) -> pandas.DataFrame:
+	"""
+	Summarize forward returns by margin of safety bucket, to see whether a higher margin predicted higher returns.
+
+	:param returns: The table returned by forward_returns().
+	:param bins: The bucket edges of the margin of safety, as fractions.
+	:return pandas.DataFrame: One row per bucket. Columns are (horizon, statistic) pairs where the statistics are
+		the "count" of snapshots with a return, the "mean" and "median" return, and the "hit_rate", the fraction
+		of positive returns.
+	"""
+	buckets = pandas.cut(returns["margin"], list(bins))
+	summary = {}
+	for column in [column for column in returns.columns if column.startswith("return_")]:
+		values = returns[column]
+		grouped = values.groupby(buckets, observed=False)
+		horizon = column[len("return_"):]
+		summary[(horizon, "count")] = grouped.count()
+		summary[(horizon, "mean")] = grouped.mean()
+		summary[(horizon, "median")] = grouped.median()
+		summary[(horizon, "hit_rate")] = (values > 0).where(values.notna()).groupby(buckets, observed=False).mean()
+	summary = pandas.DataFrame(summary)
+	summary.columns.names = ["horizon", "statistic"]
+	summary.index.name = "margin"
+	return summary
+
+def backtest(root: str = "results/store", tickers: list[str] = None, start=None, end=None,
+			 horizons: list[str] = HORIZONS, bins: list[float] = MARGIN_BINS, **assumptions) -> tuple:
+	"""
+	Replay a columnar store and measure whether the margin of safety predicted forward returns.
+
+		snapshots, buckets = stockanalysis.backtest.backtest("results/store", horizons=["90D", "365D"])
+
+	:param assumptions: Any DCF assumption accepted by signals(), e.g. min_discount_rate=0.06.
+	:return tuple: The snapshots from forward_returns() and the summary from bucket_returns().
+	"""
+	returns = forward_returns(signals(root, tickers, start, end, **assumptions), horizons)
+	return returns, bucket_returns(returns, bins)
+
+def _statement_rows(financials: pandas.DataFrame, index: pandas.MultiIndex, document: str, 
+					labels: tuple) -> tuple:
+	"""
+	Returns one statement row of every snapshot as a (snapshots, periods) float array, newest period first, and 
+		the number of periods of each snapshot (0 where the row is missing). Like valuation.dcf_inputs(), the first 
+		of labels that a snapshot has is used.
+	"""
+	if financials.empty:
+		return numpy.empty((len(index), 0)), numpy.zeros(len(index), dtype=int)
+	rows = financials[(financials["document"] == document) & financials["item"].isin(labels)]
+	rank = rows["item"].map({label: i for i, label in enumerate(labels)})
+	rows = rows[rank == rank.groupby([rows["ticker"], rows["run"]]).transform("min")]
+	rows = rows.assign(period=rows.groupby(_SNAPSHOT, sort=False).cumcount())
+
+	wide = rows.set_index([*_SNAPSHOT, "period"])["value"].unstack("period").reindex(index)
+	periods = rows.groupby(_SNAPSHOT).size().reindex(index, fill_value=0)
+	return wide.to_numpy(dtype=float), periods.to_numpy()
+
+def _estimates(forecast: pandas.DataFrame, index: pandas.MultiIndex) -> tuple:
+	"""
+	Returns the revenue, revenue growth, and EPS estimates of every snapshot as a (3, snapshots, years) float 
+		array, and the number of estimate years of each snapshot (0 where there are none). Like 
+		valuation.dcf_inputs(), they are the first three forecast rows after the historic columns.
+	"""
+	if forecast.empty:
+		return numpy.empty((3, len(index), 0)), numpy.zeros(len(index), dtype=int)
+
+	# Forecasts are stored row by row, so each value's row and column follow from its position in the snapshot
+	snapshot = forecast.groupby(_SNAPSHOT, sort=False)
+	height = snapshot["item"].transform("nunique")
+	width = snapshot["value"].transform("size") // height
+	cell = snapshot.cumcount()
+	forecast = forecast.assign(row=cell // width, column=cell % width - sa.valuation.FORECAST_HISTORY, 
+							   years=(width - sa.valuation.FORECAST_HISTORY).where(height >= 3, 0))
+	forecast = forecast[(forecast["row"] < 3) & (forecast["column"] >= 0)]
+
+	years = forecast.groupby(_SNAPSHOT)["years"].first().reindex(index, fill_value=0).clip(lower=0)
+	columns = pandas.MultiIndex.from_product([range(3), range(int(years.max()))], names=["row", "column"])
+	wide = forecast.set_index([*_SNAPSHOT, "row", "column"])["value"].unstack(["row", "column"])
+	wide = wide.reindex(index=index, columns=columns).to_numpy(dtype=float)
+	return wide.reshape(len(index), 3, len(columns) // 3).transpose(1, 0, 2), years.to_numpy()
+
+def _value_batch(result: pandas.DataFrame, positions: numpy.ndarray, shape: dict, rows: dict,
+				 estimates: numpy.ndarray, statistics: pandas.DataFrame, max_terminal_growth_rate: float,
+				 auto_terminal_growth_rate: bool) -> None:
+	"""
+	Value the snapshots at positions, which all have the same number of periods, in one broadcasted computation
+		and write the results into result.
+	"""
+	def history(name, sign=1):
+		values = rows[name][0][positions, :shape[name]]
+		return numpy.round(sign*numpy.nan_to_num(values)[:, ::-1])
+
+	years = shape["forecast"]
+	revenue_growth = estimates[1][positions, :years]
+	shares_outstanding = statistics["shares_outstanding"].to_numpy(dtype=float)[positions]
+	inputs = {
+		"past_revenue": history("past_revenue"),
+		"past_net_income": history("past_net_income"),
+		"past_da": history("past_da"),
+		"past_capex": history("past_capex", -1),
+		"revenue": sa.valuation.forward_fill(numpy.round(estimates[0][positions, :years])),
+		"eps": numpy.nan_to_num(estimates[2][positions, :years]),
+		# A column so it broadcasts against the (snapshots, years) EPS estimates
+		"shares_outstanding": shares_outstanding[:, None],
+	}
+	cash = numpy.nan_to_num(rows["cash"][0][positions, 0])
+	debt = numpy.nan_to_num(rows["debt"][0][positions, 0])
+
+	if auto_terminal_growth_rate:
+		terminal_growth_rate = _auto_terminal_growth_rates(revenue_growth, max_terminal_growth_rate)
+	else:
+		terminal_growth_rate = numpy.full(len(positions), float(max_terminal_growth_rate))
+	discount_rate = result["discount_rate"].to_numpy()[positions]
+
+	with numpy.errstate(divide="ignore", invalid="ignore"):
+		projection = sa.valuation.project_cash_flows(inputs)
+		discounted = sa.valuation.discount_cash_flows(projection["projected_free_cash_flow"], discount_rate,
+													  terminal_growth_rate)
+		implied_price = sa.valuation.implied_share_price(discounted["enterprise_value"], cash, debt,
+														 shares_outstanding)
+		margin = sa.valuation.margin_of_safety(implied_price, result["price"].to_numpy()[positions])
+
+	for column, values in (("implied_price", implied_price), ("margin", margin),
+						   ("terminal_growth_rate", terminal_growth_rate)):
+		result.iloc[positions, result.columns.get_loc(column)] = values
+
+def _auto_terminal_growth_rates(revenue_growth: numpy.ndarray, max_rate: float) -> numpy.ndarray:
+	"""
+	valuation.auto_terminal_growth_rate() for every row of a (snapshots, years) array.
+	"""
+	known = ~numpy.isnan(revenue_growth)
+	known[:, 0] = False
+	last = revenue_growth.shape[1] - 1 - numpy.argmax(known[:, ::-1], axis=1)
+	growth = revenue_growth[numpy.arange(len(revenue_growth)), last]
+	# Python's round(), as auto_terminal_growth_rate() uses, can differ from numpy.round() in the last digit
+	rates = numpy.array([min(round(rate*100/250, 6), max_rate) for rate in growth.tolist()])
+	return numpy.where(known.any(axis=1), rates, max_rate)
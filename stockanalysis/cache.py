@@ -0,0 +1,166 @@
+# Standard Library Imports
+import json
+import os
+import threading
+import time
+
+# Local Imports
+import stockanalysis as sa
+
+# Seconds each document stays fresh. Statements change at most quarterly, prices change constantly.
+DEFAULT_TTLS = {
+	sa.utils.INCOME_STATEMENT: 30 * 24 * 60 * 60,
+	sa.utils.BALANCE_SHEET: 30 * 24 * 60 * 60,
+	sa.utils.CASH_FLOW_STATEMENT: 30 * 24 * 60 * 60,
+	sa.utils.FORECAST: 24 * 60 * 60,
+	sa.utils.STATISTICS: 15 * 60,
+}
+
+
+class CacheMissError(LookupError):
+	"""
+	Raised in offline mode when a requested page has never been cached.
+	"""
+
+
+class PageCache:
+	def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024, ttls: dict = None, 
+			  	 offline: bool = False) -> None:
+		"""
+		A directory of cached stockanalysis.com pages, one folder per ticker and one file per document. The least 
+			recently used pages are evicted once the cache grows past max_bytes.
+
+		:param directory: The folder the cache is stored in. It is created if it does not exist.
+		:param max_bytes: The maximum total size of cached pages.
+		:param ttls: Seconds each document stays fresh, keyed by document number. Missing documents use 
+			DEFAULT_TTLS.
+		:param offline: True = Never touch the network, serve every page from the cache regardless of age. 
+			False = Refetch pages once they are stale.
+		"""
+		self.directory = directory
+		self.max_bytes = max_bytes
+		self.ttls = dict(DEFAULT_TTLS)
+		if ttls:
+			self.ttls.update(ttls)
+		self.offline = offline
+
+		self.lock = threading.Lock()
+		os.makedirs(directory, exist_ok=True)
+		self.size = sum(os.path.getsize(path) for path, _ in self._entries())
+
+	def _path(self, ticker: str, document: int) -> str:
+		return os.path.join(self.directory, ticker.lower(), sa.utils.DOCUMENT_NAMES[document])
+
+	def _entries(self) -> list[tuple[str, float]]:
+		"""
+		Returns (page path, last access time) for every cached page.
+		"""
+		entries = []
+		for folder in os.scandir(self.directory):
+			if not folder.is_dir():
+				continue
+			for entry in os.scandir(folder.path):
+				if entry.name.endswith(".html"):
+					entries.append((entry.path, entry.stat().st_mtime))
+		return entries
+
+	def get(self, ticker: str, document: int) -> tuple[bytes, dict]:
+		"""
+		Returns the cached page and its metadata, or (None, None) if the page is not cached. Reading a page marks it 
+			as recently used.
+
+		:param ticker: The string ticker of the company.
+		:param document: One of stockanalysis.INCOME_STATEMENT, BALANCE_SHEET, CASH_FLOW_STATEMENT, FORECAST, or 
+			STATISTICS.
+		"""
+		path = self._path(ticker, document)
+		try:
+			with open(path + ".json") as file:
+				meta = json.load(file)
+			with open(path + ".html", "rb") as file:
+				content = file.read()
+			os.utime(path + ".html")
+		except (OSError, ValueError):
+			return None, None
+		return content, meta
+
+	def is_fresh(self, document: int, meta: dict) -> bool:
+		"""
+		Returns True if a page fetched with this metadata is still within its document's TTL.
+		"""
+		return time.time() - meta["fetched"] < self.ttls[document]
+
+	def put(self, ticker: str, document: int, content: bytes, headers: dict = None) -> None:
+		"""
+		Store a page and the validators needed to revalidate it later, then evict old pages if the cache is full.
+
+		:param ticker: The string ticker of the company.
+		:param document: The document number of the page.
+		:param content: The raw page body.
+		:param headers: The response headers. ETag and Last-Modified are kept for revalidation.
+		"""
+		headers = headers or {}
+		path = self._path(ticker, document)
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+		try:
+			old_size = os.path.getsize(path + ".html")
+		except OSError:
+			old_size = 0
+
+		meta = {
+			"fetched": time.time(),
+			"etag": headers.get("ETag"),
+			"last-modified": headers.get("Last-Modified"),
+		}
+		self._write(path + ".html", content)
+		self._write(path + ".json", json.dumps(meta).encode())
+
+		with self.lock:
+			self.size += len(content) - old_size
+			if self.size > self.max_bytes:
+				self._evict()
+
+	def touch(self, ticker: str, document: int) -> None:
+		"""
+		Restart the TTL of a cached page after the server confirmed it has not changed.
+		"""
+		content, meta = self.get(ticker, document)
+		if meta is not None:
+			meta["fetched"] = time.time()
+			self._write(self._path(ticker, document) + ".json", json.dumps(meta).encode())
+
+	def clear(self) -> None:
+		"""
+		Remove every cached page.
+		"""
+		with self.lock:
+			for path, _ in self._entries():
+				self._remove(path)
+			self.size = 0
+
+	def _evict(self) -> None:
+		"""
+		Remove least recently used pages until the cache is at most 90% of max_bytes.
+		"""
+		for path, _ in sorted(self._entries(), key=lambda entry: entry[1]):
+			if self.size <= self.max_bytes * 0.9:
+				break
+			self.size -= self._remove(path)
+
+	def _remove(self, path: str) -> int:
+		try:
+			size = os.path.getsize(path)
+			os.remove(path)
+			os.remove(path[:-len(".html")] + ".json")
+		except OSError:
+			return 0
+		return size
+
+	def _write(self, path: str, content: bytes) -> None:
+		"""
+		Write through a temporary file so readers in other threads or processes never see a partial page.
+		"""
+		tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+		with open(tmp_path, "wb") as file:
+			file.write(content)
+		os.replace(tmp_path, path)
@@ -0,0 +1,327 @@
+"""
+Command line interface for batch valuations, meant for cron jobs and scripts.
+
+	python -m stockanalysis value --tickers stocks.txt --workers 16 --cache-dir cache --format csv -o results.csv
+	python -m stockanalysis value AAPL MSFT --grid --growth-rates 2 2.5 3 --discount-rates 8 10 12
+	python -m stockanalysis single AAPL --terminal-growth-rate 2.5
+"""
+# Standard Library Imports
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import time
+
+# Local Imports
+import stockanalysis as sa
+
+# Exit codes. A run where some tickers failed still writes every result it has.
+EXIT_OK = 0
+EXIT_PARTIAL = 1
+EXIT_USAGE = 2
+EXIT_FAILED = 3
+EXIT_INTERRUPTED = 130
+
+FORMATS = ("jsonl", "csv", "parquet", "xlsx")
+VALUE_COLUMNS = ("ticker", "price", "implied_price", "discount_rate", "terminal_growth_rate", "margin", "error",
+				 "kind")
+GRID_COLUMNS = ("ticker", "terminal_growth_rate", "discount_rate", "implied_price", "margin", "error", "kind")
+
+# Rows buffered into each parquet row group
+PARQUET_BATCH = 256
+
+
+def main(argv: list[str] = None) -> int:
+	"""
+	Run the command line interface.
+
+	:param argv: The arguments after the program name. If None, sys.argv is used.
+	:return int: The exit code, see EXIT_OK, EXIT_PARTIAL, EXIT_USAGE, EXIT_FAILED, and EXIT_INTERRUPTED.
+	"""
+	parser = _parser()
+	args = parser.parse_args(argv)
+	if args.offline and not args.cache_dir:
+		parser.error("--offline needs --cache-dir")
+	if args.command == "value":
+		if args.format in ("parquet", "xlsx") and args.output == "-":
+			parser.error(f"--format {args.format} needs a file, pass --output")
+		if args.grid and args.processes:
+			parser.error("--grid cannot be combined with --processes")
+		if not args.tickers and not args.ticker_file:
+			parser.error("pass tickers or --tickers")
+	try:
+		return args.run(args)
+	except KeyboardInterrupt:
+		return EXIT_INTERRUPTED
+	except BrokenPipeError:
+		# The reader of stdout went away, e.g. "| head". Point stdout at devnull so the exit flush cannot fail.
+		os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+		return EXIT_INTERRUPTED
+
+def value(args: argparse.Namespace) -> int:
+	"""
+	Value every ticker, writing a result for each one as soon as it is ready, then print a timing summary.
+	"""
+	_configure(args)
+	sink = sa.metrics.MemorySink()
+	sa.metrics.enable(sink)
+	tickers = _read_tickers(args)
+	run = sa.store.new_run() if args.store_root else None
+	min_discount_rate = args.min_discount_rate
+
+	if args.processes:
+		results = sa.dcf.value_shards(tickers, min_discount_rate, args.processes, args.format == "xlsx",
+									   args.store_root, run)
+	else:
+		results = sa.dcf.value_tickers(tickers, min_discount_rate, args.workers, ordered=False)
+
+	start = time.perf_counter()
+	failures = {}
+	total = 0
+	writer = _writer(args.format, args.output, GRID_COLUMNS if args.grid else VALUE_COLUMNS)
+	try:
+		for ticker, stock, error in results:
+			total += 1
+			if error is None and args.grid:
+				try:
+					rows, frame = _grid_rows(stock, args.growth_rates, args.discount_rates)
+				except Exception as grid_error:
+					stock, error = None, grid_error
+			if error is not None:
+				kind = sa.dcf.error_kind(error)
+				failures[kind] = failures.get(kind, 0) + 1
+				writer.write([{"ticker": ticker.upper(), "error": sa.dcf.error_message(error), "kind": kind}])
+				if not args.quiet:
+					print(f"{ticker.upper()} failed, {sa.dcf.error_message(error)}", file=sys.stderr)
+				continue
+
+			if args.store_root and not args.processes:
+				sa.store.save_stock(stock, args.store_root, run)
+			if not args.grid:
+				rows, frame = [_value_row(stock)], stock.dcf
+			writer.write(rows, ticker.upper(), frame)
+	finally:
+		writer.close()
+		sa.metrics.disable()
+
+	if not args.quiet:
+		print(_summary(total, failures, time.perf_counter() - start, sink.summary()), file=sys.stderr)
+	if not failures:
+		return EXIT_OK
+	return EXIT_FAILED if sum(failures.values()) == total else EXIT_PARTIAL
+
+def single(args: argparse.Namespace) -> int:
+	"""
+	Print the full DCF of one ticker.
+	"""
+	_configure(args)
+	growth_rate = None if args.terminal_growth_rate is None else args.terminal_growth_rate/100
+	try:
+		dcf = sa.single_dcf(args.ticker, args.results_fname, growth_rate, args.min_discount_rate/100)
+	except Exception as error:
+		print(f"{args.ticker.upper()} failed, {sa.dcf.error_message(error)}", file=sys.stderr)
+		return EXIT_FAILED
+	print(dcf.to_string())
+	return EXIT_OK
+
+def _parser() -> argparse.ArgumentParser:
+	parser = argparse.ArgumentParser(prog="python -m stockanalysis", description="Value US stocks with DCFs.")
+	commands = parser.add_subparsers(dest="command", required=True)
+
+	network = argparse.ArgumentParser(add_help=False)
+	network.add_argument("--cache-dir", help="Cache pages in this folder so repeated runs skip fresh pages.")
+	network.add_argument("--offline", action="store_true", help="Only use pages from --cache-dir.")
+	network.add_argument("--rate-limit", type=float, help="Maximum requests per second to stockanalysis.com.")
+
+	parser_value = commands.add_parser("value", parents=[network], help="Value a batch of tickers.",
+									   description="Value a batch of tickers, streaming one result per ticker.")
+	parser_value.add_argument("tickers", nargs="*", help="Tickers to value, added to any read from --tickers.")
+	parser_value.add_argument("--tickers", dest="ticker_file", metavar="PATH",
+							  help="Watchlist file with one ticker per line, or - for stdin.")
+	parser_value.add_argument("--workers", type=int, default=8, help="Tickers valued at the same time.")
+	parser_value.add_argument("--processes", type=int,
+							  help="Value tickers in this many worker processes. Stage timings are then not collected.")
+	parser_value.add_argument("--min-discount-rate", type=float, help="Minimum discount rate in percent, e.g. 6.")
+	parser_value.add_argument("--format", choices=FORMATS, default="jsonl", help="Output format.")
+	parser_value.add_argument("-o", "--output", default="-", help="Output file, or - for stdout.")
+	parser_value.add_argument("--store-root", help="Also append every result to the columnar store in this folder.")
+	parser_value.add_argument("--grid", action="store_true",
+							  help="Output a sensitivity grid per ticker instead of a single valuation.")
+	parser_value.add_argument("--growth-rates", type=float, nargs="+", default=[2.0, 2.5, 3.0],
+							  help="Terminal growth rates in percent for --grid.")
+	parser_value.add_argument("--discount-rates", type=float, nargs="+", default=[8.0, 9.0, 10.0, 11.0, 12.0],
+							  help="Discount rates in percent for --grid.")
+	parser_value.add_argument("-q", "--quiet", action="store_true", help="Do not print failures or the summary.")
+	parser_value.set_defaults(run=value)
+
+	parser_single = commands.add_parser("single", parents=[network], help="Print the DCF of one ticker.")
+	parser_single.add_argument("ticker")
+	parser_single.add_argument("--terminal-growth-rate", type=float,
+							   help="Terminal growth rate in percent. If not given, it is generated.")
+	parser_single.add_argument("--min-discount-rate", type=float, default=5.0, help="In percent.")
+	parser_single.add_argument("--results-fname", help="Also save the DCF to results/RESULTS_FNAME (.xlsx).")
+	parser_single.set_defaults(run=single)
+	return parser
+
+def _configure(args: argparse.Namespace) -> None:
+	if args.cache_dir:
+		sa.fetch.configure_cache(args.cache_dir, offline=args.offline)
+	if args.rate_limit:
+		sa.fetch.set_rate_limit(args.rate_limit)
+
+def _read_tickers(args: argparse.Namespace):
+	"""
+	Lazily yield the positional tickers, then those of --tickers.
+	"""
+	yield from args.tickers
+	if args.ticker_file == "-":
+		for line in sys.stdin:
+			ticker = line.strip()
+			if ticker and not ticker.startswith("#"):
+				yield ticker
+	elif args.ticker_file:
+		yield from sa.runner.read_tickers(args.ticker_file)
+
+def _value_row(stock) -> dict:
+	values = stock.dcf_values
+	return {
+		"ticker": stock.ticker.upper(),
+		"price": float(values["price"]),
+		"implied_price": float(values["implied_price"]),
+		"discount_rate": float(values["discount_rate"]),
+		"terminal_growth_rate": float(values["terminal_growth_rate"]),
+		"margin": float(values["margin"]),
+	}
+
+def _grid_rows(stock, growth_rates: list[float], discount_rates: list[float]) -> tuple:
+	"""
+	Returns one row per combination of the sensitivity grid of stock, and the implied price grid for its sheet.
+	"""
+	growth_rates = [rate/100 for rate in growth_rates]
+	discount_rates = [rate/100 for rate in discount_rates]
+	prices = stock.gen_sensitivity(growth_rates, discount_rates)
+	margins = stock.gen_sensitivity(growth_rates, discount_rates, metric="margin")
+	rows = []
+	for growth_rate, price_row, margin_row in zip(growth_rates, prices.to_numpy(), margins.to_numpy()):
+		for discount_rate, price, margin in zip(discount_rates, price_row, margin_row):
+			# Combinations without a valid value are left empty rather than written as NaN, which JSON lacks
+			valid = not math.isnan(price)
+			rows.append({"ticker": stock.ticker.upper(), "terminal_growth_rate": growth_rate,
+						 "discount_rate": discount_rate, "implied_price": float(price) if valid else None, 
+						 "margin": float(margin) if valid else None})
+	return rows, prices
+
+def _summary(total: int, failures: dict, seconds: float, metrics: dict) -> str:
+	"""
+	Lay out the timing summary printed at the end of a run.
+	"""
+	failed = sum(failures.values())
+	lines = [f"Valued {total - failed}/{total} tickers in {seconds:.2f}s ({total / seconds if seconds else 0:.2f}/s)"]
+	if failures:
+		lines[0] += ", failed: " + ", ".join(f"{kind} {count}" for kind, count in sorted(failures.items()))
+
+	timers = {name: value for name, value in metrics.items() if isinstance(value, dict)}
+	if timers:
+		lines.append(f"{'stage':<32}{'count':>8}{'total_s':>10}{'p50_ms':>10}{'p99_ms':>10}")
+		for name, timer in timers.items():
+			lines.append(f"{name:<32}{timer['count']:>8}{timer['total']:>10.3f}{timer['p50'] * 1000:>10.2f}"
+						 f"{timer['p99'] * 1000:>10.2f}")
+	counters = [f"{name} {value:g}" for name, value in metrics.items() if not isinstance(value, dict)]
+	if counters:
+		lines.append("; ".join(counters))
+	return "\n".join(lines)
+
+def _writer(format: str, output: str, columns: tuple):
+	if format == "jsonl":
+		return _JSONLinesWriter(output, columns)
+	if format == "csv":
+		return _CSVWriter(output, columns)
+	if format == "parquet":
+		return _ParquetWriter(output, columns)
+	return _ExcelWriter(output, columns)
+
+
+class _JSONLinesWriter:
+	def __init__(self, output: str, columns: tuple) -> None:
+		"""
+		Write one JSON object per row, flushed as soon as it is written.
+		"""
+		self.file = sys.stdout if output == "-" else open(output, "w")
+		self.columns = columns
+
+	def write(self, rows: list[dict], sheet: str = None, frame=None) -> None:
+		for row in rows:
+			self.file.write(json.dumps({column: row.get(column) for column in self.columns}) + "\n")
+		self.file.flush()
+
+	def close(self) -> None:
+		if self.file is not sys.stdout:
+			self.file.close()
+
+
+class _CSVWriter(_JSONLinesWriter):
+	def __init__(self, output: str, columns: tuple) -> None:
+		"""
+		Write a header, then one CSV line per row, flushed as soon as it is written.
+		"""
+		self.file = sys.stdout if output == "-" else open(output, "w", newline="")
+		self.writer = csv.DictWriter(self.file, columns)
+		self.writer.writeheader()
+
+	def write(self, rows: list[dict], sheet: str = None, frame=None) -> None:
+		self.writer.writerows(rows)
+		self.file.flush()
+
+
+class _ParquetWriter:
+	def __init__(self, output: str, columns: tuple) -> None:
+		"""
+		Write rows to a parquet file, one row group per PARQUET_BATCH rows so memory stays flat.
+		"""
+		import pyarrow
+		import pyarrow.parquet
+
+		self.schema = pyarrow.schema([(column, pyarrow.string() if column in ("ticker", "error", "kind")
+										else pyarrow.float64()) for column in columns])
+		self.writer = pyarrow.parquet.ParquetWriter(output, self.schema)
+		self.rows = []
+
+	def write(self, rows: list[dict], sheet: str = None, frame=None) -> None:
+		self.rows += rows
+		if len(self.rows) >= PARQUET_BATCH:
+			self._flush()
+
+	def _flush(self) -> None:
+		import pyarrow
+
+		if self.rows:
+			self.writer.write_table(pyarrow.Table.from_pylist(self.rows, schema=self.schema))
+			self.rows = []
+
+	def close(self) -> None:
+		self._flush()
+		self.writer.close()
+
+
+class _ExcelWriter:
+	def __init__(self, output: str, columns: tuple) -> None:
+		"""
+		Stream a sheet per ticker to a workbook as it is valued, with every row on a Summary sheet written last.
+		"""
+		self.writer = sa.sheets.ExcelWriter(output, write_only=True, first_sheet="Summary")
+		self.columns = columns
+		self.rows = []
+
+	def write(self, rows: list[dict], sheet: str = None, frame=None) -> None:
+		self.rows += rows
+		if sheet is not None:
+			self.writer.write_sheet(sheet, frame)
+
+	def close(self) -> None:
+		import pandas
+
+		summary = pandas.DataFrame(self.rows, columns=self.columns).set_index("ticker")
+		self.writer.write_sheet("Summary", summary)
+		self.writer.save()
@@ -1,13 +1,46 @@
+# Standard Library Imports
+import multiprocessing
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+
 # Third Party Imports
 import pandas
-import xlwings
 
 # Local Imports
 import stockanalysis as sa
 
+SUMMARY_COLUMNS = ["#", "Ticker", "Price", "Discount Rate", "Terminal Growth Rate", "Margin"]
+
+# Number of tickers sent to a worker process at once
+SHARD_SIZE = 8
+
+# Stocks kept between incremental multi_dcf() calls, keyed by ticker and minimum discount rate
+_stocks = {}
+
+# Worker processes kept between multi_dcf() calls, and the settings last applied inside a worker
+_process_pool = None
+_process_count = 0
+_worker_settings = None
+
+# Workers start from a fresh interpreter instead of a fork of this one, which has threads of its own and could copy 
+# a lock, like the one in stockanalysis.fetch, while another thread holds it
+_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class WorkerError(Exception):
+	def __init__(self, message: str, kind: str) -> None:
+		"""
+		A valuation that failed in a worker process, carrying the original message and error_kind().
+		"""
+		super().__init__(message)
+		self.kind = kind
+
+
 def single_dcf(ticker: str, results_fname: str = None, terminal_growth_rate: float = None, 
 			min_discount_rate: float = 0.05, risk_free_rate: float = 0.047, market_return: float = 0.08, 
-			default_beta: float = 1.3) -> pandas.DataFrame:
+			default_beta: float = 1.3, concurrent: bool = False, backend: str = "openpyxl") -> pandas.DataFrame:
 	"""
 	Complete a DCF for one ticker and save it to an excel file.
 
@@ -20,41 +53,39 @@ def single_dcf(ticker: str, results_fname: str = None, terminal_growth_rate: flo
 		time period.
 	:param market_return: The expected return for the market subset that is being analyzed.
 	:param default_beta: The beta to use if no 5 Year beta is available on stockanalysis.com.
+	:param concurrent: True = Fetch all pages for the ticker at the same time. False = Fetch them one after another.
+	:param backend: "openpyxl" = Write the Excel file directly. "xlwings" = Write it through an installed copy of 
+		Excel.
 	:return pandas.DataFrame: The DCF will be returned.
 	"""
 	if terminal_growth_rate:
 		stock = sa.Stock(ticker, terminal_growth_rate, min_discount_rate, risk_free_rate, market_return, default_beta)
-		stock.gen_dcf(auto_terminal_growth_rate=False)
+		stock.gen_dcf(auto_terminal_growth_rate=False, concurrent=concurrent)
 	else:
 		stock = sa.Stock(ticker, min_discount_rate=min_discount_rate, risk_free_rate=risk_free_rate, 
 				   		 market_return=market_return, default_beta=default_beta)
-		stock.gen_dcf()
+		stock.gen_dcf(concurrent=concurrent)
 
 	if results_fname:
-		results_fname = "results/" + results_fname
-		sa.create_workbook(results_fname, ticker.upper())
-
-		with xlwings.App(visible=False) as app:
-			wb = app.books.open(results_fname)
-			wb.sheets(ticker.upper()).range("A1").value = stock.dcf
-			wb.sheets(ticker.upper()).range('B1', 'Z100').api.HorizontalAlignment = xlwings.constants.HAlign.xlHAlignCenter
-			wb.sheets(ticker.upper()).range('A1', 'A100').api.HorizontalAlignment = xlwings.constants.HAlign.xlHAlignLeft
-			wb.sheets(ticker.upper()).range('A1', 'L1').font.bold = True
-			wb.sheets(ticker.upper()).range('A1', 'A100').font.bold = True
-			wb.sheets(ticker.upper()).range('L20', 'L21').font.bold = True
-			wb.sheets(ticker.upper()).range('A1', 'Z100').autofit()
-			wb.save()
+		writer = sa.sheets.ExcelWriter("results/" + results_fname, backend, append=False)
+		writer.write_sheet(ticker.upper(), stock.dcf)
+		writer.save()
 	return stock.dcf
 
 
 def multi_dcf(tickers: list[str], results_fname: str = None, sort: bool = True, 
-			  min_discount_rate: float = None) -> pandas.DataFrame:
+			  min_discount_rate: float = None, workers: int = 1, rate_limit: float = None, 
+			  verbose: bool = True, backend: str = "openpyxl", write_only: bool = False, 
+			  store_root: str = None, incremental: bool = False, max_age: dict = None, 
+			  processes: int = None) -> pandas.DataFrame:
 	"""
 	Complete a Discounted Cash Flow for each ticker in tickers. Each stock will have their own DCF appear in a 
 		separate sheet in the same file. There will also be a summary page containing the highlights of the 
 		results of each stock.
 	
-	A confirmation is printed for each stock completed and error messages for each stock incomplete.
+	A confirmation is printed for each stock completed and error messages for each stock incomplete. Failures are 
+		also recorded in the returned DataFrame's attrs["failures"] as a list of {"ticker", "error", "kind"} 
+		dictionaries, where kind is "network", "parse", "missing-field", or "other". See error_kind().
 
 	:param tickers: This list of strings contains all tickers that will be evaluated.
 	:param results_fname: The file name of the results excel sheet. Must end with .xlsx. If None, 
@@ -62,70 +93,306 @@ def multi_dcf(tickers: list[str], results_fname: str = None, sort: bool = True,
 	:param sort: True = Sort the results A-Z both on the Summary and individual stock sheets. 
 		False = Order of tickers is maintained as provided.
 	:param min_discount_rate: The minimum discount rate percentage for all valuations. For 6%, enter 6 as the value.
+	:param workers: The maximum number of tickers valued at the same time. Results keep the order of tickers 
+		regardless of which finishes first.
+	:param rate_limit: The maximum requests per second sent to stockanalysis.com across all workers. If None, the 
+		current limit set by stockanalysis.fetch.set_rate_limit() is kept.
+	:param verbose: True = Print a line for each stock completed or unavailable. False = Stay silent.
+	:param backend: "openpyxl" = Build the workbook in memory and write the file once, works without Excel 
+		installed. "xlwings" = Write it through an installed copy of Excel.
+	:param write_only: True = Stream each stock's sheet to disk as soon as it is valued so memory stays flat for 
+		very large batches. The file is created from scratch. False = Update an existing file, replacing sheets 
+		with the same name. Only applies to the openpyxl backend.
+	:param store_root: The folder of a columnar store to append every scraped document and DCF to, all under one 
+		run timestamp. See stockanalysis.store.save_stock(). If None, nothing is stored.
+	:param incremental: True = Reuse the stocks from earlier incremental calls in this process, refetching only 
+		documents older than max_age and recomputing only what depends on them. See Stock.gen_dcf(). Combine with 
+		stockanalysis.configure_cache() so new processes also skip fresh documents.
+	:param max_age: Seconds each document may be reused for when incremental is True.
+	:param processes: Value tickers in this many worker processes instead of threads, for large batches that are 
+		CPU bound on parsing and valuing, e.g. when pages come from the cache. Workers send back only the numeric 
+		DCF, stay alive for later calls, and each get an equal share of rate_limit. A pool whose worker died is 
+		restarted and its unfinished tickers valued again. Workers start fresh interpreters, so scripts must call 
+		multi_dcf() under if __name__ == "__main__". Cannot be combined with incremental. If None, tickers are 
+		valued in this process.
 	:return pandas.DataFrame: The Summary sheet with the ticker, discount rate, terminal growth rate, and margin of 
 		safety will be returned. Individual DCFs are only accessible from an Excel file if results_fname is provided.
 	"""
-	df = pandas.DataFrame(columns=["#", "Ticker", "Price", "Discount Rate", "Terminal Growth Rate", "Margin"])
+	if processes and incremental:
+		raise ValueError("incremental valuations cannot be combined with processes")
 
+	rows = []
 	if results_fname:
-		results_fname = "results/" + results_fname
-		with xlwings.App(visible=False) as app:
-			try:
-				wb = app.books.open(results_fname)
-				current_sheets = [sheet.name for sheet in wb.sheets]
-			except:
-				sa.create_workbook(results_fname, "Summary")
-				wb = app.books.open(results_fname)
-				current_sheets = [sheet.name for sheet in wb.sheets]
-
+		writer = sa.sheets.ExcelWriter("results/" + results_fname, backend, write_only, first_sheet="Summary")
 	if sort:
 		tickers.sort()
+	if rate_limit:
+		sa.fetch.set_rate_limit(rate_limit)
+	run = sa.store.new_run() if store_root else None
+
+	if processes:
+		results = value_shards(tickers, min_discount_rate, processes, bool(results_fname), store_root, run)
+	else:
+		results = value_tickers(tickers, min_discount_rate, workers, incremental, max_age)
 
+	failures = []
 	count = 1
-	for i in range(len(tickers)):
-		ticker = tickers[i]
-		if min_discount_rate:
-			stock = sa.Stock(ticker, min_discount_rate=(min_discount_rate/100.0))
-		else:
-			stock = sa.Stock(ticker)
-		try:
-			stock.gen_dcf()
-			df.loc[i] = [count, ticker.upper(), "$"+str(stock.price), str(stock.discount_rate*100)+"%", str(stock.terminal_growth_rate*100)+"%", stock.dcf_margin]
-
-			if results_fname:
-				with xlwings.App(visible=False) as app:
-					wb = app.books.open(results_fname)
-					if ticker.upper() in current_sheets:
-						wb.sheets(ticker.upper()).range("A1").value = stock.dcf
-					else:
-						new_sheet = wb.sheets.add(after=wb.sheets.count)
-						new_sheet.range("A1").value = stock.dcf
-						new_sheet.name = ticker.upper()
-					wb.sheets(ticker.upper()).range('B1', 'Z100').api.HorizontalAlignment = xlwings.constants.HAlign.xlHAlignCenter
-					wb.sheets(ticker.upper()).range('A1', 'A100').api.HorizontalAlignment = xlwings.constants.HAlign.xlHAlignLeft
-					wb.sheets(ticker.upper()).range('A1', 'L1').font.bold = True
-					wb.sheets(ticker.upper()).range('A1', 'A100').font.bold = True
-					wb.sheets(ticker.upper()).range('L20', 'L21').font.bold = True
-					wb.sheets(ticker.upper()).range('A1', 'Z100').autofit()
-					wb.save()
-			count += 1
+	for ticker, stock, error in results:
+		if error is not None:
+			failures.append({"ticker": ticker.upper(), "error": error_message(error), "kind": error_kind(error)})
+			sa.metrics.count("tickers", status="failed")
+			if verbose:
+				print(f"~~ An Error Has Occurred, {ticker.upper()} Unavailable ~~")
+			continue
+
+		rows.append([count, ticker.upper(), "$"+str(stock.price), str(stock.discount_rate*100)+"%", str(stock.terminal_growth_rate*100)+"%", stock.dcf_margin])
+
+		if results_fname:
+			writer.write_sheet(ticker.upper(), stock.dcf)
+		if store_root and not processes:
+			sa.store.save_stock(stock, store_root, run)
+		sa.metrics.count("tickers", status="complete")
+		count += 1
+		if verbose:
 			print(f"[*] {ticker.upper()} is Complete")
-		except:
-			print(f"~~ An Error Has Occurred, {ticker.upper()} Unavailable ~~")
 
-	df = df.set_index("#")
+	df = pandas.DataFrame(rows, columns=SUMMARY_COLUMNS).set_index("#")
+	df.attrs["failures"] = failures
 	if results_fname:
-		with xlwings.App(visible=False) as app:
-			wb = app.books.open(results_fname)
-			if "Summary" in current_sheets:
-				wb.sheets("Summary").range("A1").value = df
-			else:
-				new_sheet = wb.sheets.add(before=wb.sheets[0])
-				new_sheet.range("A1").value = df
-				new_sheet.name = "Summary"
-			wb.sheets[0].range('A1', 'Z1000').api.HorizontalAlignment = xlwings.constants.HAlign.xlHAlignCenter
-			wb.sheets[0].range('A1', 'F1').font.bold = True
-			wb.sheets[0].range('A1', 'Z1000').autofit()
-			wb.save()
+		writer.write_sheet("Summary", df)
+		writer.save()
+	sa.metrics.flush()
 
 	return df
+
+def _value_ticker(ticker: str, min_discount_rate: float = None, incremental: bool = False, 
+				  max_age: dict = None) -> tuple:
+	"""
+	Run the DCF for a single ticker, catching any error so one bad ticker does not stop a batch.
+
+	:return tuple: (ticker, Stock, None) on success or (ticker, None, exception) on failure.
+	"""
+	key = (ticker.lower(), min_discount_rate)
+	if incremental and key in _stocks:
+		stock = _stocks[key]
+	elif min_discount_rate:
+		stock = sa.Stock(ticker, min_discount_rate=(min_discount_rate/100.0))
+	else:
+		stock = sa.Stock(ticker)
+	try:
+		stock.gen_dcf(incremental=incremental, max_age=max_age)
+		if incremental:
+			_stocks[key] = stock
+	except Exception as error:
+		sa.metrics.count("errors", kind=error_kind(error))
+		return ticker, None, error
+	return ticker, stock, None
+
+def error_kind(error: Exception) -> str:
+	"""
+	Classify why a valuation failed.
+
+	:return str: "network" if a page could not be fetched, "parse" if a page had an unexpected layout, 
+		"missing-field" if a page lacked a value the DCF needs, otherwise "other".
+	"""
+	if isinstance(error, WorkerError):
+		return error.kind
+	if isinstance(error, (sa.fetch.FetchError, sa.cache.CacheMissError)):
+		return "network"
+	if isinstance(error, sa.scrape.MissingFieldError):
+		return "missing-field"
+	if isinstance(error, sa.scrape.ParseError):
+		return "parse"
+	return "other"
+
+def close_process_pool() -> None:
+	"""
+	Stop the worker processes kept alive by multi_dcf(processes=...).
+	"""
+	global _process_pool, _process_count
+
+	if _process_pool is not None:
+		_process_pool.shutdown()
+	_process_pool = None
+	_process_count = 0
+
+def error_message(error: Exception) -> str:
+	"""
+	Returns the message a batch reports for a failed valuation, e.g. "FetchError: 404 error fetching ...".
+	"""
+	if isinstance(error, WorkerError):
+		return str(error)
+	return f"{type(error).__name__}: {error}"
+
+def value_tickers(tickers, min_discount_rate: float = None, workers: int = 1, incremental: bool = False, 
+				  max_age: dict = None, ordered: bool = True):
+	"""
+	Yield (ticker, Stock, None) for each ticker valued or (ticker, None, exception) for each that failed, valuing 
+		up to workers tickers at the same time. Tickers may be any iterable and are only read a few ahead of the 
+		results, so long generators stay lazy. See multi_dcf() for the other arguments.
+
+	:param ordered: True = Yield results in the order of tickers. False = Yield each result as soon as it is 
+		ready, so one slow ticker does not hold back the ones after it.
+	"""
+	if workers <= 1:
+		for ticker in tickers:
+			yield _value_ticker(ticker, min_discount_rate, incremental, max_age)
+		return
+
+	tickers = iter(tickers)
+	pending = deque()
+	with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stockanalysis-dcf") as executor:
+		try:
+			for ticker in tickers:
+				pending.append(executor.submit(_value_ticker, ticker, min_discount_rate, incremental, max_age))
+				if len(pending) >= 2*workers:
+					yield from _next_results(pending, ordered)
+			while pending:
+				yield from _next_results(pending, ordered)
+		finally:
+			for future in pending:
+				future.cancel()
+
+def _next_results(pending: deque, ordered: bool) -> list:
+	"""
+	Remove and return the results of the oldest future in pending, or of every finished future when not ordered.
+	"""
+	if ordered:
+		return [pending.popleft().result()]
+	done = wait(pending, return_when=FIRST_COMPLETED).done
+	finished = [future for future in pending if future in done]
+	for future in finished:
+		pending.remove(future)
+	return [future.result() for future in finished]
+
+def value_shards(tickers, min_discount_rate: float, processes: int, frames: bool, store_root: str, run):
+	"""
+	Like value_tickers(), but value shards of SHARD_SIZE tickers in worker processes, in the order of tickers. 
+		Stocks are rebuilt from the numeric DCF each worker sends back, with a formatted DCF only when frames is 
+		True. Failures are WorkerError exceptions. See multi_dcf() for the other arguments.
+
+	:param frames: True = Also rebuild Stock.dcf. False = Leave it empty.
+	:param store_root: The folder of a columnar store each worker appends its stocks to, or None.
+	:param run: The run timestamp stored stocks are filed under.
+	"""
+	if _process_pool is None or _process_count != processes:
+		_start_process_pool(processes)
+	settings = _settings(processes)
+
+	def submit(shard: list[str]) -> Future:
+		try:
+			return _process_pool.submit(_value_shard, shard, min_discount_rate, settings, store_root, run)
+		except BrokenProcessPool as error:
+			future = Future()
+			future.set_exception(error)
+			return future
+
+	tickers = iter(tickers)
+	pending = deque()
+	try:
+		while shard := list(islice(tickers, SHARD_SIZE)):
+			pending.append((shard, submit(shard)))
+			if len(pending) >= 2*processes:
+				yield from _restore(_shard_results(pending, submit, processes), frames)
+		while pending:
+			yield from _restore(_shard_results(pending, submit, processes), frames)
+	finally:
+		for _, future in pending:
+			future.cancel()
+
+def _shard_results(pending: deque, submit, processes: int) -> list:
+	"""
+	Remove the oldest (shard, future) from pending and return its _value_shard() results. If a worker died, the 
+		pool is restarted and the shard valued again on its own, so only the shard of a ticker that keeps killing 
+		its worker is reported as failed. The other shards the dead pool took with it are then resubmitted, while 
+		shards that finished before it died keep their results.
+	"""
+	shard, future = pending.popleft()
+	try:
+		return future.result()
+	except BrokenProcessPool:
+		pass
+
+	_start_process_pool(processes)
+	try:
+		results = submit(shard).result()
+	except BrokenProcessPool as error:
+		_start_process_pool(processes)
+		results = [(ticker, None, (error_message(error), "other")) for ticker in shard]
+	for index, (other, other_future) in enumerate(pending):
+		if isinstance(other_future.exception(), BrokenProcessPool):
+			pending[index] = (other, submit(other))
+	return results
+
+def _start_process_pool(processes: int) -> None:
+	"""
+	Replace the worker processes with a new pool of processes workers.
+	"""
+	global _process_pool, _process_count
+
+	close_process_pool()
+	_process_pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context(_START_METHOD))
+	_process_count = processes
+
+def _value_shard(tickers: list[str], min_discount_rate: float, settings: dict, store_root: str, run) -> list:
+	"""
+	Value a shard of tickers inside a worker process.
+
+	:return list: (ticker, {"values": Stock.dcf_values, "beta": Stock.beta}, None) on success or 
+		(ticker, None, (error message, error kind)) on failure, for each ticker.
+	"""
+	_apply_settings(settings)
+	results = []
+	for ticker in tickers:
+		_, stock, error = _value_ticker(ticker, min_discount_rate)
+		if error is not None:
+			results.append((ticker, None, (error_message(error), error_kind(error))))
+			continue
+		if store_root:
+			sa.store.save_stock(stock, store_root, run)
+		results.append((ticker, {"values": stock.dcf_values, "beta": stock.beta}, None))
+	return results
+
+def _restore(results: list, frames: bool):
+	"""
+	Turn the results of _value_shard() back into (ticker, Stock, error) tuples.
+	"""
+	for ticker, result, failure in results:
+		if failure is not None:
+			yield ticker, None, WorkerError(*failure)
+			continue
+
+		values = result["values"]
+		stock = sa.Stock(ticker)
+		stock.dcf_values = values
+		stock.beta = result["beta"]
+		stock.price = values["price"]
+		stock.shares_outstanding = values["shares_outstanding"]
+		stock.discount_rate = values["discount_rate"]
+		stock.terminal_growth_rate = values["terminal_growth_rate"]
+		stock.dcf_result = float(values["implied_price"])
+		stock.dcf_margin = sa.valuation.format_percent(values["margin"])
+		if frames:
+			stock.dcf = sa.valuation.dcf_frame(values)
+		yield ticker, stock, None
+
+def _settings(processes: int) -> dict:
+	"""
+	Returns the fetch settings of this process for workers to copy, splitting the rate limit between them.
+	"""
+	settings = sa.fetch.settings()
+	if settings["rate_limit"] is not None:
+		rate, burst = settings["rate_limit"]
+		settings["rate_limit"] = (rate/processes, burst)
+	return settings
+
+def _apply_settings(settings: dict) -> None:
+	"""
+	Copy the fetch settings of the parent process into a worker, unless they are already applied.
+	"""
+	global _worker_settings
+
+	if settings == _worker_settings:
+		return
+	sa.fetch.apply_settings(settings)
+	_worker_settings = settings
@@ -0,0 +1,522 @@
+# Standard Library Imports
+import email.utils
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+# Third Party Imports
+import requests
+from requests.adapters import HTTPAdapter
+
+# Local Imports
+import stockanalysis as sa
+
+# Shared connection pool settings, changed through configure_session()
+_config = {
+	"pool_size": 10,
+	"max_per_host": 5,
+	"timeout": 30.0,
+}
+# Retry settings, changed through configure_retries()
+_retry = {
+	"retries": 3,
+	"backoff": 0.5,
+	"max_backoff": 30.0,
+	"statuses": frozenset((429, 500, 502, 503, 504)),
+}
+# Failures of the connection or the body download rather than the server's answer, retried like any other
+NETWORK_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError, 
+				  requests.exceptions.ContentDecodingError)
+_session = None
+_executor = None
+_host_limits = {}
+_rate_limiter = None
+_cache = None
+_lock = threading.Lock()
+
+
+class FetchError(OSError):
+	def __init__(self, message: str, url: str, status: int = None, retry_after: float = None) -> None:
+		"""
+		A page could not be fetched, either because the server could not be reached or because it answered with 
+			an error status.
+
+		:param message: The error message.
+		:param url: The URL of the page.
+		:param status: The HTTP status of the response, or None if there was no response.
+		:param retry_after: Seconds the server asked us to wait before trying again, if it said.
+		"""
+		super().__init__(message)
+		self.url = url
+		self.status = status
+		self.retry_after = retry_after
+		self.retryable = status is None or status in _retry["statuses"]
+
+
+class RateLimiter:
+	def __init__(self, rate: float, burst: int = 1) -> None:
+		"""
+		A token bucket shared by every thread. Each request takes one token, and tokens refill at a steady rate.
+
+		:param rate: The number of tokens added per second, i.e. the sustained requests per second.
+		:param burst: The maximum number of tokens that can be saved up for back-to-back requests.
+		"""
+		self.rate = rate
+		self.burst = max(burst, 1)
+		self.tokens = float(self.burst)
+		self.updated = time.monotonic()
+		self.lock = threading.Lock()
+
+	def reserve(self) -> float:
+		"""
+		Take a token, borrowing against future refills if none are left, and return how many seconds the caller 
+			must wait before using it. Borrowing keeps callers in first come, first served order.
+		"""
+		with self.lock:
+			now = time.monotonic()
+			self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate) - 1
+			self.updated = now
+			if self.tokens >= 0:
+				return 0.0
+			return -self.tokens / self.rate
+
+	def acquire(self) -> None:
+		"""
+		Block until a token is available and take it.
+		"""
+		wait = self.reserve()
+		if wait > 0:
+			time.sleep(wait)
+
+
+class CircuitBreaker:
+	def __init__(self, threshold: int = 10, cooldown: float = 30.0) -> None:
+		"""
+		Pauses every thread when the site is clearly throttling us. After threshold retryable failures in a row, 
+			no request is sent until cooldown seconds (or a longer Retry-After) have passed.
+
+		:param threshold: The number of retryable failures in a row that opens the circuit.
+		:param cooldown: The number of seconds the circuit stays open.
+		"""
+		self.threshold = threshold
+		self.cooldown = cooldown
+		self.failures = 0
+		self.opened_until = 0.0
+		self.lock = threading.Lock()
+
+	def delay(self) -> float:
+		"""
+		Returns how many seconds the caller must wait before sending a request.
+		"""
+		with self.lock:
+			return max(0.0, self.opened_until - time.monotonic())
+
+	def record_success(self) -> None:
+		with self.lock:
+			self.failures = 0
+
+	def record_failure(self, retry_after: float = None) -> None:
+		with self.lock:
+			self.failures += 1
+			if self.failures < self.threshold:
+				return
+			self.failures = 0
+			self.opened_until = max(self.opened_until, time.monotonic() + max(self.cooldown, retry_after or 0))
+		sa.metrics.count("circuit_opened")
+
+# Requests pause by default once the site keeps failing, see set_circuit_breaker()
+_breaker = CircuitBreaker()
+
+
+def configure_session(pool_size: int = None, max_per_host: int = None, timeout: float = None) -> None:
+	"""
+	Change the settings of the shared HTTP session used for every request to stockanalysis.com. The session 
+		is rebuilt on the next request so the new settings take effect immediately.
+
+	:param pool_size: The number of keep-alive connections kept open per host and the number of fetches that can 
+		be in flight at once.
+	:param max_per_host: The maximum number of requests sent to a single host at the same time.
+	:param timeout: Seconds to wait for a server response before giving up on a request.
+	"""
+	global _session, _executor
+
+	with _lock:
+		if pool_size is not None:
+			_config["pool_size"] = pool_size
+		if max_per_host is not None:
+			_config["max_per_host"] = max_per_host
+		if timeout is not None:
+			_config["timeout"] = timeout
+
+		if _session is not None:
+			_session.close()
+		if _executor is not None:
+			_executor.shutdown(wait=False)
+		_session = None
+		_executor = None
+		_host_limits.clear()
+
+def set_rate_limit(rate: float = None, burst: int = 1) -> None:
+	"""
+	Limit how many requests per second are sent to stockanalysis.com across all threads.
+
+	:param rate: The maximum sustained requests per second. If None, requests are not rate limited.
+	:param burst: The number of requests that may be sent back-to-back before the rate applies.
+	"""
+	global _rate_limiter
+
+	_rate_limiter = RateLimiter(rate, burst) if rate else None
+
+def configure_retries(retries: int = None, backoff: float = None, max_backoff: float = None, 
+					  statuses: list[int] = None) -> None:
+	"""
+	Change how failed requests are retried. Only network errors and the given statuses are retried; other errors, 
+		like a 404 for an unknown ticker, fail right away. Waits grow exponentially with random jitter, and a 
+		Retry-After header from the server replaces the computed wait.
+
+	:param retries: The number of times a request is retried before giving up. 0 turns retries off.
+	:param backoff: Seconds to wait before the first retry. Each later retry waits up to twice as long.
+	:param max_backoff: The longest wait between two attempts, including waits asked for by Retry-After.
+	:param statuses: The HTTP statuses worth retrying.
+	"""
+	with _lock:
+		if retries is not None:
+			_retry["retries"] = retries
+		if backoff is not None:
+			_retry["backoff"] = backoff
+		if max_backoff is not None:
+			_retry["max_backoff"] = max_backoff
+		if statuses is not None:
+			_retry["statuses"] = frozenset(statuses)
+
+def set_circuit_breaker(threshold: int = 10, cooldown: float = 30.0) -> None:
+	"""
+	Pause all requests from every thread when the site keeps failing or throttling us. See CircuitBreaker.
+
+	:param threshold: The number of retryable failures in a row that pauses all requests. If None, requests are 
+		never paused.
+	:param cooldown: The number of seconds requests are paused for.
+	"""
+	global _breaker
+
+	_breaker = CircuitBreaker(threshold, cooldown) if threshold else None
+
+def configure_cache(directory: str = None, max_bytes: int = 256 * 1024 * 1024, ttls: dict = None, 
+					offline: bool = False) -> None:
+	"""
+	Cache fetched pages on disk so repeated runs only hit stockanalysis.com for stale pages. Stale pages are 
+		revalidated with ETag/Last-Modified when the site provides them.
+
+	:param directory: The folder the cache is stored in. If None, caching is turned off.
+	:param max_bytes: The maximum total size of cached pages before the least recently used are evicted.
+	:param ttls: Seconds each document stays fresh, keyed by document number, e.g. {stockanalysis.STATISTICS: 60}. 
+		Missing documents use stockanalysis.cache.DEFAULT_TTLS.
+	:param offline: True = Serve every page from the cache and never touch the network. A page that was never 
+		cached raises stockanalysis.cache.CacheMissError.
+	"""
+	global _cache
+
+	_cache = sa.cache.PageCache(directory, max_bytes, ttls, offline) if directory else None
+
+def get_cache():
+	"""
+	Returns the active stockanalysis.cache.PageCache, or None if caching is turned off.
+	"""
+	return _cache
+
+def settings() -> dict:
+	"""
+	Returns every setting changed by the configure_* and set_* functions, plus stockanalysis.utils.BASE_URL, so 
+		apply_settings() can copy them into another process.
+
+	:return dict: "base_url", "session" and "retry" keyword arguments, and the "cache", "rate_limit", and 
+		"circuit_breaker" positional arguments of their functions, None where turned off.
+	"""
+	cache = _cache
+	limiter = _rate_limiter
+	breaker = _breaker
+	return {
+		"base_url": sa.utils.BASE_URL,
+		"session": dict(_config),
+		"retry": dict(_retry),
+		"cache": None if cache is None else (cache.directory, cache.max_bytes, cache.ttls, cache.offline),
+		"rate_limit": None if limiter is None else (limiter.rate, limiter.burst),
+		"circuit_breaker": None if breaker is None else (breaker.threshold, breaker.cooldown),
+	}
+
+def apply_settings(settings: dict) -> None:
+	"""
+	Change every setting to the ones returned by settings().
+	"""
+	sa.utils.BASE_URL = settings["base_url"]
+	configure_session(**settings["session"])
+	configure_retries(**settings["retry"])
+	configure_cache(*(settings["cache"] or (None,)))
+	set_rate_limit(*(settings["rate_limit"] or (None,)))
+	set_circuit_breaker(*(settings["circuit_breaker"] or (None,)))
+
+def get_session() -> requests.Session:
+	"""
+	Returns the shared requests.Session, creating it on first use. Connections are kept alive and reused between 
+		requests instead of opening a new one per page.
+	"""
+	global _session
+
+	with _lock:
+		if _session is None:
+			adapter = HTTPAdapter(pool_connections=_config["pool_size"], pool_maxsize=_config["pool_size"], 
+						 		  pool_block=True)
+			_session = requests.Session()
+			_session.mount("https://", adapter)
+			_session.mount("http://", adapter)
+		return _session
+
+def _host_limit(url: str) -> threading.BoundedSemaphore:
+	host = urlsplit(url).netloc
+	with _lock:
+		if host not in _host_limits:
+			_host_limits[host] = threading.BoundedSemaphore(_config["max_per_host"])
+		return _host_limits[host]
+
+def fetch(url: str, headers: dict = None) -> requests.Response:
+	"""
+	Fetch a single page through the shared session, respecting the rate limit, circuit breaker, per-host 
+		concurrency limit, and timeout. Retryable failures are retried as set by configure_retries().
+
+	:param url: The full URL of the page.
+	:param headers: Extra request headers.
+	:return requests.Response: The response, which is guaranteed to have a successful status code.
+	:raises FetchError: The page could not be fetched, even after retrying.
+	"""
+	session = get_session()
+	attempt = 0
+	while True:
+		_sleep(request_delay())
+		try:
+			with _host_limit(url), sa.metrics.timer("fetch"):
+				webpage = session.get(url, headers=headers, timeout=_config["timeout"])
+			sa.metrics.count("requests", status=webpage.status_code)
+			sa.metrics.count("bytes_downloaded", len(webpage.content))
+			check_response(url, webpage.status_code, webpage.headers)
+			record_success()
+			return webpage
+		except NETWORK_ERRORS as error:
+			failure = network_error(url, error)
+		except FetchError as error:
+			failure = error
+		_sleep(retry_delay(failure, attempt))
+		attempt += 1
+
+def stream(url: str, chunk_size: int = 64 * 1024):
+	"""
+	Yield the body of a page in chunks as it downloads so it can be parsed incrementally. The per-host 
+		concurrency slot is held until the body has been read. Failures are retried like fetch() until the first 
+		chunk is yielded.
+
+	:param url: The full URL of the page.
+	:param chunk_size: The maximum number of bytes in each chunk.
+	"""
+	session = get_session()
+	attempt = 0
+	while True:
+		_sleep(request_delay())
+		with _host_limit(url):
+			try:
+				with sa.metrics.timer("fetch"):
+					webpage = session.get(url, stream=True, timeout=_config["timeout"])
+			except NETWORK_ERRORS as error:
+				failure = network_error(url, error)
+			else:
+				with webpage:
+					sa.metrics.count("requests", status=webpage.status_code)
+					try:
+						check_response(url, webpage.status_code, webpage.headers)
+						chunks = webpage.iter_content(chunk_size)
+						chunk = next(chunks, b"")
+					except NETWORK_ERRORS as error:
+						failure = network_error(url, error)
+					except FetchError as error:
+						failure = error
+					else:
+						record_success()
+						try:
+							while chunk:
+								sa.metrics.count("bytes_downloaded", len(chunk))
+								yield chunk
+								chunk = next(chunks, b"")
+						except NETWORK_ERRORS as error:
+							# Part of the body was already handed to the caller, so it cannot be retried here
+							raise network_error(url, error) from error
+						return
+		_sleep(retry_delay(failure, attempt))
+		attempt += 1
+
+def check_response(url: str, status: int, headers) -> None:
+	"""
+	Raise a FetchError for an error status, keeping any Retry-After the server sent.
+	"""
+	if status >= 400:
+		raise FetchError(f"{status} error fetching {url}", url, status, _retry_after(headers.get("Retry-After")))
+
+def network_error(url: str, error: Exception) -> FetchError:
+	"""
+	Wrap a network failure, like a refused connection, a timeout, or a body cut off mid-download, in a FetchError.
+	"""
+	failure = FetchError(f"{type(error).__name__} fetching {url}: {error}", url)
+	failure.__cause__ = error
+	return failure
+
+def request_delay() -> float:
+	"""
+	Returns how many seconds the caller must wait before sending a request, reserving a rate limit token.
+	"""
+	delay = _breaker.delay() if _breaker is not None else 0.0
+	if _rate_limiter is not None:
+		delay += _rate_limiter.reserve()
+	return delay
+
+def record_success() -> None:
+	if _breaker is not None:
+		_breaker.record_success()
+
+def retry_delay(failure: FetchError, attempt: int) -> float:
+	"""
+	Returns how many seconds to wait before retrying a failed request, or raises the failure if it should not be 
+		retried.
+
+	:param failure: The error of the failed attempt.
+	:param attempt: The number of retries already made for this request.
+	"""
+	if failure.retryable and _breaker is not None:
+		_breaker.record_failure(failure.retry_after)
+	if not failure.retryable or attempt >= _retry["retries"]:
+		raise failure
+
+	sa.metrics.count("retries", reason=failure.status or "network")
+	if failure.retry_after is not None:
+		return min(failure.retry_after, _retry["max_backoff"])
+	return min(_retry["backoff"] * 2**attempt, _retry["max_backoff"]) * random.uniform(0.5, 1.0)
+
+def _retry_after(value: str) -> float:
+	"""
+	Convert a Retry-After header, either seconds or an HTTP date, to seconds from now.
+	"""
+	if not value:
+		return None
+	try:
+		return max(0.0, float(value))
+	except ValueError:
+		pass
+	try:
+		return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+	except (TypeError, ValueError):
+		return None
+
+def _sleep(seconds: float) -> None:
+	if seconds > 0:
+		time.sleep(seconds)
+
+def stream_document(ticker: str, document: int):
+	"""
+	Returns the page source of a document as an iterable of byte chunks. Pages are streamed straight from the 
+		network when caching is off, otherwise the whole page comes from fetch_document().
+
+	:param ticker: The string ticker of the company.
+	:param document: One of stockanalysis.INCOME_STATEMENT, BALANCE_SHEET, CASH_FLOW_STATEMENT, FORECAST, or 
+		STATISTICS.
+	"""
+	if _cache is None:
+		return stream(document_url(ticker, document))
+	return [fetch_document(ticker, document)]
+
+def fetch_document(ticker: str, document: int) -> bytes:
+	"""
+	Returns the page source of a document for a ticker, going through the page cache when one is configured.
+
+	:param ticker: The string ticker of the company.
+	:param document: One of stockanalysis.INCOME_STATEMENT, BALANCE_SHEET, CASH_FLOW_STATEMENT, FORECAST, or 
+		STATISTICS.
+	"""
+	cache = _cache
+	if cache is None:
+		return fetch(document_url(ticker, document)).content
+
+	content, headers = cached_document(cache, ticker, document)
+	if headers is None:
+		return content
+
+	webpage = fetch(document_url(ticker, document), headers=headers)
+	return store_document(cache, ticker, document, webpage.status_code, webpage.content, webpage.headers, content)
+
+def cached_document(cache, ticker: str, document: int) -> tuple[bytes, dict]:
+	"""
+	Look a document up in the page cache.
+
+	:return tuple: (page, None) if the cached page can be used as is. Otherwise (stale page or None, request 
+		headers to revalidate it with).
+	"""
+	content, meta = cache.get(ticker, document)
+	if content is not None and (cache.offline or cache.is_fresh(document, meta)):
+		sa.metrics.count("cache_hits")
+		return content, None
+	sa.metrics.count("cache_misses")
+	if cache.offline:
+		raise sa.cache.CacheMissError(f"{sa.utils.DOCUMENT_NAMES[document]} for {ticker.upper()} is not cached")
+
+	headers = {}
+	if content is not None:
+		if meta.get("etag"):
+			headers["If-None-Match"] = meta["etag"]
+		if meta.get("last-modified"):
+			headers["If-Modified-Since"] = meta["last-modified"]
+	return content, headers
+
+def store_document(cache, ticker: str, document: int, status: int, content: bytes, headers, 
+				   cached_content: bytes = None) -> bytes:
+	"""
+	Update the page cache with a server response and return the page to use.
+
+	:param status: The HTTP status of the response. 304 keeps cached_content and restarts its TTL.
+	:param content: The response body.
+	:param headers: The response headers.
+	:param cached_content: The stale page returned by cached_document(), if any.
+	"""
+	if status == 304 and cached_content is not None:
+		sa.metrics.count("cache_revalidations")
+		cache.touch(ticker, document)
+		return cached_content
+
+	cache.put(ticker, document, content, headers)
+	return content
+
+def fetch_documents(ticker: str, documents: list[int], concurrent: bool = True) -> list[bytes]:
+	"""
+	Returns the page sources of several documents for a ticker in the same order as documents.
+
+	:param ticker: The string ticker of the company.
+	:param documents: The document numbers to fetch.
+	:param concurrent: True = Fetch every page at the same time over the shared connection pool. 
+		False = Fetch pages one after another.
+	"""
+	global _executor
+
+	if not concurrent:
+		return [fetch_document(ticker, document) for document in documents]
+
+	with _lock:
+		if _executor is None:
+			_executor = ThreadPoolExecutor(max_workers=_config["pool_size"], thread_name_prefix="stockanalysis-fetch")
+		executor = _executor
+	return list(executor.map(fetch_document, [ticker]*len(documents), documents))
+
+def document_url(ticker: str, document: int) -> str:
+	"""
+	Returns the stockanalysis.com URL of a document for a ticker.
+
+	:param ticker: The string ticker of the company.
+	:param document: One of stockanalysis.INCOME_STATEMENT, BALANCE_SHEET, CASH_FLOW_STATEMENT, FORECAST, or 
+		STATISTICS.
+	"""
+	return sa.utils.BASE_URL + ticker.lower() + sa.utils.DOCUMENT_PATHS[document]
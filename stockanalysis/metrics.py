@@ -0,0 +1,240 @@
+# Standard Library Imports
+import json
+import os
+import sys
+import threading
+import time
+
+# Active sinks. Instrumentation is skipped entirely while this is empty.
+_sinks = []
+
+
+class MemorySink:
+	def __init__(self) -> None:
+		"""
+		Keep every timing and counter in memory and summarize them on demand.
+		"""
+		self.timings = {}
+		self.counters = {}
+		self.lock = threading.Lock()
+
+	def record(self, kind: str, name: str, value: float, labels: dict) -> None:
+		key = (name, tuple(sorted(labels.items())))
+		with self.lock:
+			if kind == "timer":
+				self.timings.setdefault(key, []).append(value)
+			else:
+				self.counters[key] = self.counters.get(key, 0) + value
+
+	def summary(self) -> dict:
+		"""
+		Returns counter totals and, for every timer, its count, total, mean, p50, p99, and max in seconds. Keys are 
+			the metric name followed by any labels, e.g. "parse[document=forecast]".
+		"""
+		import numpy
+
+		with self.lock:
+			timings = {key: numpy.array(values) for key, values in self.timings.items()}
+			counters = dict(self.counters)
+
+		result = {}
+		for key, values in sorted(timings.items()):
+			result[_name(*key)] = {
+				"count": len(values),
+				"total": float(values.sum()),
+				"mean": float(values.mean()),
+				"p50": float(numpy.percentile(values, 50)),
+				"p99": float(numpy.percentile(values, 99)),
+				"max": float(values.max()),
+			}
+		for key, value in sorted(counters.items()):
+			result[_name(*key)] = value
+		return result
+
+	def clear(self) -> None:
+		with self.lock:
+			self.timings.clear()
+			self.counters.clear()
+
+
+class JSONLogSink:
+	def __init__(self, stream=None) -> None:
+		"""
+		Write one JSON object per timing or counter increment, e.g. 
+			{"time": 1700000000.0, "kind": "timer", "name": "fetch", "value": 0.21, "labels": {}}
+
+		:param stream: A file-like object or a path to append to. If None, lines go to stderr. A file opened from a 
+			path is closed by close() or when used as a context manager.
+		"""
+		self.owned = isinstance(stream, str)
+		if stream is None:
+			stream = sys.stderr
+		elif self.owned:
+			stream = open(stream, "a", buffering=1)
+		self.stream = stream
+		self.lock = threading.Lock()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args) -> None:
+		self.close()
+
+	def record(self, kind: str, name: str, value: float, labels: dict) -> None:
+		line = json.dumps({"time": time.time(), "kind": kind, "name": name, "value": value, "labels": labels})
+		with self.lock:
+			self.stream.write(line + "\n")
+
+	def close(self) -> None:
+		"""
+		Close the file opened from a path. Streams passed in are left open for their owner.
+		"""
+		with self.lock:
+			if self.owned and not self.stream.closed:
+				self.stream.close()
+
+
+class PrometheusSink:
+	def __init__(self, path: str, prefix: str = "stockanalysis") -> None:
+		"""
+		Aggregate timings and counters and write them in the Prometheus text format on flush(), for example to a 
+			node_exporter textfile collector directory.
+
+		:param path: The file the metrics are written to.
+		:param prefix: Prepended to every metric name.
+		"""
+		self.path = path
+		self.prefix = prefix
+		self.timings = {}
+		self.counters = {}
+		self.lock = threading.Lock()
+
+	def record(self, kind: str, name: str, value: float, labels: dict) -> None:
+		key = (name, tuple(sorted(labels.items())))
+		with self.lock:
+			if kind == "timer":
+				count, total = self.timings.get(key, (0, 0.0))
+				self.timings[key] = (count + 1, total + value)
+			else:
+				self.counters[key] = self.counters.get(key, 0) + value
+
+	def flush(self) -> None:
+		"""
+		Write the current totals to path, replacing the previous dump in one step.
+		"""
+		with self.lock:
+			timings = dict(self.timings)
+			counters = dict(self.counters)
+
+		lines = []
+		for name in sorted({key[0] for key in timings}):
+			metric = f"{self.prefix}_{name}_seconds"
+			lines.append(f"# TYPE {metric} summary")
+			for (key_name, labels), (count, total) in sorted(timings.items()):
+				if key_name == name:
+					lines.append(f"{metric}_count{_labels(labels)} {count}")
+					lines.append(f"{metric}_sum{_labels(labels)} {total}")
+		for name in sorted({key[0] for key in counters}):
+			metric = f"{self.prefix}_{name}_total"
+			lines.append(f"# TYPE {metric} counter")
+			for (key_name, labels), value in sorted(counters.items()):
+				if key_name == name:
+					lines.append(f"{metric}{_labels(labels)} {value}")
+
+		tmp_path = f"{self.path}.{os.getpid()}.tmp"
+		with open(tmp_path, "w") as file:
+			file.write("\n".join(lines) + "\n")
+		os.replace(tmp_path, self.path)
+
+
+class _Timer:
+	__slots__ = ("name", "labels", "start")
+
+	def __init__(self, name: str, labels: dict) -> None:
+		self.name = name
+		self.labels = labels
+
+	def __enter__(self):
+		self.start = time.perf_counter()
+		return self
+
+	def __exit__(self, *args) -> None:
+		elapsed = time.perf_counter() - self.start
+		for sink in _sinks:
+			sink.record("timer", self.name, elapsed, self.labels)
+
+
+class _NullTimer:
+	__slots__ = ()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args) -> None:
+		pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def enable(*sinks) -> None:
+	"""
+	Start sending timings and counters to sinks, replacing any sinks already enabled.
+
+	:param sinks: Any of MemorySink, JSONLogSink, PrometheusSink, or an object with a 
+		record(kind, name, value, labels) method.
+	"""
+	_sinks[:] = sinks
+
+def disable() -> None:
+	"""
+	Stop recording. Instrumented code then only pays for one list check per timer or counter.
+	"""
+	_sinks.clear()
+
+def enabled() -> bool:
+	return bool(_sinks)
+
+def timer(name: str, **labels):
+	"""
+	Context manager that records how long its block takes under name.
+
+	:param name: The stage being timed, e.g. "fetch", "parse", "dcf", or "export".
+	:param labels: Extra dimensions like document="forecast".
+	"""
+	if not _sinks:
+		return _NULL_TIMER
+	return _Timer(name, labels)
+
+def count(name: str, value: float = 1, **labels) -> None:
+	"""
+	Add value to the counter name, e.g. "requests", "bytes_downloaded", "cache_hits", or "retries".
+	"""
+	if not _sinks:
+		return
+	for sink in _sinks:
+		sink.record("counter", name, value, labels)
+
+def flush() -> None:
+	"""
+	Write out every sink that buffers its output, like PrometheusSink.
+	"""
+	for sink in _sinks:
+		if hasattr(sink, "flush"):
+			sink.flush()
+
+def _name(name: str, labels: tuple) -> str:
+	if not labels:
+		return name
+	return name + "[" + ",".join(f"{key}={value}" for key, value in labels) + "]"
+
+def _labels(labels: tuple) -> str:
+	if not labels:
+		return ""
+	return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+def _escape(value) -> str:
+	"""
+	Escape a label value for the Prometheus text format, where backslashes, quotes, and newlines are special.
+	"""
+	return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
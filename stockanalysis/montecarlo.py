@@ -0,0 +1,97 @@
+# Third Party Imports
+import numpy
+
+# Local Imports
+import stockanalysis as sa
+
+
+def default_distributions(stock, inputs: dict) -> dict:
+	"""
+	Returns the distributions used for any input not given to simulate(), centered on the stock's own assumptions.
+
+	:param stock: The stockanalysis.Stock being valued.
+	:param inputs: The dictionary returned by stockanalysis.valuation.dcf_inputs() for the stock.
+	"""
+	past_da_margin = numpy.round(inputs["past_da"] / inputs["past_revenue"], 6)
+	past_capex_margin = numpy.round(inputs["past_capex"] / inputs["past_revenue"], 6)
+
+	return {
+		"risk_free_rate": ("normal", stock.risk_free_rate, 0.005),
+		"market_return": ("normal", stock.market_return, 0.02),
+		"beta": ("normal", stock.beta, 0.2),
+		"terminal_growth_rate": ("constant", stock.terminal_growth_rate),
+		"revenue_scale": ("normal", 1.0, 0.05),
+		"eps_scale": ("normal", 1.0, 0.1),
+		"da_change": ("normal", float(sa.valuation.historic_margin_change(past_da_margin)), 0.01),
+		"capex_change": ("normal", float(sa.valuation.historic_margin_change(past_capex_margin)), 0.01),
+	}
+
+def _sample(distribution, rng: numpy.random.Generator, size: int) -> numpy.ndarray:
+	"""
+	Draw size samples from a distribution given as a callable f(rng, size), or as a tuple of a 
+		numpy.random.Generator method name and its arguments, e.g. ("normal", 0.08, 0.02). ("constant", value) 
+		always returns value.
+	"""
+	if callable(distribution):
+		return numpy.asarray(distribution(rng, size), dtype=float)
+
+	name, *args = distribution
+	if name == "constant":
+		return numpy.full(size, args[0], dtype=float)
+	return getattr(rng, name)(*args, size=size)
+
+def simulate(stock, inputs: dict, paths: int = 100_000, distributions: dict = None, seed: int = None, 
+			 chunk_size: int = 10_000, percentiles: list[float] = (5, 25, 50, 75, 95)) -> dict:
+	"""
+	Value a stock over many randomly sampled sets of assumptions. Paths are evaluated chunk_size at a time as one 
+		vectorized batch, so memory stays bounded no matter how many paths are run.
+
+	:param stock: The stockanalysis.Stock being valued. Its min_discount_rate floors every sampled discount rate.
+	:param inputs: The dictionary returned by stockanalysis.valuation.dcf_inputs() for the stock.
+	:param paths: The number of sampled paths.
+	:param distributions: Distributions for any of "risk_free_rate", "market_return", "beta", 
+		"terminal_growth_rate", "revenue_scale", "eps_scale", "da_change", and "capex_change". Missing inputs use 
+		default_distributions().
+	:param seed: Seed for the random generator. The same seed and chunk_size always give the same result.
+	:param chunk_size: The number of paths evaluated at once.
+	:param percentiles: The percentiles of the implied share price to report.
+	:return dict: "percentiles" maps each percentile to an implied share price, "probability_positive" is the 
+		share of valid paths with a positive margin of safety, "mean" is the mean implied share price, and 
+		"paths" is the number of valid paths. Paths whose discount rate does not exceed their terminal growth rate 
+		are invalid and left out.
+	"""
+	settings = default_distributions(stock, inputs)
+	if distributions:
+		unknown = set(distributions) - set(settings)
+		if unknown:
+			raise ValueError(f"Unknown Monte Carlo inputs: {', '.join(sorted(unknown))}")
+		settings.update(distributions)
+
+	rng = numpy.random.default_rng(seed)
+	prices = numpy.empty(paths)
+	for start in range(0, paths, chunk_size):
+		size = min(chunk_size, paths - start)
+		sample = {name: _sample(distribution, rng, size) for name, distribution in settings.items()}
+
+		discount_rate = numpy.maximum(
+			sample["risk_free_rate"] + sample["beta"]*(sample["market_return"] - sample["risk_free_rate"]), 
+			stock.min_discount_rate)
+		projection = sa.valuation.project_cash_flows(inputs, sample["revenue_scale"], sample["eps_scale"], 
+											   		 sample["da_change"], sample["capex_change"])
+		discounted = sa.valuation.discount_cash_flows(projection["projected_free_cash_flow"], discount_rate, 
+											   		  sample["terminal_growth_rate"])
+		implied_price = sa.valuation.implied_share_price(discounted["enterprise_value"], inputs["cash"], 
+												   		 inputs["debt"], inputs["shares_outstanding"])
+		prices[start:start + size] = numpy.where(discount_rate > sample["terminal_growth_rate"], implied_price, 
+										   		 numpy.nan)
+
+	prices = prices[~numpy.isnan(prices)]
+	if len(prices) == 0:
+		raise ValueError("No valid paths, every sampled discount rate was at or below the terminal growth rate")
+
+	return {
+		"percentiles": dict(zip(percentiles, numpy.percentile(prices, percentiles).tolist())),
+		"probability_positive": float(numpy.mean(prices > inputs["price"])),
+		"mean": float(prices.mean()),
+		"paths": len(prices),
+	}
@@ -0,0 +1,74 @@
+# Standard Library Imports
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+# Third Party Imports
+import numpy
+
+if TYPE_CHECKING:
+	import pandas
+
+# Multipliers for the unit at the end of a scraped value. Dollar values come out in millions, matching the 
+# financial statements, and percents come out as fractions.
+SUFFIXES = {"%": 0.01, "K": 0.001, "M": 1.0, "B": 1000.0, "T": 1000000.0}
+
+# Cells that mean there is no value
+MISSING = frozenset(("", "-", "--", "\u2014", "n/a", "N/A"))
+
+
+def to_numbers(values) -> numpy.ndarray:
+	"""
+	Convert a column of scraped strings to a float array in one pass. Commas, dollar signs, and whitespace are 
+		ignored, parentheses mean a negative number, and markers like "-" or empty cells become NaN.
+	EX) ["1,234", "7.89B", "10M", "12.5%", "(3.2)", "-"] -> [1234, 7890, 10, 0.125, -3.2, NaN]
+
+	:param values: Any iterable of strings. None is treated as an empty cell, and numbers are kept as they are.
+	:return numpy.ndarray: float64 values, with units converted to millions and percents to fractions. Use 
+		numpy.isnan() for the mask of missing values.
+	"""
+	return numpy.fromiter(map(to_number, values), dtype=float)
+
+def to_number(value) -> float:
+	"""
+	Convert a single scraped string to a float the same way as to_numbers().
+	"""
+	if value is None:
+		return numpy.nan
+	if not isinstance(value, str):
+		return float(value)
+
+	text = value.strip()
+	if text in MISSING:
+		return numpy.nan
+	if "," in text:
+		text = text.replace(",", "")
+	if "$" in text:
+		text = text.replace("$", "")
+	negative = text[:1] == "(" and text[-1:] == ")"
+	if negative:
+		text = text[1:-1]
+	unit = text[-1:]
+	if unit in SUFFIXES:
+		text = text[:-1]
+	try:
+		number = float(text)
+	except ValueError:
+		return numpy.nan
+	if unit == "%":
+		number /= 100
+	elif unit in SUFFIXES:
+		number *= SUFFIXES[unit]
+	return -number if negative else number
+
+def numeric_frame(labels: list[str], headers: list[str], columns: list[list[str]]) -> pandas.DataFrame:
+	"""
+	Build a float pandas DataFrame from scraped table columns, converting every cell in a single pass.
+
+	:param labels: The row labels, used as the index.
+	:param headers: The column names.
+	:param columns: One list of strings per column, each as long as labels.
+	"""
+	import pandas
+
+	numbers = to_numbers(value for column in columns for value in column).reshape(len(columns), len(labels))
+	return pandas.DataFrame(numbers.T, index=pandas.Index(labels), columns=headers)
@@ -0,0 +1,157 @@
+# Standard Library Imports
+import json
+import os
+import time
+
+# Third Party Imports
+import pandas
+
+# Local Imports
+import stockanalysis as sa
+
+DEFAULT_CHECKPOINT = "results/checkpoint.jsonl"
+
+
+def read_tickers(path: str):
+	"""
+	Lazily yield the tickers in a watchlist file such as stocks.txt, one per line. Blank lines and lines starting 
+		with # are skipped.
+
+	:param path: The path of the watchlist file.
+	"""
+	with open(path) as file:
+		for line in file:
+			ticker = line.strip()
+			if ticker and not ticker.startswith("#"):
+				yield ticker
+
+def completed_tickers(checkpoint: str = DEFAULT_CHECKPOINT, window: float = 86400) -> set[str]:
+	"""
+	Returns the upper case tickers successfully valued in a checkpoint file within the last window seconds.
+
+	:param checkpoint: The path of the checkpoint file.
+	:param window: Only valuations newer than this many seconds count. If None, every valuation counts.
+	"""
+	completed = set()
+	since = None if window is None else time.time() - window
+	for record in _read_checkpoint(checkpoint):
+		if record["error"] is None and (since is None or record["time"] >= since):
+			completed.add(record["ticker"])
+	return completed
+
+def load_checkpoint(checkpoint: str = DEFAULT_CHECKPOINT, window: float = None) -> pandas.DataFrame:
+	"""
+	Rebuild the results of a watchlist run from its checkpoint file. When a ticker was valued more than once, the 
+		latest valuation is kept.
+
+	:param checkpoint: The path of the checkpoint file.
+	:param window: Only valuations newer than this many seconds are loaded. If None, every valuation is loaded.
+	:return pandas.DataFrame: One row per ticker with the time, price, discount rate, terminal growth rate, margin 
+		of safety, error message, and error kind of its latest valuation.
+	"""
+	since = None if window is None else time.time() - window
+	records = {}
+	for record in _read_checkpoint(checkpoint):
+		if since is None or record["time"] >= since:
+			records[record["ticker"]] = record
+	columns = ["ticker", "time", "price", "discount_rate", "terminal_growth_rate", "margin", "error", "kind"]
+	return pandas.DataFrame(list(records.values()), columns=columns).set_index("ticker")
+
+def run_watchlist(tickers, checkpoint: str = DEFAULT_CHECKPOINT, window: float = 86400, 
+				  min_discount_rate: float = None, workers: int = 1, store_root: str = None):
+	"""
+	Value a watchlist as a stream, yielding each result as soon as it is ready. Every result is appended to a 
+		checkpoint file and flushed to disk before it is yielded, so a crash or Ctrl-C loses nothing already 
+		valued. Running again with the same checkpoint resumes where the last run stopped: tickers valued 
+		successfully within the window are skipped, while failed tickers are tried again. Memory stays flat 
+		regardless of the size of the watchlist.
+
+		for ticker, stock, error in stockanalysis.run_watchlist("stocks.txt"):
+			...
+
+	:param tickers: A watchlist file path, or any iterable of tickers. Both are read lazily.
+	:param checkpoint: The path of the JSON lines checkpoint file. It is created if it does not exist.
+	:param window: The number of seconds a completed valuation counts towards resuming. If None, a ticker is never 
+		valued twice with the same checkpoint.
+	:param min_discount_rate: The minimum discount rate percentage for all valuations. For 6%, enter 6 as the value.
+	:param workers: The maximum number of tickers valued at the same time. Results keep the order of tickers.
+	:param store_root: The folder of a columnar store to append every scraped document and DCF to, all under one 
+		run timestamp. See stockanalysis.store.save_stock(). If None, nothing is stored.
+	:return: An iterator of (ticker, Stock, None) on success or (ticker, None, error message) on failure.
+	"""
+	if isinstance(tickers, str):
+		tickers = read_tickers(tickers)
+	completed = completed_tickers(checkpoint, window)
+	pending = (ticker for ticker in tickers if ticker.upper() not in completed)
+	if store_root:
+		run = sa.store.new_run()
+
+	directory = os.path.dirname(checkpoint)
+	if directory:
+		os.makedirs(directory, exist_ok=True)
+	_truncate_partial_line(checkpoint)
+	with open(checkpoint, "a") as file:
+		for ticker, stock, error in sa.dcf.value_tickers(pending, min_discount_rate, workers):
+			if error is None and store_root:
+				sa.store.save_stock(stock, store_root, run)
+			sa.metrics.count("tickers", status="failed" if error else "complete")
+
+			file.write(json.dumps(_record(ticker, stock, error)) + "\n")
+			file.flush()
+			os.fsync(file.fileno())
+			yield ticker, stock, None if error is None else sa.dcf.error_message(error)
+	sa.metrics.flush()
+
+def _record(ticker: str, stock, error: Exception) -> dict:
+	"""
+	Returns the checkpoint record of one valuation.
+	"""
+	record = {"ticker": ticker.upper(), "time": time.time(), "price": None, "discount_rate": None, 
+		   	  "terminal_growth_rate": None, "margin": None, "error": None, "kind": None}
+	if error is not None:
+		record.update(error=sa.dcf.error_message(error), kind=sa.dcf.error_kind(error))
+	if stock is not None:
+		record.update(price=float(stock.price), discount_rate=float(stock.discount_rate), 
+					  terminal_growth_rate=float(stock.terminal_growth_rate), 
+					  margin=float(stock.dcf_values["margin"]))
+	return record
+
+def _truncate_partial_line(checkpoint: str) -> None:
+	"""
+	Cut a partly written last line left by an interrupted run, so the next record starts on a line of its own.
+	"""
+	if not os.path.exists(checkpoint):
+		return
+	with open(checkpoint, "rb+") as file:
+		size = file.seek(0, os.SEEK_END)
+		if size == 0:
+			return
+		file.seek(size - 1)
+		if file.read(1) == b"\n":
+			return
+
+		# Walk back to the end of the last complete line
+		end = size
+		while end > 0:
+			start = max(0, end - 4096)
+			file.seek(start)
+			newline = file.read(end - start).rfind(b"\n")
+			if newline != -1:
+				file.truncate(start + newline + 1)
+				return
+			end = start
+		file.truncate(0)
+
+def _read_checkpoint(checkpoint: str):
+	"""
+	Yield the records of a checkpoint file. A missing file has no records, and a partly written last line from an 
+		interrupted run is ignored.
+	"""
+	if not os.path.exists(checkpoint):
+		return
+	with open(checkpoint) as file:
+		for line in file:
+			try:
+				yield json.loads(line)
+			except json.JSONDecodeError:
+				continue
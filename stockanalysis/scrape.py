@@ -1,11 +1,28 @@
-import requests
-from bs4 import BeautifulSoup
+# Third Party Imports
+import numpy
 import pandas
 import lxml.html
 
+# Local Imports
+import stockanalysis as sa
+
+
+class ParseError(ValueError):
+	"""
+	A page did not have the layout the parsers expect, usually because stockanalysis.com changed it.
+	"""
+
+
+class MissingFieldError(LookupError):
+	"""
+	A page parsed fine but lacks a value a DCF needs, like "Long-Term Debt" on the balance sheet.
+	"""
+
+
 def scrape_financials(ticker: str, document: int) -> pandas.DataFrame:
 	"""
-	Returns either the Income Statement, Balance Sheet, or Cash Flow Statement as a pandas DataFrame.
+	Returns either the Income Statement, Balance Sheet, or Cash Flow Statement as a float pandas DataFrame. Dollar 
+		values are in millions, percents are fractions, and unfilled data is NaN.
 
 	:param ticker: The string ticker of the company.
 	:param document: An integer where 1=Income Statement, 2=Balance Sheet, 3=Cash Flow Statement. Nothing is
@@ -14,78 +31,167 @@ def scrape_financials(ticker: str, document: int) -> pandas.DataFrame:
 		* Generally will be provided by stockanalysis.INCOME_STATEMENT, stockanalysis.BALANCE_SHEET, 
 		stockanalysis.CASH_FLOW_STATEMENT, with the correct number being supplied for each document.
 	"""
-	if document == 1:
-		webpage = requests.get("https://stockanalysis.com/stocks/" + ticker.lower() + "/financials/")
-	elif document == 2:
-		webpage = requests.get("https://stockanalysis.com/stocks/" + ticker.lower() + "/financials/balance-sheet/")
-	elif document == 3:
-		webpage = requests.get("https://stockanalysis.com/stocks/" + ticker.lower() + "/financials/cash-flow-statement")
-	else:
+	if document not in (sa.INCOME_STATEMENT, sa.BALANCE_SHEET, sa.CASH_FLOW_STATEMENT):
 		return
 
-	soup = BeautifulSoup(webpage.text, "lxml")
-	find_table = soup.find("table")
-	rows = find_table.find_all("tr")
-
-	headers = [j.text.strip("\n\t ") for j in find_table.find("tr").find_all("th")]
-
-	array = []
-	for i in rows:
-		table_data = i.find_all("td")
-		data = [j.text.strip("\n\t ") for j in table_data]
-		array.append(data)
-
-	df = pandas.DataFrame(list(array[1::]))
-	df.columns = headers
-	df = df.drop(headers[-1], axis=1)
-	df = df.set_index("Year Ending")
-
-	return df
+	return parse_financials(sa.fetch.stream_document(ticker, document))
 
 def scrape_forecast(ticker: str) -> pandas.DataFrame:
 	"""
 	Returns a pandas DataFrame containing analyst forecasts for Revenue and EPS as well as the # of analysts and
-		the forward PE. Unfilled data will have a "-" in the field.
+		the forward PE. Revenue is in millions, growth rates are fractions, and unfilled data is NaN.
 	
 	:param ticker: The string ticker of the company.
 	"""
-	webpage = requests.get("https://stockanalysis.com/stocks/" + ticker.lower() + "/forecast/")
-	soup = BeautifulSoup(webpage.text, "lxml")
-	find_table_parent = soup.find("div", attrs={"data-test": "forecast-financial-table"})
-	find_table = find_table_parent.find("table")
-	rows = find_table.find_all("tr")
+	return parse_forecast(sa.fetch.stream_document(ticker, sa.FORECAST))
 
-	headers = [j.text.strip("\n\t ") for j in find_table.find("tr").find_all("th")]
+def scrape_statistics(ticker: str) -> dict[str:float]:
+	"""
+	Returns the following statistics as floats in a dictionary:
+		"beta" (NaN if there is none)
+		"shares-outstanding" (in millions)
+		"price"
+	"""
+	return parse_statistics(sa.fetch.stream_document(ticker, sa.STATISTICS))
 
-	array = []
-	for i in rows:
-		table_data = i.find_all("td")
-		data = [j.text for j in table_data]
-		array.append(data)
+def scrape_documents(ticker: str, documents: list[int] = None, concurrent: bool = True) -> dict:
+	"""
+	Returns several documents for one ticker in a dictionary keyed by document number. Financial statements and 
+		the forecast are pandas DataFrames, statistics are a dictionary as returned by scrape_statistics().
 
-	df = pandas.DataFrame(list(array[1::]))
-	df.columns = headers
-	df = df.set_index("Year")
+	:param ticker: The string ticker of the company.
+	:param documents: Any of stockanalysis.INCOME_STATEMENT, BALANCE_SHEET, CASH_FLOW_STATEMENT, FORECAST, and 
+		STATISTICS. If None, all five are scraped.
+	:param concurrent: True = Fetch every page at the same time over the shared connection pool. 
+		False = Fetch pages one after another.
+	"""
+	if documents is None:
+		documents = sa.ALL_DOCUMENTS
 
-	return df
+	pages = sa.fetch.fetch_documents(ticker, documents, concurrent)
+	return {document: parse_document(document, html) for document, html in zip(documents, pages)}
 
-def scrape_statistics(ticker: str) -> dict[str:str]:
+def parse_document(document: int, html):
 	"""
-	Returns the following statistics in a dictionary:
-		"beta"
-		"shares-outstanding"
-		"price"
+	Parse any stockanalysis.com document page with the matching parser.
+
+	:param document: One of stockanalysis.INCOME_STATEMENT, BALANCE_SHEET, CASH_FLOW_STATEMENT, FORECAST, or 
+		STATISTICS.
+	:param html: The page source as a string or bytes, or an iterable of byte chunks.
 	"""
-	# Get the webpage as XML
-	webpage = requests.get("https://stockanalysis.com/stocks/" + ticker.lower() + "/statistics/", stream=True)
-	webpage.raw.decode_content = True
-	tree = lxml.html.parse(webpage.raw)
-	result = {}
+	if document == sa.FORECAST:
+		return parse_forecast(html)
+	if document == sa.STATISTICS:
+		return parse_statistics(html)
+	return parse_financials(html)
 
-	result["beta"] = tree.xpath(
-		"/html/body/div/div[1]/div[2]/main/div[2]/div[2]/div[1]/table/tbody/tr[1]/td[2]/text()")[0]
-	result["shares-outstanding"] = tree.xpath(
-		"/html/body/div/div[1]/div[2]/main/div[2]/div[1]/div[4]/table/tbody/tr[1]/td[2]/text()")[0]
-	result["price"] = tree.xpath("/html/body/div/div[1]/div[2]/main/div[1]/div[2]/div/div[1]/text()")[0]
+def parse_financials(html) -> pandas.DataFrame:
+	"""
+	Returns the financial statement table of a stockanalysis.com financials page as a float pandas DataFrame.
 
-	return result
+	:param html: The page source as a string or bytes, or an iterable of byte chunks to parse as they arrive.
+	"""
+	with sa.metrics.timer("parse", document="financials"):
+		table = _parse_html(html).find(".//table")
+		if table is None:
+			raise ParseError("The financials page has no table")
+		headers, columns = _extract_table(table, strip=True)
+
+		# The first column holds the row labels and the last only advertises older data behind a paywall
+		df = sa.numeric.numeric_frame(columns[0], headers[1:-1], columns[1:-1])
+		df.index.name = headers[0]
+
+		return df
+
+def parse_forecast(html) -> pandas.DataFrame:
+	"""
+	Returns the forecast table of a stockanalysis.com forecast page as a float pandas DataFrame.
+
+	:param html: The page source as a string or bytes, or an iterable of byte chunks to parse as they arrive.
+	"""
+	with sa.metrics.timer("parse", document="forecast"):
+		table = _parse_html(html).find(".//div[@data-test='forecast-financial-table']//table")
+		if table is None:
+			raise ParseError("The forecast page has no forecast table")
+		headers, columns = _extract_table(table, strip=True)
+
+		df = sa.numeric.numeric_frame(columns[0], headers[1:], columns[1:])
+		df.index.name = headers[0]
+
+		return df
+
+def parse_statistics(html) -> dict[str:float]:
+	"""
+	Returns the beta, shares outstanding, and price from a stockanalysis.com statistics page.
+
+	:param html: The page source as a string or bytes, or an iterable of byte chunks to parse as they arrive.
+	"""
+	with sa.metrics.timer("parse", document="statistics"):
+		tree = _parse_html(html).getroottree()
+		result = {}
+
+		result["beta"] = _xpath_number(tree, 
+			"/html/body/div/div[1]/div[2]/main/div[2]/div[2]/div[1]/table/tbody/tr[1]/td[2]/text()")
+		result["shares-outstanding"] = _xpath_number(tree, 
+			"/html/body/div/div[1]/div[2]/main/div[2]/div[1]/div[4]/table/tbody/tr[1]/td[2]/text()")
+		result["price"] = _xpath_number(tree, "/html/body/div/div[1]/div[2]/main/div[1]/div[2]/div/div[1]/text()")
+
+		for field in ("shares-outstanding", "price"):
+			if numpy.isnan(result[field]):
+				raise MissingFieldError(f"The statistics page has no {field}")
+		return result
+
+def _xpath_number(tree, path: str) -> float:
+	"""
+	Returns the first text matching an XPath as a float, or NaN if nothing matches.
+	"""
+	text = tree.xpath(path)
+	return sa.numeric.to_number(text[0]) if text else numpy.nan
+
+def _parse_html(html) -> lxml.html.HtmlElement:
+	"""
+	Parse a page once with lxml. Strings and bytes are parsed whole; any other iterable is treated as a stream of 
+		byte chunks and fed to the parser as they arrive so parsing overlaps the download.
+
+	:raises ParseError: The page is empty or not HTML at all.
+	"""
+	try:
+		if isinstance(html, str):
+			return lxml.html.document_fromstring(html)
+		if isinstance(html, bytes):
+			return lxml.html.document_fromstring(html, parser=lxml.html.HTMLParser(encoding="utf-8"))
+
+		parser = lxml.html.HTMLParser(encoding="utf-8")
+		for chunk in html:
+			parser.feed(chunk)
+		return parser.close()
+	except (lxml.etree.ParserError, lxml.etree.XMLSyntaxError) as error:
+		raise ParseError(f"The page could not be parsed: {error}") from error
+
+def _extract_table(table, strip: bool = True) -> tuple[list[str], list[list[str]]]:
+	"""
+	Walk an HTML table once and return its header names and its body cells as one list per column.
+
+	:param table: The lxml <table> element.
+	:param strip: True = Strip newlines, tabs, and spaces from the ends of each cell.
+	"""
+	rows = table.iter("tr")
+	header = next(rows, None)
+	if header is None:
+		raise ParseError("The table is empty")
+	headers = ["".join(j.itertext()).strip("\n\t ") for j in header.iter("th")]
+
+	columns = [[] for _ in headers]
+	height = 0
+	for row in rows:
+		for j, cell in enumerate(row.iter("td")):
+			text = "".join(cell.itertext())
+			if j == len(columns):
+				columns.append([None]*height)
+			columns[j].append(text.strip("\n\t ") if strip else text)
+		height += 1
+		for column in columns:
+			if len(column) < height:
+				column.append(None)
+
+	return headers, columns
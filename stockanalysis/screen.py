@@ -0,0 +1,177 @@
+# Standard Library Imports
+import os
+import re
+
+# Third Party Imports
+import pandas
+
+# Local Imports
+import stockanalysis as sa
+
+# Scraped row labels with a shorter metric name. Every other label is converted to snake case, e.g. "Net Income"
+# becomes "net_income".
+ALIASES = {
+	"revenue_growth_yoy": "revenue_growth",
+	"depreciation_and_amortization": "da",
+	"capital_expenditures": "capex",
+	"cash_and_equivalents": "cash",
+}
+
+# Values that are not tied to a fiscal year, like the price, are stored under this year
+POINT_IN_TIME = "TTM"
+POINT_IN_TIME_METRICS = ("price", "beta", "shares_outstanding", "implied_price", "margin", "discount_rate", 
+						 "terminal_growth_rate")
+
+
+def from_store(root: str = "results/store", tickers: list[str] = None, start=None, end=None) -> pandas.DataFrame:
+	"""
+	Build a screening universe from the latest run of every ticker in a columnar store written by
+		stockanalysis.store.save_stock(). Stored DCFs contribute the margin of safety and the rates behind it.
+
+	:param root: The folder the store lives in.
+	:param tickers: The tickers to load. If None, every ticker is loaded.
+	:param start: The earliest run to consider, as anything pandas.Timestamp accepts.
+	:param end: The latest run to consider, inclusive.
+	:return pandas.DataFrame: The universe, see universe().
+	"""
+	frames = []
+	for dataset in ("financials", "forecast"):
+		df = _latest(sa.store.load_dataset(dataset, root, tickers, start, end))
+		if not df.empty:
+			frames.append(df[["ticker", "item", "period", "value"]])
+	for dataset in ("valuations", "statistics"):
+		df = _latest(sa.store.load_dataset(dataset, root, tickers, start, end))
+		if not df.empty:
+			frames.append(_point_in_time(df.drop(columns="run")))
+	return universe(pandas.concat(frames, ignore_index=True) if frames else None)
+
+def from_cache(tickers: list[str] = None, directory: str = None) -> pandas.DataFrame:
+	"""
+	Build a screening universe from pages in the page cache, whatever their age. Nothing is fetched and no DCF is
+		run, so it has no margin of safety.
+
+	:param tickers: The tickers to load. If None, every cached ticker is loaded.
+	:param directory: The folder of the page cache. If None, the cache set by stockanalysis.configure_cache() is
+		used.
+	:return pandas.DataFrame: The universe, see universe().
+	"""
+	if directory is not None:
+		cache = sa.cache.PageCache(directory, offline=True)
+	else:
+		cache = sa.fetch.get_cache()
+	if cache is None:
+		raise ValueError("No page cache, pass directory or call stockanalysis.configure_cache() first")
+	if tickers is None:
+		tickers = sorted(entry.name for entry in os.scandir(cache.directory) if entry.is_dir())
+
+	frames = []
+	for ticker in tickers:
+		for document in sa.ALL_DOCUMENTS:
+			content, _ = cache.get(ticker, document)
+			if content is None:
+				continue
+			data = sa.scrape.parse_document(document, content)
+			if document == sa.STATISTICS:
+				frames.append(_point_in_time(pandas.DataFrame([{"ticker": ticker.upper(), **data}])))
+			else:
+				df = sa.store.long_table(data, sa.utils.DOCUMENT_NAMES[document]).drop(columns="document")
+				df.insert(0, "ticker", ticker.upper())
+				frames.append(df)
+	return universe(pandas.concat(frames, ignore_index=True) if frames else None)
+
+def universe(values: pandas.DataFrame) -> pandas.DataFrame:
+	"""
+	Pivot scraped values into one float table with a row per ticker and year and a column per metric, then add the
+		derived metrics used for screening:
+		"fcf" (net income + D&A - CAPEX), "fcf_margin", "net_margin", "da_intensity", and "capex_intensity"
+
+	Financial statements take priority over forecasts for the same year, so forecasts only add estimates for future
+		years. CAPEX is positive spend, matching Stock.dcf.
+
+	:param values: A long table with "ticker", "item", "period", and "value" columns.
+	:return pandas.DataFrame: Indexed by ("ticker", "year"), where point-in-time values like "price" and
+		"margin" are stored under the "TTM" year.
+	"""
+	if values is None or values.empty:
+		return pandas.DataFrame(index=pandas.MultiIndex.from_arrays([[], []], names=["ticker", "year"]))
+
+	long = pandas.DataFrame({
+		"ticker": values["ticker"].to_numpy(),
+		"year": values["period"].astype(str).str.replace("FY ", "", regex=False).to_numpy(),
+		"metric": values["item"].map(_metric_name).to_numpy(),
+		"value": values["value"].to_numpy(dtype=float),
+	})
+	long = long.drop_duplicates(["ticker", "year", "metric"])
+	wide = long.pivot(index=["ticker", "year"], columns="metric", values="value")
+	wide.columns.name = None
+
+	if "total_revenue" in wide:
+		wide["revenue"] = wide.get("revenue", wide["total_revenue"]).fillna(wide["total_revenue"])
+	if "capex" in wide:
+		wide["capex"] = -wide["capex"]
+	columns = wide.columns
+	if {"net_income", "da", "capex"} <= set(columns):
+		wide["fcf"] = wide["net_income"] + wide["da"] - wide["capex"]
+	if "revenue" in columns:
+		revenue = wide["revenue"].where(wide["revenue"] != 0)
+		for metric, ratio in (("fcf", "fcf_margin"), ("net_income", "net_margin"), ("da", "da_intensity"),
+							  ("capex", "capex_intensity")):
+			if metric in wide:
+				wide[ratio] = wide[metric] / revenue
+	return wide.sort_index()
+
+def screen(universe: pandas.DataFrame, where: str = None, rank_by: str = None, ascending: bool = False,
+		   top: int = None, year: str = POINT_IN_TIME, columns: list[str] = None) -> pandas.DataFrame:
+	"""
+	Filter and rank every ticker of a universe in one vectorized pass over a single year.
+
+		stockanalysis.screen.screen(universe, "fcf_margin > 0.1 and revenue_growth > 0.05",
+									rank_by="margin", top=20)
+
+	:param universe: The table returned by from_store(), from_cache(), or universe().
+	:param where: A pandas.DataFrame.query() expression over metric names. If None, every ticker is kept.
+	:param rank_by: A metric name or a pandas.DataFrame.eval() expression to sort by, e.g.
+		"fcf_margin - capex_intensity". If None, tickers stay in alphabetical order.
+	:param ascending: True = Lowest first. False = Highest first.
+	:param top: The number of tickers to return. If None, all matching tickers are returned.
+	:param year: The year to screen, e.g. "TTM", "2023", or a forecast year like "2026".
+	:param columns: The metrics to return. If None, every metric is returned.
+	:return pandas.DataFrame: One row per matching ticker, with a "score" column when ranked.
+	"""
+	frame = universe.xs(year, level="year") if len(universe) else universe.droplevel("year")
+	if year != POINT_IN_TIME and len(universe):
+		# Point-in-time values like the price and margin of safety apply to every year
+		metrics = [metric for metric in POINT_IN_TIME_METRICS if metric in universe]
+		frame = frame.assign(**universe.xs(POINT_IN_TIME, level="year")[metrics].reindex(frame.index))
+	if where:
+		frame = frame.query(where)
+	if rank_by:
+		score = frame.eval(rank_by) if rank_by not in frame else frame[rank_by]
+		frame = frame.assign(score=score).sort_values("score", ascending=ascending, na_position="last",
+												  kind="stable")
+	if top is not None:
+		frame = frame.head(top)
+	if columns is not None:
+		frame = frame[[column for column in [*columns, "score"] if column in frame]]
+	return frame
+
+def _metric_name(label: str) -> str:
+	name = re.sub(r"[^0-9a-z]+", "_", label.lower().replace("&", "and")).strip("_")
+	return ALIASES.get(name, name)
+
+def _latest(df: pandas.DataFrame) -> pandas.DataFrame:
+	"""
+	Keep only the rows of each ticker's most recent run.
+	"""
+	if df.empty:
+		return df
+	return df[df["run"] == df.groupby("ticker")["run"].transform("max")]
+
+def _point_in_time(df: pandas.DataFrame) -> pandas.DataFrame:
+	"""
+	Melt one row per ticker of point-in-time values into item, period, value rows under the "TTM" year.
+	"""
+	df = df.melt(id_vars="ticker", var_name="item", value_name="value")
+	df["period"] = POINT_IN_TIME
+	df["value"] = df["value"].astype(float)
+	return df[["ticker", "item", "period", "value"]]
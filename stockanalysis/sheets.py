@@ -1,10 +1,186 @@
+# Standard Library Imports
+import functools
+import math
+import os
+
 # Third Party Imports
 import pandas
-import xlwings
 
 # Local Imports
 import stockanalysis as sa
 
+# Rows whose final value is the headline result of a DCF and is shown in bold
+BOLD_ROWS = ("Implied Share Price", "Margin of Safety")
+
+
+
+class ExcelWriter:
+	def __init__(self, path: str, backend: str = "openpyxl", write_only: bool = False, append: bool = True, 
+			  	 first_sheet: str = None) -> None:
+		"""
+		Collect pandas DataFrames as formatted sheets of one Excel workbook and write the file once with save().
+
+		:param path: The path including name of the workbook. Must end with .xlsx.
+		:param backend: "openpyxl" = Build the workbook in memory as a plain file, works without Excel installed. 
+			"xlwings" = Drive an installed copy of Excel, opened once for the whole workbook.
+		:param write_only: True = Stream each sheet to a temporary file as soon as it is written so memory stays 
+			flat for very large batches. The workbook is always created from scratch. False = Keep the workbook in 
+			memory until save().
+		:param append: True = Update any existing file at path, replacing sheets with the same name. False = Start 
+			from an empty workbook.
+		:param first_sheet: The name of a sheet that must come first even if it is written last, like "Summary".
+		"""
+		if backend not in ("openpyxl", "xlwings"):
+			raise ValueError(f"backend must be \"openpyxl\" or \"xlwings\", not {backend!r}")
+
+		self.path = path
+		self.backend = backend
+		self.write_only = write_only
+		self.append = append
+		self.first_sheet = first_sheet
+		self.sheets = {}
+
+		if backend == "xlwings":
+			return
+
+		# openpyxl is only imported once a workbook is written, it is one of the slowest imports of the package
+		import openpyxl
+
+		if write_only:
+			self.workbook = openpyxl.Workbook(write_only=True)
+			if first_sheet:
+				self.workbook.create_sheet(first_sheet)
+		elif append and os.path.exists(path):
+			self.workbook = openpyxl.load_workbook(path)
+		else:
+			self.workbook = openpyxl.Workbook()
+			self.workbook.remove(self.workbook.active)
+
+	def write_sheet(self, name: str, df: pandas.DataFrame) -> None:
+		"""
+		Add a DataFrame as a sheet, with a bold header row and index column, a left aligned index, centered values, 
+			and columns sized to fit their contents.
+
+		:param name: The sheet name.
+		:param df: The pandas.DataFrame to write.
+		"""
+		if self.backend == "xlwings":
+			self.sheets[name] = df
+			return
+
+		with sa.metrics.timer("export", step="sheet"):
+			self._write_sheet(name, df)
+
+	def _write_sheet(self, name: str, df: pandas.DataFrame) -> None:
+		from openpyxl.utils import get_column_letter
+
+		rows = _rows(df)
+		widths = [max(len(str(value)) if value is not None else 0 for value in column) + 2 for column in zip(*rows)]
+		bold_rows = {i for i, index in enumerate(df.index, 1) if index in BOLD_ROWS}
+
+		if self.write_only:
+			sheet = self.workbook[name] if name == self.first_sheet else self.workbook.create_sheet(name)
+			for i, width in enumerate(widths, 1):
+				sheet.column_dimensions[get_column_letter(i)].width = width
+			for i, row in enumerate(rows):
+				sheet.append([_cell(sheet, value, i, j, len(row), i in bold_rows) for j, value in enumerate(row)])
+			return
+
+		position = 0 if name == self.first_sheet else None
+		if name in self.workbook.sheetnames:
+			position = self.workbook.sheetnames.index(name)
+			self.workbook.remove(self.workbook[name])
+		sheet = self.workbook.create_sheet(name, position)
+		for i, width in enumerate(widths, 1):
+			sheet.column_dimensions[get_column_letter(i)].width = width
+		for i, row in enumerate(rows):
+			for j, value in enumerate(row):
+				cell = sheet.cell(row=i+1, column=j+1, value=value)
+				_style(cell, i, j, len(row), i in bold_rows)
+
+	def save(self) -> None:
+		"""
+		Write the workbook to path.
+		"""
+		with sa.metrics.timer("export", step="save"):
+			if self.backend == "xlwings":
+				_save_xlwings(self.path, self.sheets, self.append, self.first_sheet)
+			else:
+				self.workbook.save(self.path)
+
+
+def _rows(df: pandas.DataFrame) -> list[list]:
+	"""
+	Lay out a DataFrame as rows of plain cell values: a header row, then the index followed by each row's values. 
+		Blank strings and NaN become empty cells.
+	"""
+	def value(item):
+		if item == "" or (isinstance(item, float) and math.isnan(item)):
+			return None
+		if hasattr(item, "item"):
+			return item.item()
+		return item
+
+	rows = [[df.index.name] + [value(i) for i in df.columns]]
+	for index, values in zip(df.index, df.itertuples(index=False, name=None)):
+		rows.append([value(index)] + [value(i) for i in values])
+	return rows
+
+@functools.cache
+def _styles() -> tuple:
+	"""
+	Returns the shared bold font and the left and center alignments, created on first use.
+	"""
+	from openpyxl.styles import Alignment, Font
+
+	return Font(bold=True), Alignment(horizontal="left"), Alignment(horizontal="center")
+
+def _style(cell, i: int, j: int, width: int, bold_row: bool) -> None:
+	bold, left, center = _styles()
+	if i == 0 or j == 0 or (bold_row and j == width - 1):
+		cell.font = bold
+	cell.alignment = left if j == 0 else center
+
+def _cell(sheet, value, i: int, j: int, width: int, bold_row: bool):
+	from openpyxl.cell import WriteOnlyCell
+
+	cell = WriteOnlyCell(sheet, value=value)
+	_style(cell, i, j, width, bold_row)
+	return cell
+
+def _save_xlwings(path: str, sheets: dict, append: bool = True, first_sheet: str = None) -> None:
+	"""
+	Write every sheet through a single Excel instance, replacing sheets with the same name in an existing file.
+	"""
+	import xlwings
+
+	if not append or not os.path.exists(path):
+		sa.create_workbook(path, first_sheet or next(iter(sheets)))
+
+	with xlwings.App(visible=False) as app:
+		wb = app.books.open(path)
+		current_sheets = [sheet.name for sheet in wb.sheets]
+		for name, df in sheets.items():
+			if name in current_sheets:
+				sheet = wb.sheets(name)
+			elif name == first_sheet:
+				sheet = wb.sheets.add(before=wb.sheets[0])
+				sheet.name = name
+			else:
+				sheet = wb.sheets.add(after=wb.sheets.count)
+				sheet.name = name
+			sheet.range("A1").value = df
+			last = sheet.range("A1").offset(len(df.index), len(df.columns))
+			sheet.range("B1", last).api.HorizontalAlignment = xlwings.constants.HAlign.xlHAlignCenter
+			sheet.range("A1", last.offset(0, -len(df.columns))).api.HorizontalAlignment = xlwings.constants.HAlign.xlHAlignLeft
+			sheet.range("A1", sheet.range("A1").offset(0, len(df.columns))).font.bold = True
+			sheet.range("A1", last.offset(0, -len(df.columns))).font.bold = True
+			for i, index in enumerate(df.index, 1):
+				if index in BOLD_ROWS:
+					sheet.range("A1").offset(i, len(df.columns)).font.bold = True
+			sheet.range("A1", last).autofit()
+		wb.save()
+
 def create_workbook(path: str, sheet_name: str) -> None:
 	"""
 	Helper method to create a new Excel spreadsheet.
@@ -15,20 +191,17 @@ def create_workbook(path: str, sheet_name: str) -> None:
 	df = pandas.DataFrame()
 	df.to_excel(excel_writer=path, sheet_name=sheet_name)
 
-def export_dataframe(df: pandas.DataFrame, fname: str, sheet_name: str) -> None:
+def export_dataframe(df: pandas.DataFrame, fname: str, sheet_name: str, backend: str = "openpyxl") -> None:
 	"""
 	Export a pandas.DataFrame to an excel spreadsheet with the proper formatting.
 
 	:param df: The pandas.DataFrame that we want to export. This can be a financials document, 
 		forecast, DCF, and so on.
-	:param sheet_name: The name of the file that the pandas.DataFrame will be exported to. Must 
+	:param fname: The name of the file in results/ that the pandas.DataFrame will be exported to. Must 
 		end with .xlsx.
+	:param sheet_name: The name of the sheet the pandas.DataFrame is written to.
+	:param backend: "openpyxl" = Write the file directly. "xlwings" = Write through an installed copy of Excel.
 	"""
-	fname = "results/" + fname
-	sa.create_workbook(fname, sheet_name)
-	with xlwings.App(visible=False) as app:
-		wb = app.books.open(fname)
-		wb.sheets(sheet_name).range("A1").value = df
-		wb.sheets[0].range('A1', 'Z1000').api.HorizontalAlignment = xlwings.constants.HAlign.xlHAlignCenter
-		wb.sheets[0].range('A1', 'Z1000').autofit()
-		wb.save()
+	writer = ExcelWriter("results/" + fname, backend, append=False)
+	writer.write_sheet(sheet_name, df)
+	writer.save()
@@ -1,4 +1,8 @@
+# Standard Library Imports
+import time
+
 # Third-party imports
+import numpy
 import pandas
 
 # Local Imports
@@ -13,7 +17,7 @@ class Stock:
 
 		:param ticker: A string containing the ticker of the company.
 		:param terminal_growth_rate: The terminal growth rate used if another is not generated
-		 	when running a DCF.
+		 	when running a DCF, and the highest one that is ever generated.
 		:param min_discount_rate: The minimum discount rate allowed.
 		:param risk_free_rate: The risk free rate assumed. Generally return of US Treasury for desired 
 			time period.
@@ -24,6 +28,7 @@ class Stock:
 		self.forecast = pandas.DataFrame()
 		self.statistics = {}
 		self.dcf = pandas.DataFrame()
+		self.dcf_values = {}
 		self.price = 1
 		self.shares_outstanding = 1
 		self.dcf_result = 1
@@ -31,10 +36,38 @@ class Stock:
 
 		self.ticker = ticker.lower()
 		self.discount_rate = min_discount_rate
+		self.min_discount_rate = min_discount_rate
 		self.risk_free_rate = risk_free_rate
 		self.beta = default_beta
 		self.market_return = market_return
 		self.terminal_growth_rate = terminal_growth_rate
+		# Generated terminal growth rates are capped at the configured one, never at an earlier generated rate
+		self._terminal_growth_cap = terminal_growth_rate
+
+		# When each document was fetched, and which changed since the last DCF
+		self.fetched = {}
+		self._changed = set(sa.ALL_DOCUMENTS)
+		self._inputs = None
+		self._projection = None
+
+	def _set_document(self, document: int, data) -> None:
+		"""
+		Store a freshly scraped document, noting when it was fetched and whether it differs from the previous copy.
+		"""
+		if document == sa.FORECAST:
+			old, self.forecast = self.forecast, data
+		elif document == sa.STATISTICS:
+			old, self.statistics = self.statistics, data
+		else:
+			old, self.financials[document-1] = self.financials[document-1], data
+
+		self.fetched[document] = time.time()
+		if isinstance(data, dict):
+			changed = not pandas.Series(old, dtype=float).equals(pandas.Series(data, dtype=float))
+		else:
+			changed = not old.equals(data)
+		if changed:
+			self._changed.add(document)
 
 	def gen_financials(self, document: int) -> None:
 		"""
@@ -46,25 +79,65 @@ class Stock:
 			* Generally will be provided by stockanalysis.INCOME_STATEMENT, stockanalysis.BALANCE_SHEET, 
 			stockanalysis.CASH_FLOW_STATEMENT, with the correct number being supplied for each document.
 		"""
-		self.financials[document-1] = sa.scrape_financials(self.ticker, document)
+		self._set_document(document, sa.scrape_financials(self.ticker, document))
 
 	def gen_forecast(self) -> None:
 		"""
 		Generates a pandas DataFrame containing analyst forecasts for Revenue and EPS as well as the # of analysts and
 			the forward PE.
 		"""
-		self.forecast = sa.scrape_forecast(self.ticker)
+		self._set_document(sa.FORECAST, sa.scrape_forecast(self.ticker))
 	
 	def gen_statistics(self) -> None:
 		"""
-		Generates the following statistics in a dictionary self.statistics:
-			"beta"
-			"shares-outstanding"
+		Generates the following statistics as floats in a dictionary self.statistics:
+			"beta" (NaN if there is none)
+			"shares-outstanding" (in millions)
 			"price"
 		"""
-		self.statistics = sa.scrape_statistics(self.ticker)
+		self._set_document(sa.STATISTICS, sa.scrape_statistics(self.ticker))
+
+	def gen_data(self, concurrent: bool = True) -> None:
+		"""
+		Generates every document a DCF depends on: self.financials, self.forecast, and self.statistics.
+
+		:param concurrent: True = Fetch all five pages at the same time over the shared connection pool. 
+			False = Fetch the pages one after another.
+		"""
+		for document, data in sa.scrape_documents(self.ticker, concurrent=concurrent).items():
+			self._set_document(document, data)
+
+	def refresh(self, max_age: dict = None, concurrent: bool = True) -> list[int]:
+		"""
+		Fetch only the documents that were never fetched or are older than their maximum age.
 
-	def gen_dcf(self, auto_terminal_growth_rate: bool = True, regen_data = True) -> None:
+		:param max_age: Seconds each document may be reused for, keyed by document number, e.g. 
+			{stockanalysis.STATISTICS: 0}. Missing documents use stockanalysis.cache.DEFAULT_TTLS, so by default 
+			only statistics are refetched more than daily. A daily refresh still finds the day old forecast stale, so 
+			it costs two requests per ticker, or one with a longer maximum age for stockanalysis.FORECAST.
+		:param concurrent: True = Fetch stale pages at the same time. False = Fetch them one after another.
+		:return list[int]: The documents that were fetched.
+		"""
+		stale = self.stale_documents(max_age)
+		if stale:
+			for document, data in sa.scrape_documents(self.ticker, stale, concurrent).items():
+				self._set_document(document, data)
+		return stale
+
+	def stale_documents(self, max_age: dict = None) -> list[int]:
+		"""
+		Returns the documents that were never fetched or are older than their maximum age. See refresh().
+		"""
+		ages = dict(sa.cache.DEFAULT_TTLS)
+		if max_age:
+			ages.update(max_age)
+
+		now = time.time()
+		return [document for document in sa.ALL_DOCUMENTS 
+		  		if document not in self.fetched or now - self.fetched[document] >= ages[document]]
+
+	def gen_dcf(self, auto_terminal_growth_rate: bool = True, regen_data = True, concurrent: bool = False, 
+			 	incremental: bool = False, max_age: dict = None) -> None:
 		"""
 		Generate a DCF and its results: self.dcf (the DCF), self.dcf_margin (Margin of Safety), 
 			self.dcf_result (Intrinsic Value per Share). 
@@ -78,137 +151,167 @@ class Stock:
 		
 		:param regen_data: True = fetch all financials, forecasts, and statistics from https://stockanalysis.com. 
 			False = Use data fetched previously.
+
+		:param concurrent: True = Fetch all pages at the same time when regen_data is True. 
+			False = Fetch them one after another.
+
+		:param incremental: True = Only refetch documents older than max_age (see refresh()) and only recompute 
+			the parts of the DCF that depend on what changed. A new price alone just updates the margin of safety, 
+			a new beta re-discounts the existing cash flow projection. Overrides regen_data.
+
+		:param max_age: Seconds each document may be reused for when incremental is True.
 		"""
 		# Get Historic and Current Data
-		if regen_data:
-			self.gen_financials(sa.INCOME_STATEMENT)
-			self.gen_financials(sa.BALANCE_SHEET)
-			self.gen_financials(sa.CASH_FLOW_STATEMENT)
-			self.gen_forecast()
-			self.gen_statistics()
+		if incremental:
+			self.refresh(max_age, concurrent)
+		elif regen_data:
+			self.gen_data(concurrent=concurrent)
+		else:
+			self._changed.update(sa.ALL_DOCUMENTS)
 
-		# Establish Assumptions
-		try:
-			self.beta = float(self.statistics["beta"])
-		except:
-			pass
+		with sa.metrics.timer("dcf"):
+			self._revalue(auto_terminal_growth_rate)
 
-		self.price = self.normalize_num(self.statistics["price"])
-		self.shares_outstanding = self.normalize_num(self.statistics["shares-outstanding"])
+	def _revalue(self, auto_terminal_growth_rate: bool) -> None:
+		"""
+		Recompute the parts of the DCF that depend on documents changed since the last valuation.
+		"""
+		# Documents only count as applied once the valuation succeeds, so a failure here is retried on the next call 
+		# instead of leaving the old projection in place
+		changed = set(self._changed)
+		statistics = sa.valuation.statistics_inputs(self.statistics)
+
+		# Financial statements, forecasts, and shares outstanding feed the cash flow projection
+		if self._projection is None or changed - {sa.STATISTICS} or \
+				statistics["shares_outstanding"] != self._inputs["shares_outstanding"]:
+			self._inputs = sa.valuation.dcf_inputs(self.financials, self.forecast, self.statistics)
+			self._projection = sa.valuation.project_cash_flows(self._inputs)
+			if auto_terminal_growth_rate:
+				self.terminal_growth_rate = sa.valuation.auto_terminal_growth_rate(self._inputs["revenue_growth"], 
+																				   self._terminal_growth_cap)
+			self.dcf_values = {}
+		else:
+			self._inputs.update(statistics)
 
+		# Establish Assumptions
+		if not numpy.isnan(self._inputs["beta"]):
+			self.beta = self._inputs["beta"]
+		self.price = self._inputs["price"]
+		self.shares_outstanding = self._inputs["shares_outstanding"]
 		self.discount_rate = max(self.risk_free_rate + self.beta*(self.market_return - self.risk_free_rate), 
-						   		 self.discount_rate)
-
-		# Revenue + Revenue Growth %
-		revenue = [i for i in self.forecast.iloc[0].to_list()[5::]]
-		for i in range(len(revenue)):
-			if revenue[i] == "-":
-				revenue[i] = revenue[i-1]
-			else:
-				revenue[i] = round(self.normalize_num(revenue[i]))
-		revenue_growth = self.forecast.iloc[1].to_list()[5::]
-
-		# Net Income + Margin
-		net_income = [round(self.shares_outstanding * self.normalize_num(i)) for i in self.forecast.iloc[2].tolist()[5::]]
-		net_margin = [str(round((net_income[i]/revenue[i])*100, 2)) + "%" for i in range(len(net_income))]
-
-		# Historic D&A and CAPEX Data and Rates of Change
-		past_da = [round(self.normalize_num(i)) for i in self.financials[2].loc["Depreciation & Amortization"]][::-1]
-		past_capex = [round(-self.normalize_num(i)) for i in self.financials[2].loc["Capital Expenditures"]][::-1]
-		try:
-			past_revenue = [round(self.normalize_num(i)) for i in self.financials[0].loc["Revenue"]][::-1]
-		except:
-			past_revenue = [round(self.normalize_num(i)) for i in self.financials[0].loc["Total Revenue"]][::-1]
-		past_capex_margin = [round(past_capex[i]/past_revenue[i], 6) for i in range(len(past_capex))]
-		past_da_margin = [round(past_da[i]/past_revenue[i], 6) for i in range(len(past_da))]
-		annualized_da_change = (past_da_margin[-1]/past_da_margin[0])**(1/6) - 1
-		annualized_capex_change = (past_capex_margin[-1]/past_capex_margin[0])**(1/6) - 1
-
-		# D&A and CAPEX
-		da_margin = [round(past_da_margin[-1]*((1+annualized_da_change)**((i+1)/2)), 6) for i in range(len(net_income))]
-		da = [round(revenue[i]*da_margin[i]) for i in range(len(da_margin))]
-		capex_margin = [round(past_capex_margin[-1]*((1+annualized_capex_change)**((i+1)/2)), 6) 
-				  		for i in range(len(net_income))]
-		capex = [round(revenue[i]*capex_margin[i]) for i in range(len(capex_margin))]
-
-		# Free Cash Flow
-		past_net_income = [round(self.normalize_num(i)) for i in self.financials[0].loc["Net Income"]][::-1]
-
-		past_free_cash_flow = [past_net_income[i] + past_da[i] - past_capex[i] for i in range(len(past_net_income))]
-		past_free_cash_flow_margin = [str(round((past_free_cash_flow[i]/past_revenue[i]) * 100, 2)) + "%" 
-									  for i in range(len(past_free_cash_flow))]
-		
-		free_cash_flow = [net_income[i] + da[i] - capex[i] for i in range(len(net_income))]
-		free_cash_flow_margin = [str(round(free_cash_flow[i]/revenue[i] * 100, 2)) + "%" 
-						   		 for i in range(len(free_cash_flow))]
-
-		# Formating
-		past_da_margin = [str(round(i*100, 2)) + "%" for i in past_da_margin]
-		da_margin = [str(round(i*100, 2)) + "%" for i in da_margin]
-		past_capex_margin = [str(round(i*100, 2)) + "%" for i in past_capex_margin]
-		capex_margin = [str(round(i*100, 2)) + "%" for i in capex_margin]
-		past_revenue_growth = [i for i in self.financials[0].loc["Revenue Growth (YoY)"]][::-1]
-		past_net_margin = [str(round(past_net_income[i]/past_revenue[i] * 100, 2)) + "%" 
-					 	   for i in range(len(past_revenue))]
-
-		# Terminal Value
+						   		 self.min_discount_rate)
+
+		# Value the Company and Lay Out the DCF, re-discounting only if the rates moved
+		if not self.dcf_values or self.dcf_values["discount_rate"] != self.discount_rate or \
+				self.dcf_values["terminal_growth_rate"] != self.terminal_growth_rate:
+			self.dcf_values = sa.valuation.value_dcf(self._inputs, self.discount_rate, self.terminal_growth_rate, 
+													 self._projection)
+			self.dcf = sa.valuation.dcf_frame(self.dcf_values)
+		elif self.dcf_values["price"] != self.price:
+			self.dcf_values["price"] = self.price
+			self.dcf_values["margin"] = sa.valuation.margin_of_safety(self.dcf_values["implied_price"], self.price)
+			self.dcf.loc["Margin of Safety", self.dcf.columns[-1]] = \
+				sa.valuation.format_percent(self.dcf_values["margin"])
+
+		self.dcf_result = float(self.dcf_values["implied_price"])
+		self.dcf_margin = sa.valuation.format_percent(self.dcf_values["margin"])
+		self._changed -= changed
+
+	def gen_sensitivity(self, terminal_growth_rates: list[float], discount_rates: list[float] = None, 
+					 	market_returns: list[float] = None, betas: list[float] = None, metric: str = "price", 
+						regen_data: bool = False) -> pandas.DataFrame:
+		"""
+		Value the company over a whole grid of assumptions in one broadcasted computation. Pages are only fetched if 
+			they have not been already, and cash flows are projected once for the whole grid.
+
+		Rows are terminal growth rates. Columns are discount rates, or if market_returns and/or betas are given 
+			instead, the discount rate is derived from them the same way gen_dcf() does, floored at the minimum 
+			discount rate.
+
+		:param terminal_growth_rates: The terminal growth rates for the rows, e.g. [0.02, 0.025, 0.03].
+		:param discount_rates: The discount rates for the columns.
+		:param market_returns: Market returns for the columns, used with self.beta (or every value of betas).
+		:param betas: Betas for the columns, used with self.market_return (or every value of market_returns).
+		:param metric: "price" = Implied share price. "margin" = Margin of safety as a fraction.
+		:param regen_data: True = fetch all financials, forecasts, and statistics again first. False = Use data 
+			fetched previously, fetching it only if there is none.
+		:return pandas.DataFrame: The metric for every combination. Combinations where the discount rate does not 
+			exceed the terminal growth rate have no valid value and are NaN.
+		"""
+		if metric not in ("price", "margin"):
+			raise ValueError(f"metric must be \"price\" or \"margin\", not {metric!r}")
+		if regen_data or self.forecast.empty:
+			self.gen_data()
+
+		inputs = sa.valuation.dcf_inputs(self.financials, self.forecast, self.statistics)
+		if not numpy.isnan(inputs["beta"]):
+			self.beta = inputs["beta"]
+
+		# Column Assumptions
+		if discount_rates is not None:
+			columns = pandas.Index(discount_rates, name="Discount Rate")
+			rates = numpy.asarray(discount_rates, dtype=float)
+		elif market_returns is not None or betas is not None:
+			market_returns = [self.market_return] if market_returns is None else market_returns
+			betas = [self.beta] if betas is None else betas
+			columns = pandas.MultiIndex.from_product([market_returns, betas], names=["Market Return", "Beta"])
+			market_return_grid = columns.get_level_values(0).to_numpy(dtype=float)
+			beta_grid = columns.get_level_values(1).to_numpy(dtype=float)
+			rates = numpy.maximum(self.risk_free_rate + beta_grid*(market_return_grid - self.risk_free_rate), 
+						 		  self.min_discount_rate)
+			if len(market_returns) == 1 or len(betas) == 1:
+				columns = columns.droplevel(0 if len(market_returns) == 1 else 1)
+		else:
+			raise ValueError("One of discount_rates, market_returns, or betas is required")
+
+		growth_rates = numpy.asarray(terminal_growth_rates, dtype=float)[:, None]
+		rates = rates[None, :]
+
+		# Value Every Combination at Once
+		projection = sa.valuation.project_cash_flows(inputs)
+		# Combinations where the discount rate does not exceed the growth rate are masked below
+		with numpy.errstate(divide="ignore", invalid="ignore"):
+			discounted = sa.valuation.discount_cash_flows(projection["projected_free_cash_flow"], rates, growth_rates)
+		values = sa.valuation.implied_share_price(discounted["enterprise_value"], inputs["cash"], inputs["debt"], 
+											   	  inputs["shares_outstanding"])
+		if metric == "margin":
+			values = sa.valuation.margin_of_safety(values, inputs["price"])
+		values = numpy.where(rates > growth_rates, values, numpy.nan)
+
+		return pandas.DataFrame(values, index=pandas.Index(terminal_growth_rates, name="Terminal Growth Rate"), 
+						  		columns=columns)
+
+	def gen_monte_carlo(self, paths: int = 100_000, distributions: dict = None, seed: int = None, 
+					 	chunk_size: int = 10_000, percentiles: list[float] = (5, 25, 50, 75, 95), 
+						regen_data: bool = False, auto_terminal_growth_rate: bool = True) -> dict:
+		"""
+		Value the company over randomly sampled assumptions instead of a single point estimate. See 
+			stockanalysis.montecarlo.simulate() for the inputs that can be sampled and their distributions.
+
+		:param paths: The number of sampled paths.
+		:param distributions: Distributions for any sampled input, e.g. {"beta": ("normal", 1.1, 0.3)}. Missing 
+			inputs are centered on this stock's assumptions.
+		:param seed: Seed for the random generator so results are reproducible.
+		:param chunk_size: The number of paths evaluated at once, which bounds memory use.
+		:param percentiles: The percentiles of the implied share price to report.
+		:param regen_data: True = fetch all financials, forecasts, and statistics again first. False = Use data 
+			fetched previously, fetching it only if there is none.
+		:param auto_terminal_growth_rate: True = Center the terminal growth rate on the one gen_dcf() generates from 
+			revenue estimates. False = Use self.terminal_growth_rate
+		:return dict: Implied share price "percentiles", the "probability_positive" margin of safety, the "mean" 
+			implied share price, and the number of valid "paths".
+		"""
+		if regen_data or self.forecast.empty:
+			self.gen_data()
+
+		inputs = sa.valuation.dcf_inputs(self.financials, self.forecast, self.statistics)
+		if not numpy.isnan(inputs["beta"]):
+			self.beta = inputs["beta"]
 		if auto_terminal_growth_rate:
-			for i in range(len(revenue_growth)-1, 0, -1):
-				if revenue_growth[i] != "-":
-					self.terminal_growth_rate = min(
-						round(float(revenue_growth[i].strip("%"))/250, 6), 
-						self.terminal_growth_rate)
-					break
-		terminal_value = ["" for _ in range(len(past_free_cash_flow) + len(free_cash_flow)-1)] + \
-			[round(free_cash_flow[-1]*(1+self.terminal_growth_rate)/(self.discount_rate-self.terminal_growth_rate))]
-
-		# Discounting and Final Value
-		present_free_cash_flow = ["" for _ in range(len(past_free_cash_flow))] + \
-			[round(free_cash_flow[i]/((1+self.discount_rate)**(i+1))) for i in range(len(free_cash_flow))]
-		present_terminal_value = ["" for _ in range(len(past_free_cash_flow) + len(free_cash_flow)-1)] + \
-			[round(terminal_value[-1]/((1+self.discount_rate)**len(free_cash_flow)))]
-
-		enterprise_value = sum([i if i != "" else 0 for i in present_free_cash_flow]) + \
-						   sum([i if i != "" else 0 for i in present_terminal_value])
-		try:
-			debt = self.normalize_num(list(self.financials[1].loc["Long-Term Debt"])[0])
-		except:
-			debt = self.normalize_num(list(self.financials[1].loc["Total Debt"])[0])
-		cash = self.normalize_num(list(self.financials[1].loc["Cash & Equivalents"])[0])
-		marketcap = enterprise_value + cash - debt
-
-		self.dcf_result = round(marketcap / self.shares_outstanding, 2)
-		self.dcf_margin = str(round(((self.dcf_result/self.price) -1)* 100, 2)) + "%"
-
-		# Set Up DCF
-		df = pandas.DataFrame(columns=([i[-4::] for i in list(self.financials[0].columns[::-1])] + \
-								 list(self.forecast.columns[5::])))
-		df.loc["Revenue"] = past_revenue + revenue
-		df.loc["Revenue Growth"] = past_revenue_growth + revenue_growth
-		df.loc["Net Income"] = past_net_income + net_income
-		df.loc["Net Margin"] = past_net_margin + net_margin
-		df.loc["D&A"] = past_da + da
-		df.loc["D&A % Of Revenue"] = past_da_margin + da_margin
-		df.loc["CAPEX"] = past_capex + capex
-		df.loc["CAPEX % Of Revenue"] = past_capex_margin + capex_margin
-		df.loc["Free Cash Flow"] = past_free_cash_flow + free_cash_flow
-		df.loc["Free Cash Flow Margin"] = past_free_cash_flow_margin + free_cash_flow_margin
-		df.loc["Present Value of FCF"] = present_free_cash_flow
-		df.loc["Terminal Value"] = terminal_value
-		df.loc["Present Terminal Value"] = present_terminal_value
-		df.loc["Enterprise Value"] = ["" for _ in range(len(past_free_cash_flow) + len(free_cash_flow)-1)] + \
-									 [enterprise_value]
-		df.loc["Cash (+)"] = ["" for _ in range(len(past_free_cash_flow) + len(free_cash_flow)-1)] + [cash]
-		df.loc["Debt (-)"] = ["" for _ in range(len(past_free_cash_flow) + len(free_cash_flow)-1)] + [debt]
-		df.loc["Market Cap"] = ["" for _ in range(len(past_free_cash_flow) + len(free_cash_flow)-1)] + [marketcap]
-		df.loc["Shares Outstanding"] = ["" for _ in range(len(past_free_cash_flow) + len(free_cash_flow)-1)] + \
-									   [self.shares_outstanding]
-		df.loc["Implied Share Price"] = ["" for _ in range(len(past_free_cash_flow) + len(free_cash_flow)-1)] + \
-										["$"+str(self.dcf_result)]
-		df.loc["Margin of Safety"] = ["" for _ in range(len(past_free_cash_flow) + len(free_cash_flow)-1)] + \
-									 [self.dcf_margin]
-
-		self.dcf = df
+			rate = sa.valuation.auto_terminal_growth_rate(inputs["revenue_growth"], self._terminal_growth_cap)
+			distributions = {"terminal_growth_rate": ("constant", rate), **(distributions or {})}
+
+		return sa.montecarlo.simulate(self, inputs, paths, distributions, seed, chunk_size, percentiles)
 
 	def normalize_num(self, value: str) -> float:
 		"""
@@ -217,12 +320,7 @@ class Stock:
 
 		NOTE: Financials Documents are already in millions of dollars for all dollar values.
 
-		:param value: A string number with a unit at the end like B (billions) or M (millions).
+		:param value: A string number with a unit at the end like K, M, B, T, or %. Markers like "-" become NaN. 
+			See stockanalysis.numeric.to_number().
 		"""
-		if value == "-":
-			return 0
-		if value[-1] == "B":
-			return float(value[0:(len(value) - 1)].replace(",", "")) * 1000
-		if value[-1] == "M":
-			return float(value[0:(len(value) - 1)].replace(",", ""))
-		return float(value.replace(",", ""))
+		return sa.numeric.to_number(value)
@@ -0,0 +1,181 @@
+# Standard Library Imports
+import datetime
+import os
+
+# Third Party Imports
+import numpy
+import pandas
+import pyarrow
+import pyarrow.compute
+import pyarrow.feather
+import pyarrow.parquet
+
+DATASETS = ("financials", "forecast", "statistics", "dcf", "valuations")
+FORMATS = {"parquet": ".parquet", "feather": ".feather"}
+RUN_FORMAT = "%Y%m%dT%H%M%S%fZ"
+
+
+def new_run() -> datetime.datetime:
+	"""
+	Returns a UTC timestamp identifying a run. Pass the same value to every save_stock() call of a batch.
+	"""
+	return datetime.datetime.now(datetime.timezone.utc)
+
+def save_stock(stock, root: str = "results/store", run: datetime.datetime = None, 
+			   format: str = "parquet") -> None:
+	"""
+	Append everything known about a stock to the columnar store, one file per dataset partitioned by ticker and 
+		run timestamp:
+
+		<root>/<dataset>/ticker=<TICKER>/<run>.parquet
+
+	Datasets with no data, like "dcf" before gen_dcf() is run, are skipped.
+
+	:param stock: The stockanalysis.Stock to save.
+	:param root: The folder the store lives in.
+	:param run: The UTC timestamp of the run. If None, the current time is used.
+	:param format: "parquet" = Compressed, best for long term history. "feather" = Uncompressed Arrow IPC, 
+		fastest to memory-map.
+	"""
+	if format not in FORMATS:
+		raise ValueError(f"format must be one of {', '.join(FORMATS)}, not {format!r}")
+	run = run or new_run()
+	ticker = stock.ticker.upper()
+
+	tables = {}
+	statements = [long_table(df, name) for df, name in 
+				  zip(stock.financials, ["income-statement", "balance-sheet", "cash-flow-statement"]) if not df.empty]
+	if statements:
+		tables["financials"] = pandas.concat(statements, ignore_index=True)
+	if not stock.forecast.empty:
+		tables["forecast"] = long_table(stock.forecast, "forecast")
+	if stock.statistics:
+		tables["statistics"] = pandas.DataFrame([{
+			"beta": float(stock.statistics.get("beta", numpy.nan)),
+			"shares_outstanding": float(stock.statistics.get("shares-outstanding", numpy.nan)),
+			"price": float(stock.statistics.get("price", numpy.nan)),
+		}])
+	if stock.dcf_values:
+		tables["dcf"] = _dcf_table(stock.dcf_values)
+		tables["valuations"] = pandas.DataFrame([{
+			"price": float(stock.price),
+			"implied_price": float(stock.dcf_result),
+			"margin": float(stock.dcf_values["margin"]),
+			"discount_rate": float(stock.discount_rate),
+			"terminal_growth_rate": float(stock.terminal_growth_rate),
+			"beta": float(stock.beta),
+		}])
+
+	for dataset, df in tables.items():
+		df.insert(0, "run", pandas.Timestamp(run))
+		df.insert(0, "ticker", ticker)
+		_write(pyarrow.Table.from_pandas(df, preserve_index=False), 
+			   os.path.join(root, dataset, f"ticker={ticker}", run.strftime(RUN_FORMAT) + FORMATS[format]))
+
+def load_dataset(dataset: str, root: str = "results/store", tickers: list[str] = None, start=None, end=None, 
+				 memory_map: bool = True, items: list[str] = None) -> pandas.DataFrame:
+	"""
+	Load one dataset for many tickers and runs into a single pandas DataFrame. Files outside tickers or the date 
+		range are never opened.
+
+	:param dataset: One of "financials", "forecast", "statistics", "dcf", or "valuations".
+	:param root: The folder the store lives in.
+	:param tickers: The tickers to load. If None, every ticker is loaded.
+	:param start: The earliest run to load, as anything pandas.Timestamp accepts. Naive times are UTC.
+	:param end: The latest run to load, inclusive.
+	:param memory_map: True = Memory-map files instead of reading them into memory first.
+	:param items: Only keep rows with one of these items, e.g. ["Revenue", "Net Income"], before anything is 
+		converted to pandas. Only the "financials" and "forecast" datasets have items, so other datasets raise a 
+		ValueError. If None, every row is kept.
+	:return pandas.DataFrame: Rows from every matching run with "ticker" and "run" columns, sorted by run then 
+		ticker.
+	"""
+	if dataset not in DATASETS:
+		raise ValueError(f"dataset must be one of {', '.join(DATASETS)}, not {dataset!r}")
+	if items is not None and dataset not in ("financials", "forecast"):
+		raise ValueError(f"items only applies to the financials and forecast datasets, not {dataset!r}")
+	start = _utc(start)
+	end = _utc(end)
+	folder = os.path.join(root, dataset)
+	if not os.path.isdir(folder):
+		return pandas.DataFrame()
+
+	wanted = None if tickers is None else {f"ticker={ticker.upper()}" for ticker in tickers}
+	tables = []
+	for partition in sorted(os.listdir(folder)):
+		if wanted is not None and partition not in wanted:
+			continue
+		for fname in sorted(os.listdir(os.path.join(folder, partition))):
+			name, extension = os.path.splitext(fname)
+			if extension not in FORMATS.values():
+				continue
+			if start is not None or end is not None:
+				run = datetime.datetime.strptime(name, RUN_FORMAT).replace(tzinfo=datetime.timezone.utc)
+				if (start is not None and run < start) or (end is not None and run > end):
+					continue
+			tables.append(_read(os.path.join(folder, partition, fname), memory_map))
+
+	if not tables:
+		return pandas.DataFrame()
+	table = pyarrow.concat_tables(tables, promote_options="default")
+	if items is not None:
+		table = table.filter(pyarrow.compute.is_in(table["item"], value_set=pyarrow.array(items)))
+	df = table.to_pandas()
+	return df.sort_values(["run", "ticker"], kind="stable", ignore_index=True)
+
+def long_table(df: pandas.DataFrame, document: str) -> pandas.DataFrame:
+	"""
+	Melt a scraped document into document, item, period, value columns so every ticker shares one schema.
+	"""
+	values = df.to_numpy()
+	return pandas.DataFrame({
+		"document": document,
+		"item": numpy.repeat(df.index.to_numpy(dtype=str), len(df.columns)),
+		"period": numpy.tile(df.columns.to_numpy(dtype=str), len(df.index)),
+		"value": values.ravel().astype(float),
+	})
+
+def _dcf_table(values: dict) -> pandas.DataFrame:
+	"""
+	Flatten the yearly rows of a numeric DCF into year, metric, value columns.
+	"""
+	years = values["years"]
+	metrics = ["revenue", "revenue_growth", "net_income", "da", "da_margin", "capex", "capex_margin", 
+			   "free_cash_flow"]
+	frames = [pandas.DataFrame({"year": years, "metric": metric, "value": numpy.asarray(values[metric], dtype=float)}) 
+		   	  for metric in metrics]
+	frames.append(pandas.DataFrame({
+		"year": years[-len(values["present_free_cash_flow"]):],
+		"metric": "present_free_cash_flow",
+		"value": numpy.asarray(values["present_free_cash_flow"], dtype=float),
+	}))
+	for metric in ["terminal_value", "present_terminal_value", "enterprise_value", "cash", "debt", "market_cap", 
+				   "shares_outstanding", "implied_price", "price", "margin"]:
+		frames.append(pandas.DataFrame({"year": [years[-1]], "metric": metric, "value": [float(values[metric])]}))
+	return pandas.concat(frames, ignore_index=True)
+
+def _utc(value):
+	if value is None:
+		return None
+	value = pandas.Timestamp(value)
+	if value.tzinfo is None:
+		value = value.tz_localize("UTC")
+	return value.to_pydatetime()
+
+def _write(table: pyarrow.Table, path: str) -> None:
+	"""
+	Write through a temporary file so readers never see a partial file.
+	"""
+	os.makedirs(os.path.dirname(path), exist_ok=True)
+	tmp_path = path + f".{os.getpid()}.tmp"
+	if path.endswith(FORMATS["feather"]):
+		pyarrow.feather.write_feather(table, tmp_path, compression="uncompressed")
+	else:
+		pyarrow.parquet.write_table(table, tmp_path)
+	os.replace(tmp_path, path)
+
+def _read(path: str, memory_map: bool) -> pyarrow.Table:
+	if path.endswith(FORMATS["feather"]):
+		return pyarrow.feather.read_table(path, memory_map=memory_map)
+	# ParquetFile skips the dataset discovery read_table() does, which dominates for the small file of each run
+	return pyarrow.parquet.ParquetFile(path, memory_map=memory_map).read()
@@ -1,5 +1,28 @@
-
 # Global Financial Document Enumerations
 INCOME_STATEMENT = 1
 BALANCE_SHEET = 2
-CASH_FLOW_STATEMENT = 3
\ No newline at end of file
+CASH_FLOW_STATEMENT = 3
+FORECAST = 4
+STATISTICS = 5
+
+# Every document needed to generate a DCF, in the order they are fetched
+ALL_DOCUMENTS = (INCOME_STATEMENT, BALANCE_SHEET, CASH_FLOW_STATEMENT, FORECAST, STATISTICS)
+
+# Where each document lives on stockanalysis.com, relative to a ticker's page
+BASE_URL = "https://stockanalysis.com/stocks/"
+DOCUMENT_PATHS = {
+	INCOME_STATEMENT: "/financials/",
+	BALANCE_SHEET: "/financials/balance-sheet/",
+	CASH_FLOW_STATEMENT: "/financials/cash-flow-statement",
+	FORECAST: "/forecast/",
+	STATISTICS: "/statistics/",
+}
+
+# Names used for each document when it is stored on disk
+DOCUMENT_NAMES = {
+	INCOME_STATEMENT: "income-statement",
+	BALANCE_SHEET: "balance-sheet",
+	CASH_FLOW_STATEMENT: "cash-flow-statement",
+	FORECAST: "forecast",
+	STATISTICS: "statistics",
+}
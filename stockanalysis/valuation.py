@@ -0,0 +1,330 @@
+# Standard Library Imports
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+# Third Party Imports
+import numpy
+
+if TYPE_CHECKING:
+	import pandas
+
+# Local Imports
+import stockanalysis as sa
+
+# Number of historic forecast columns that come before the analyst estimates
+FORECAST_HISTORY = 5
+
+# The financial statement row behind each DCF input, keyed by input name. Later labels are fallbacks for companies 
+# that lack the first, e.g. banks report "Total Revenue".
+INPUT_ROWS = {
+	"past_revenue": ("income-statement", ("Revenue", "Total Revenue")),
+	"past_revenue_growth": ("income-statement", ("Revenue Growth (YoY)",)),
+	"past_net_income": ("income-statement", ("Net Income",)),
+	"cash": ("balance-sheet", ("Cash & Equivalents",)),
+	"debt": ("balance-sheet", ("Long-Term Debt", "Total Debt")),
+	"past_da": ("cash-flow-statement", ("Depreciation & Amortization",)),
+	"past_capex": ("cash-flow-statement", ("Capital Expenditures",)),
+}
+
+
+def dcf_inputs(financials: list[pandas.DataFrame], forecast: pandas.DataFrame, statistics: dict) -> dict:
+	"""
+	Extract every number a DCF needs from scraped documents into float arrays. Historic arrays run oldest to 
+		newest, ending with TTM. Dollar values are in millions. Missing statement values and EPS estimates count as 
+		0, and missing revenue estimates carry the last estimate forward.
+
+	:param financials: The Income Statement, Balance Sheet, and Cash Flow Statement as returned by 
+		stockanalysis.scrape_financials().
+	:param forecast: The forecast as returned by stockanalysis.scrape_forecast().
+	:param statistics: The statistics as returned by stockanalysis.scrape_statistics().
+	:return dict: The inputs for project_cash_flows() and value_dcf().
+	"""
+	income = financials[0]
+	documents = dict(zip(("income-statement", "balance-sheet", "cash-flow-statement"), financials))
+	rows = {name: _row(documents[document], document.replace("-", " "), *labels) 
+			for name, (document, labels) in INPUT_ROWS.items()}
+
+	# Analyst estimates, carrying the last estimate forward where there is none
+	if len(forecast.index) < 3:
+		raise sa.scrape.MissingFieldError("The forecast has no revenue, revenue growth, and EPS estimates")
+	estimates = forecast.to_numpy()[:, FORECAST_HISTORY::]
+	revenue = forward_fill(numpy.round(estimates[0].astype(float)))
+
+	inputs = {
+		"years": [i[-4::] for i in list(income.columns[::-1])] + list(forecast.columns[FORECAST_HISTORY::]),
+		"past_revenue": numpy.round(_values(rows["past_revenue"])[::-1]),
+		"past_revenue_growth": rows["past_revenue_growth"].to_numpy(dtype=float)[::-1],
+		"past_net_income": numpy.round(_values(rows["past_net_income"])[::-1]),
+		"past_da": numpy.round(_values(rows["past_da"])[::-1]),
+		"past_capex": numpy.round(-_values(rows["past_capex"])[::-1]),
+		"revenue": revenue,
+		"revenue_growth": estimates[1].astype(float),
+		"eps": numpy.nan_to_num(estimates[2].astype(float)),
+		"cash": _values(rows["cash"])[0],
+		"debt": _values(rows["debt"])[0],
+	}
+	inputs.update(statistics_inputs(statistics))
+	return inputs
+
+def statistics_inputs(statistics: dict) -> dict:
+	"""
+	Returns the "shares_outstanding", "price", and "beta" inputs from scraped statistics. Beta is NaN if the page 
+		has none.
+
+	:param statistics: The statistics as returned by stockanalysis.scrape_statistics().
+	"""
+	return {
+		"shares_outstanding": float(statistics["shares-outstanding"]),
+		"price": float(statistics["price"]),
+		"beta": float(statistics.get("beta", numpy.nan)),
+	}
+
+def _row(document: pandas.DataFrame, name: str, *labels: str) -> pandas.Series:
+	"""
+	Returns the first of labels found in a scraped document, raising MissingFieldError if there is none.
+	"""
+	for label in labels:
+		if label in document.index:
+			return document.loc[label]
+	raise sa.scrape.MissingFieldError(f"The {name} has no {' or '.join(repr(label) for label in labels)}")
+
+def _values(row: pandas.Series) -> numpy.ndarray:
+	"""
+	Returns a statement row as a float array with missing values as 0.
+	"""
+	return numpy.nan_to_num(row.to_numpy(dtype=float))
+
+def forward_fill(values: numpy.ndarray) -> numpy.ndarray:
+	"""
+	Returns values with each NaN replaced by the last value before it along the last axis, like 
+		pandas.Series.ffill(). Leading NaNs are kept.
+	"""
+	positions = numpy.where(numpy.isnan(values), 0, numpy.arange(values.shape[-1]))
+	return numpy.take_along_axis(values, numpy.maximum.accumulate(positions, axis=-1), axis=-1)
+
+def auto_terminal_growth_rate(revenue_growth: numpy.ndarray, max_rate: float) -> float:
+	"""
+	Returns 40% of the last available analyst revenue growth estimate, capped at max_rate.
+
+	:param revenue_growth: Forecast revenue growth as fractions, NaN where there is no estimate.
+	:param max_rate: The highest terminal growth rate allowed.
+	"""
+	for i in range(len(revenue_growth)-1, 0, -1):
+		if not numpy.isnan(revenue_growth[i]):
+			return min(round(revenue_growth[i]*100/250, 6), max_rate)
+	return max_rate
+
+def project_cash_flows(inputs: dict, revenue_scale=1.0, eps_scale=1.0, da_change=None, 
+					   capex_change=None) -> dict:
+	"""
+	Project net income, D&A, CAPEX, and free cash flow over the forecast years. D&A and CAPEX margins keep drifting 
+		at their historic annualized rate of change.
+
+	Every optional argument may be a float or an array of scenarios, in which case the projected arrays gain 
+		matching leading axes.
+
+	:param inputs: The dictionary returned by dcf_inputs().
+	:param revenue_scale: Multiplier applied to the analyst revenue estimates.
+	:param eps_scale: Multiplier applied to the analyst EPS estimates.
+	:param da_change: Annualized rate of change of the D&A margin. If None, the historic rate is used.
+	:param capex_change: Annualized rate of change of the CAPEX margin. If None, the historic rate is used.
+	:return dict: Historic and projected arrays, each running oldest to newest.
+	"""
+	revenue = inputs["revenue"] * numpy.asarray(revenue_scale, dtype=float)[..., None]
+	eps = inputs["eps"] * numpy.asarray(eps_scale, dtype=float)[..., None]
+	past_revenue = inputs["past_revenue"]
+	past_da = inputs["past_da"]
+	past_capex = inputs["past_capex"]
+	years_out = numpy.arange(1, revenue.shape[-1] + 1)
+
+	net_income = numpy.round(inputs["shares_outstanding"] * eps)
+
+	past_da_margin = numpy.round(past_da / past_revenue, 6)
+	past_capex_margin = numpy.round(past_capex / past_revenue, 6)
+	if da_change is None:
+		da_change = historic_margin_change(past_da_margin)
+	if capex_change is None:
+		capex_change = historic_margin_change(past_capex_margin)
+	da_change = numpy.asarray(da_change, dtype=float)[..., None]
+	capex_change = numpy.asarray(capex_change, dtype=float)[..., None]
+
+	da_margin = numpy.round(past_da_margin[..., -1:] * (1 + da_change)**(years_out/2), 6)
+	capex_margin = numpy.round(past_capex_margin[..., -1:] * (1 + capex_change)**(years_out/2), 6)
+	da = numpy.round(revenue * da_margin)
+	capex = numpy.round(revenue * capex_margin)
+
+	past_free_cash_flow = inputs["past_net_income"] + past_da - past_capex
+	free_cash_flow = net_income + da - capex
+
+	def history(past, projected):
+		past = numpy.broadcast_to(past, projected.shape[:-1] + past.shape[-1:])
+		return numpy.concatenate([past, projected], axis=-1)
+
+	return {
+		"revenue": history(past_revenue, revenue),
+		"net_income": history(inputs["past_net_income"], net_income),
+		"da": history(past_da, da),
+		"da_margin": history(past_da_margin, da_margin),
+		"capex": history(past_capex, capex),
+		"capex_margin": history(past_capex_margin, capex_margin),
+		"free_cash_flow": history(past_free_cash_flow, free_cash_flow),
+		"projected_free_cash_flow": free_cash_flow,
+	}
+
+def historic_margin_change(past_margin: numpy.ndarray):
+	"""
+	Returns the annualized rate of change between the oldest and newest historic margin.
+	"""
+	return (past_margin[..., -1] / past_margin[..., 0])**(1/6) - 1
+
+def discount_cash_flows(free_cash_flow: numpy.ndarray, discount_rate, terminal_growth_rate) -> dict:
+	"""
+	Discount projected free cash flows and a Gordon growth terminal value back to today. The rates broadcast against 
+		each other and against every axis of free_cash_flow except the last, so a whole grid of scenarios is 
+		valued in one call.
+
+	:param free_cash_flow: Projected free cash flows, one per forecast year along the last axis.
+	:param discount_rate: The discount rate as a float or array.
+	:param terminal_growth_rate: The terminal growth rate as a float or array.
+	:return dict: "present_free_cash_flow", "terminal_value", "present_terminal_value", and "enterprise_value".
+	"""
+	discount_rate = numpy.asarray(discount_rate, dtype=float)[..., None]
+	terminal_growth_rate = numpy.asarray(terminal_growth_rate, dtype=float)[..., None]
+	years_out = numpy.arange(1, free_cash_flow.shape[-1] + 1)
+
+	present_free_cash_flow = numpy.round(free_cash_flow / (1 + discount_rate)**years_out)
+	terminal_value = numpy.round(free_cash_flow[..., -1:] * (1 + terminal_growth_rate) / 
+							  	 (discount_rate - terminal_growth_rate))[..., 0]
+	present_terminal_value = numpy.round(terminal_value / (1 + discount_rate[..., 0])**free_cash_flow.shape[-1])
+
+	return {
+		"present_free_cash_flow": present_free_cash_flow,
+		"terminal_value": terminal_value,
+		"present_terminal_value": present_terminal_value,
+		"enterprise_value": present_free_cash_flow.sum(axis=-1) + present_terminal_value,
+	}
+
+def implied_share_price(enterprise_value, cash, debt, shares_outstanding):
+	"""
+	Returns the intrinsic value per share implied by an enterprise value. Works element-wise on arrays.
+	"""
+	return numpy.round((enterprise_value + cash - debt) / shares_outstanding, 2)
+
+def value_dcf(inputs: dict, discount_rate: float, terminal_growth_rate: float, projection: dict = None) -> dict:
+	"""
+	Run a full DCF on float arrays with no string formatting.
+
+	:param inputs: The dictionary returned by dcf_inputs().
+	:param discount_rate: The discount rate.
+	:param terminal_growth_rate: The terminal growth rate.
+	:param projection: A dictionary previously returned by project_cash_flows() for the same inputs. If None, it is 
+		computed.
+	:return dict: Every row of the DCF as floats or float arrays, plus "implied_price" and "margin" (the margin of 
+		safety as a fraction).
+	"""
+	if projection is None:
+		projection = project_cash_flows(inputs)
+	discounted = discount_cash_flows(projection["projected_free_cash_flow"], discount_rate, terminal_growth_rate)
+
+	market_cap = discounted["enterprise_value"] + inputs["cash"] - inputs["debt"]
+	implied_price = implied_share_price(discounted["enterprise_value"], inputs["cash"], inputs["debt"], 
+									 	inputs["shares_outstanding"])
+
+	result = dict(projection)
+	result.update(discounted)
+	result.update({
+		"years": inputs["years"],
+		"revenue_growth": numpy.concatenate([inputs["past_revenue_growth"], inputs["revenue_growth"]]),
+		"cash": inputs["cash"],
+		"debt": inputs["debt"],
+		"market_cap": market_cap,
+		"shares_outstanding": inputs["shares_outstanding"],
+		"implied_price": implied_price,
+		"price": inputs["price"],
+		"margin": margin_of_safety(implied_price, inputs["price"]),
+		"discount_rate": discount_rate,
+		"terminal_growth_rate": terminal_growth_rate,
+	})
+	return result
+
+def margin_of_safety(implied_price, price):
+	"""
+	Returns (intrinsic value - current price)/current price as a fraction. Works element-wise on arrays.
+	"""
+	return numpy.round(implied_price / price - 1, 4)
+
+def format_percent(value: float, decimals: int = None) -> str:
+	"""
+	Format a fraction like 0.1234 as "12.34%", and NaN as "-".
+
+	:param decimals: Always show this many decimal places, like the growth rates on stockanalysis.com ("13.40%"). 
+		If None, trailing zeros are dropped ("13.4%").
+	"""
+	if numpy.isnan(value):
+		return "-"
+	if decimals is not None:
+		return f"{value*100:.{decimals}f}%"
+	return str(round(value*100, 2)) + "%"
+
+def dcf_frame(result: dict) -> pandas.DataFrame:
+	"""
+	Lay out a numeric DCF from value_dcf() as the formatted pandas DataFrame stored in Stock.dcf.
+
+	:param result: The dictionary returned by value_dcf().
+	"""
+	import pandas
+
+	columns = result["years"]
+	blank = [""] * (len(columns) - 1)
+	n_past = len(columns) - len(result["present_free_cash_flow"])
+	revenue = result["revenue"]
+
+	def whole(values):
+		return [int(i) for i in values]
+
+	def percents(values, decimals=None):
+		return [format_percent(i, decimals) for i in values]
+
+	return pandas.DataFrame([
+		whole(revenue),
+		percents(result["revenue_growth"], 2),
+		whole(result["net_income"]),
+		percents(result["net_income"] / revenue),
+		whole(result["da"]),
+		percents(result["da_margin"]),
+		whole(result["capex"]),
+		percents(result["capex_margin"]),
+		whole(result["free_cash_flow"]),
+		percents(result["free_cash_flow"] / revenue),
+		[""] * n_past + whole(result["present_free_cash_flow"]),
+		blank + [int(result["terminal_value"])],
+		blank + [int(result["present_terminal_value"])],
+		blank + [int(result["enterprise_value"])],
+		blank + [float(result["cash"])],
+		blank + [float(result["debt"])],
+		blank + [float(result["market_cap"])],
+		blank + [float(result["shares_outstanding"])],
+		blank + ["$" + str(float(result["implied_price"]))],
+		blank + [format_percent(result["margin"])],
+	], columns=columns, index=[
+		"Revenue",
+		"Revenue Growth",
+		"Net Income",
+		"Net Margin",
+		"D&A",
+		"D&A % Of Revenue",
+		"CAPEX",
+		"CAPEX % Of Revenue",
+		"Free Cash Flow",
+		"Free Cash Flow Margin",
+		"Present Value of FCF",
+		"Terminal Value",
+		"Present Terminal Value",
+		"Enterprise Value",
+		"Cash (+)",
+		"Debt (-)",
+		"Market Cap",
+		"Shares Outstanding",
+		"Implied Share Price",
+		"Margin of Safety",
+	])
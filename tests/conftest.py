@@ -0,0 +1,26 @@
+# Third Party Imports
+import pytest
+
+# Local Imports
+import stockanalysis as sa
+from benchmarks.server import StandInServer
+
+
+@pytest.fixture(autouse=True)
+def fetch_settings():
+	"""
+	Retry at once and never pause on failures, then put every fetch setting back after the test.
+	"""
+	settings = sa.fetch.settings()
+	sa.fetch.configure_retries(backoff=0)
+	sa.fetch.set_circuit_breaker(None)
+	yield
+	sa.fetch.apply_settings(settings)
+
+@pytest.fixture
+def server():
+	"""
+	A StandInServer serving fixture pages, which every fetch goes to while the test runs.
+	"""
+	with StandInServer() as server:
+		yield server
@@ -0,0 +1,56 @@
+# Standard Library Imports
+import asyncio
+
+# Third Party Imports
+import pytest
+
+# Local Imports
+import stockanalysis as sa
+
+
+def run(coroutine):
+	"""
+	Run a coroutine on a new event loop, closing its aiohttp session before the loop shuts down.
+	"""
+	async def main():
+		try:
+			return await coroutine
+		finally:
+			await sa.aio.close()
+	return asyncio.run(main())
+
+async def collect(*args, **kwargs) -> dict:
+	return {ticker: (stock, error) async for ticker, stock, error in sa.aio.multi_dcf(*args, **kwargs)}
+
+
+def test_multi_dcf_matches_the_synchronous_valuation(server):
+	results = run(collect(["aapl", "msft", "nope/x"], max_concurrency=2))
+	assert set(results) == {"aapl", "msft", "nope/x"}
+	for ticker in ("aapl", "msft"):
+		stock, error = results[ticker]
+		assert error is None
+		expected = sa.Stock(ticker)
+		expected.gen_dcf()
+		assert stock.dcf_result == expected.dcf_result
+		assert stock.dcf.equals(expected.dcf)
+	stock, error = results["nope/x"]
+	assert stock is None
+	assert error == f"FetchError: 404 error fetching {server.url}nope/x/financials/"
+
+def test_incremental_calls_reuse_fresh_documents(server):
+	sa.aio._stocks.clear()
+	try:
+		first = run(collect(["aapl"], incremental=True))
+		requests = server.requests
+		second = run(collect(["aapl"], incremental=True))
+	finally:
+		sa.aio._stocks.clear()
+	assert second["aapl"][0] is first["aapl"][0]
+	assert server.requests == requests
+
+def test_synchronous_methods_cannot_fetch():
+	stock = sa.aio.AsyncStock("aapl")
+	with pytest.raises(TypeError, match="await stock.gen_data"):
+		stock.gen_sensitivity([0.02], [0.08])
+	with pytest.raises(TypeError, match="await stock.gen_data"):
+		stock.gen_monte_carlo(paths=10)
@@ -0,0 +1,53 @@
+# Third Party Imports
+import numpy
+import pandas
+import pytest
+
+# Local Imports
+import stockanalysis as sa
+from benchmarks.run import loaded_stock, store_snapshots
+
+TICKERS = ["aapl", "msft", "amzn", "avgo"]
+
+
+@pytest.fixture(scope="module")
+def store(tmp_path_factory):
+	root = tmp_path_factory.mktemp("store")
+	store_snapshots([loaded_stock(ticker) for ticker in TICKERS], root, days=10)
+	return root
+
+def test_signals_match_gen_dcf(store):
+	signals = sa.backtest.signals(store)
+	assert len(signals) == len(TICKERS) * 10
+	prices = sa.store.load_dataset("statistics", store).set_index(["ticker", "run"])["price"]
+	for (ticker, run), snapshot in signals.iterrows():
+		stock = loaded_stock(ticker)
+		stock.statistics["price"] = prices[(ticker, run)]
+		stock.gen_dcf(regen_data=False)
+		assert snapshot["price"] == stock.price
+		assert snapshot["implied_price"] == stock.dcf_result
+		assert snapshot["margin"] == stock.dcf_values["margin"]
+		assert snapshot["discount_rate"] == pytest.approx(stock.discount_rate)
+		assert snapshot["terminal_growth_rate"] == stock.terminal_growth_rate
+
+def test_assumptions_are_passed_to_every_snapshot(store):
+	signals = sa.backtest.signals(store, ["aapl"], min_discount_rate=0.2, auto_terminal_growth_rate=False)
+	stock = loaded_stock("aapl")
+	stock.min_discount_rate = 0.2
+	stock.gen_dcf(auto_terminal_growth_rate=False, regen_data=False)
+	assert (signals["discount_rate"] == 0.2).all()
+	assert (signals["terminal_growth_rate"] == 0.03).all()
+	assert signals["implied_price"].iloc[0] == stock.dcf_result
+
+def test_forward_returns_use_the_first_snapshot_after_the_horizon():
+	runs = pandas.to_datetime(["2024-01-01", "2024-01-03", "2024-01-08", "2024-03-01"], utc=True)
+	signals = pandas.DataFrame({"price": [10.0, 20.0, 15.0, 30.0], "margin": [0.3, -0.3, 0.3, -0.3]},
+							   index=pandas.MultiIndex.from_product([["AAPL"], runs], names=["ticker", "run"]))
+	returns = sa.backtest.forward_returns(signals, ["2D", "5D"], tolerance="3D")
+	assert returns["return_2D"].tolist()[:2] == [1.0, -0.25]
+	assert returns["return_5D"].tolist()[0] == 0.5
+	assert numpy.isnan(returns["return_5D"].tolist()[2])
+
+	buckets = sa.backtest.bucket_returns(returns, [-1, 0, 1])
+	assert buckets[("2D", "count")].tolist() == [1, 1]
+	assert buckets[("2D", "hit_rate")].tolist() == [0.0, 1.0]
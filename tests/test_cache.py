@@ -0,0 +1,70 @@
+# Standard Library Imports
+import json
+import os
+
+# Third Party Imports
+import pytest
+
+# Local Imports
+import stockanalysis as sa
+
+
+def age(cache, ticker, document, seconds):
+	"""
+	Move a cached page's fetch time seconds into the past.
+	"""
+	path = cache._path(ticker, document) + ".json"
+	with open(path) as file:
+		meta = json.load(file)
+	meta["fetched"] -= seconds
+	with open(path, "w") as file:
+		json.dump(meta, file)
+
+
+def test_pages_are_fresh_within_their_document_ttl(tmp_path):
+	cache = sa.cache.PageCache(tmp_path, ttls={sa.STATISTICS: 60})
+	cache.put("aapl", sa.STATISTICS, b"statistics")
+	cache.put("aapl", sa.INCOME_STATEMENT, b"income")
+	age(cache, "aapl", sa.STATISTICS, 120)
+	age(cache, "aapl", sa.INCOME_STATEMENT, 120)
+
+	assert cache.get("aapl", sa.STATISTICS)[0] == b"statistics"
+	assert not cache.is_fresh(sa.STATISTICS, cache.get("aapl", sa.STATISTICS)[1])
+	assert cache.is_fresh(sa.INCOME_STATEMENT, cache.get("aapl", sa.INCOME_STATEMENT)[1])
+	assert cache.get("msft", sa.STATISTICS) == (None, None)
+
+def test_least_recently_used_pages_are_evicted(tmp_path):
+	cache = sa.cache.PageCache(tmp_path, max_bytes=250)
+	for ticker in ("aapl", "msft"):
+		cache.put(ticker, sa.STATISTICS, b"x" * 100)
+	for ticker, used in (("aapl", 1), ("msft", 2)):
+		os.utime(cache._path(ticker, sa.STATISTICS) + ".html", (used, used))
+	cache.get("aapl", sa.STATISTICS)
+	cache.put("amzn", sa.STATISTICS, b"x" * 100)
+
+	assert cache.get("msft", sa.STATISTICS) == (None, None)
+	assert cache.get("aapl", sa.STATISTICS)[0] is not None
+	assert cache.get("amzn", sa.STATISTICS)[0] is not None
+	assert cache.size == 200
+
+def test_stale_pages_are_revalidated(tmp_path):
+	cache = sa.cache.PageCache(tmp_path)
+	cache.put("aapl", sa.STATISTICS, b"statistics", {"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"})
+	age(cache, "aapl", sa.STATISTICS, 3600)
+
+	content, headers = sa.fetch.cached_document(cache, "aapl", sa.STATISTICS)
+	assert content == b"statistics"
+	assert headers["If-None-Match"] == '"v1"'
+	assert headers["If-Modified-Since"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+
+	assert sa.fetch.store_document(cache, "aapl", sa.STATISTICS, 304, b"", {}, content) == b"statistics"
+	assert sa.fetch.cached_document(cache, "aapl", sa.STATISTICS) == (b"statistics", None)
+
+def test_offline_cache_never_fetches(server, tmp_path):
+	sa.fetch.configure_cache(tmp_path)
+	first = sa.fetch.fetch_document("aapl", sa.STATISTICS)
+	sa.fetch.configure_cache(tmp_path, offline=True)
+	assert sa.fetch.fetch_document("aapl", sa.STATISTICS) == first
+	with pytest.raises(sa.cache.CacheMissError):
+		sa.fetch.fetch_document("msft", sa.STATISTICS)
+	assert server.requests == 1
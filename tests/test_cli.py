@@ -0,0 +1,65 @@
+# Standard Library Imports
+import csv
+import json
+
+# Third Party Imports
+import pandas
+import pytest
+
+# Local Imports
+import stockanalysis as sa
+
+
+def test_value_writes_a_line_per_ticker(server, tmp_path):
+	output = tmp_path / "results.jsonl"
+	assert sa.cli.main(["value", "aapl", "msft", "-q", "-o", str(output)]) == sa.cli.EXIT_OK
+	rows = {row["ticker"]: row for row in map(json.loads, output.read_text().splitlines())}
+	assert set(rows) == {"AAPL", "MSFT"}
+	aapl = sa.Stock("aapl")
+	aapl.gen_dcf()
+	assert rows["AAPL"]["implied_price"] == aapl.dcf_result
+	assert rows["AAPL"]["margin"] == aapl.dcf_values["margin"]
+	assert rows["AAPL"]["error"] is None
+
+def test_exit_code_reports_failures(server, tmp_path):
+	output = tmp_path / "results.csv"
+	assert sa.cli.main(["value", "aapl", "nope/x", "-q", "--format", "csv", "-o", str(output)]) == sa.cli.EXIT_PARTIAL
+	with open(output, newline="") as file:
+		rows = {row["ticker"]: row for row in csv.DictReader(file)}
+	assert list(next(iter(rows.values()))) == list(sa.cli.VALUE_COLUMNS)
+	assert rows["NOPE/X"]["kind"] == "network"
+	assert rows["AAPL"]["error"] == ""
+
+	assert sa.cli.main(["value", "nope/x", "-q", "-o", str(output)]) == sa.cli.EXIT_FAILED
+
+@pytest.mark.parametrize("argv", [
+	["value"],
+	["value", "aapl", "--format", "parquet"],
+	["value", "aapl", "--grid", "--processes", "2"],
+	["value", "aapl", "--offline"],
+	["value", "aapl", "--format", "yaml"],
+])
+def test_usage_errors(argv):
+	with pytest.raises(SystemExit) as exit:
+		sa.cli.main(argv)
+	assert exit.value.code == sa.cli.EXIT_USAGE
+
+def test_grid_rows(server, tmp_path):
+	output = tmp_path / "grid.parquet"
+	argv = ["value", "aapl", "-q", "--grid", "--growth-rates", "2", "8", "--discount-rates", "8", "10", 
+			"--format", "parquet", "-o", str(output)]
+	assert sa.cli.main(argv) == sa.cli.EXIT_OK
+	grid = pandas.read_parquet(output)
+	assert grid.columns.tolist() == list(sa.cli.GRID_COLUMNS)
+	assert len(grid) == 4
+	expected = sa.Stock("aapl").gen_sensitivity([0.02, 0.08], [0.08, 0.10])
+	assert grid["implied_price"].tolist()[:2] == expected.loc[0.02].tolist()
+	assert grid["implied_price"].isna().tolist() == [False, False, True, False]
+
+def test_tickers_are_read_from_a_watchlist(server, tmp_path, capsys):
+	watchlist = tmp_path / "stocks.txt"
+	watchlist.write_text("# Watchlist\naapl\n\nmsft\n")
+	assert sa.cli.main(["value", "--tickers", str(watchlist), "--format", "csv"]) == sa.cli.EXIT_OK
+	out, err = capsys.readouterr()
+	assert sorted(row["ticker"] for row in csv.DictReader(out.splitlines())) == ["AAPL", "MSFT"]
+	assert err.startswith("Valued 2/2 tickers")
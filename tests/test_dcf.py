@@ -0,0 +1,79 @@
+# Standard Library Imports
+import os
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+# Third Party Imports
+import pytest
+
+# Local Imports
+import stockanalysis as sa
+
+# Enough shards that some are still queued or unsent when the workers are killed
+WATCHLIST = os.path.join(os.path.dirname(__file__), os.pardir, "stocks.txt")
+TICKERS = list(sa.read_tickers(WATCHLIST))[:5*sa.dcf.SHARD_SIZE]
+
+
+def test_multi_dcf_keeps_ticker_order_and_records_failures(server):
+	summary = sa.multi_dcf(["msft", "nope/x", "aapl", "amzn"], verbose=False, sort=False, workers=4)
+	assert summary["Ticker"].tolist() == ["MSFT", "AAPL", "AMZN"]
+	assert summary.attrs["failures"] == [{
+		"ticker": "NOPE/X", 
+		"error": f"FetchError: 404 error fetching {server.url}nope/x/financials/", 
+		"kind": "network",
+	}]
+	aapl = sa.Stock("aapl")
+	aapl.gen_dcf()
+	assert summary.loc[summary["Ticker"] == "AAPL", "Margin"].item() == aapl.dcf_margin
+
+def test_arguments_are_checked_before_the_workbook_is_opened(server, tmp_path, monkeypatch):
+	monkeypatch.chdir(tmp_path)
+	(tmp_path / "results").mkdir()
+	(tmp_path / "results" / "results.xlsx").write_bytes(b"not a workbook")
+	with pytest.raises(ValueError, match="incremental"):
+		sa.multi_dcf(["aapl"], results_fname="results.xlsx", processes=2, incremental=True)
+
+def test_process_pool_recovers_from_a_dead_worker(server):
+	expected = {ticker: stock.dcf_result for ticker, stock, _ in sa.dcf.value_tickers(TICKERS)}
+	try:
+		results = sa.dcf.value_shards(TICKERS, None, 2, False, None, None)
+		valued = [next(results)]
+		pool = sa.dcf._process_pool
+		for process in list(pool._processes.values()):
+			process.kill()
+		valued += list(results)
+		assert sa.dcf._process_pool is not pool
+	finally:
+		sa.dcf.close_process_pool()
+
+	assert [ticker for ticker, _, _ in valued] == TICKERS
+	assert all(error is None for _, _, error in valued)
+	assert {ticker: stock.dcf_result for ticker, stock, _ in valued} == expected
+
+def test_only_shards_lost_with_the_pool_are_resubmitted():
+	def finished(result=None, error=None) -> Future:
+		future = Future()
+		if error is None:
+			future.set_result(result)
+		else:
+			future.set_exception(error)
+		return future
+
+	submitted = []
+
+	def submit(shard):
+		submitted.append(shard)
+		return finished([(ticker, {}, None) for ticker in shard])
+
+	pending = deque([
+		(["a"], finished(error=BrokenProcessPool())),
+		(["b"], finished([("b", {}, None)])),
+		(["c"], finished(error=BrokenProcessPool())),
+	])
+	try:
+		assert sa.dcf._shard_results(pending, submit, 1) == [("a", {}, None)]
+	finally:
+		sa.dcf.close_process_pool()
+	assert submitted == [["a"], ["c"]]
+	assert [shard for shard, _ in pending] == [["b"], ["c"]]
@@ -0,0 +1,42 @@
+# Third Party Imports
+import pytest
+import requests
+
+# Local Imports
+import stockanalysis as sa
+
+
+def test_server_errors_are_retried(server):
+	server.error_rate = 1.0
+	sa.fetch.configure_retries(retries=2)
+	with pytest.raises(sa.fetch.FetchError) as error:
+		sa.fetch.fetch_document("aapl", sa.STATISTICS)
+	assert error.value.status == 503
+	assert sa.dcf.error_kind(error.value) == "network"
+	assert server.requests == 3
+
+def test_missing_pages_are_not_retried(server):
+	with pytest.raises(sa.fetch.FetchError) as error:
+		sa.fetch.fetch_document("nope/x", sa.STATISTICS)
+	assert error.value.status == 404
+	assert server.requests == 1
+
+def test_bodies_cut_off_are_retried(server):
+	server.truncate_rate = 1.0
+	sa.fetch.configure_retries(retries=1)
+	with pytest.raises(sa.fetch.FetchError) as error:
+		sa.fetch.fetch_document("aapl", sa.STATISTICS)
+	assert isinstance(error.value.__cause__, requests.exceptions.ChunkedEncodingError)
+	assert sa.dcf.error_kind(error.value) == "network"
+	assert server.requests == 2
+
+	server.truncate_rate = 0.0
+	assert sa.fetch.fetch_document("aapl", sa.STATISTICS)
+
+def test_stream_retries_until_the_first_chunk(server):
+	expected = sa.fetch.fetch_document("aapl", sa.STATISTICS)
+	server.truncate_rate = 0.5
+	sa.fetch.configure_retries(retries=20)
+	for _ in range(5):
+		assert b"".join(sa.fetch.stream(sa.fetch.document_url("aapl", sa.STATISTICS), len(expected))) == expected
+	assert server.requests > 6
@@ -0,0 +1,63 @@
+# Standard Library Imports
+import io
+import json
+
+# Third Party Imports
+import pytest
+
+# Local Imports
+import stockanalysis as sa
+
+
+@pytest.fixture(autouse=True)
+def no_sinks():
+	yield
+	sa.metrics.disable()
+
+def test_memory_sink_summary():
+	sink = sa.metrics.MemorySink()
+	sa.metrics.enable(sink)
+	for _ in range(3):
+		with sa.metrics.timer("parse", document="forecast"):
+			pass
+	sa.metrics.count("requests", status=200)
+	sa.metrics.count("requests", 2, status=200)
+
+	summary = sink.summary()
+	assert summary["parse[document=forecast]"]["count"] == 3
+	assert summary["requests[status=200]"] == 3
+
+def test_nothing_is_recorded_while_disabled():
+	sink = sa.metrics.MemorySink()
+	sa.metrics.enable(sink)
+	sa.metrics.disable()
+	sa.metrics.count("requests")
+	assert sink.summary() == {}
+
+def test_json_log_sink_closes_the_file_it_opened(tmp_path):
+	path = tmp_path / "metrics.jsonl"
+	with sa.metrics.JSONLogSink(str(path)) as sink:
+		sa.metrics.enable(sink)
+		sa.metrics.count("retries", reason="network")
+	assert sink.stream.closed
+	record = json.loads(path.read_text())
+	assert (record["kind"], record["name"], record["value"], record["labels"]) == \
+		("counter", "retries", 1, {"reason": "network"})
+
+	stream = io.StringIO()
+	sa.metrics.JSONLogSink(stream).close()
+	assert not stream.closed
+
+def test_prometheus_label_values_are_escaped(tmp_path):
+	path = tmp_path / "metrics.prom"
+	sink = sa.metrics.PrometheusSink(str(path))
+	sa.metrics.enable(sink)
+	sa.metrics.count("errors", kind='a "quoted"\\path\nnext')
+	with sa.metrics.timer("fetch"):
+		pass
+	sa.metrics.flush()
+
+	lines = path.read_text().splitlines()
+	assert 'stockanalysis_errors_total{kind="a \\"quoted\\"\\\\path\\nnext"} 1' in lines
+	assert "# TYPE stockanalysis_fetch_seconds summary" in lines
+	assert "stockanalysis_fetch_seconds_count 1" in lines
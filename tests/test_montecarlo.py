@@ -0,0 +1,21 @@
+# Local Imports
+import stockanalysis as sa
+
+
+def test_seed_is_reproducible(server):
+	stock = sa.Stock("avgo")
+	first = stock.gen_monte_carlo(paths=5000, seed=1, chunk_size=1000)
+	assert stock.gen_monte_carlo(paths=5000, seed=1, chunk_size=1000) == first
+	assert stock.gen_monte_carlo(paths=5000, seed=2, chunk_size=1000) != first
+	assert first["paths"] <= 5000
+
+def test_terminal_growth_rate_is_generated_without_changing_the_stock(server):
+	fresh = sa.Stock("avgo")
+	result = fresh.gen_monte_carlo(paths=5000, seed=1)
+	assert fresh.terminal_growth_rate == 0.03
+
+	valued = sa.Stock("avgo")
+	valued.gen_dcf()
+	assert valued.terminal_growth_rate < 0.03
+	assert valued.gen_monte_carlo(paths=5000, seed=1) == result
+	assert fresh.gen_monte_carlo(paths=5000, seed=1, auto_terminal_growth_rate=False) != result
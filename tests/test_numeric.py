@@ -0,0 +1,43 @@
+# Third Party Imports
+import numpy
+import pytest
+
+# Local Imports
+import stockanalysis as sa
+
+
+@pytest.mark.parametrize("value, expected", [
+	("1,234", 1234.0),
+	("7.89B", 7890.0),
+	("10M", 10.0),
+	("500K", 0.5),
+	("1.2T", 1200000.0),
+	("12.5%", 0.125),
+	("-3.01%", -0.0301),
+	("(3.2)", -3.2),
+	("($1,500)", -1500.0),
+	(" 42 ", 42.0),
+	(3, 3.0),
+])
+def test_to_number(value, expected):
+	assert sa.numeric.to_number(value) == pytest.approx(expected)
+
+@pytest.mark.parametrize("value", ["-", "--", "", "n/a", "—", None, "Upgrade"])
+def test_missing_values_are_nan(value):
+	assert numpy.isnan(sa.numeric.to_number(value))
+
+def test_to_numbers_masks_missing_values():
+	numbers = sa.numeric.to_numbers(["1,234", "-", "7.89B", "(3.2)", "n/a"])
+	assert numpy.isnan(numbers).tolist() == [False, True, False, False, True]
+	assert numbers[~numpy.isnan(numbers)].tolist() == pytest.approx([1234.0, 7890.0, -3.2])
+
+def test_numeric_frame():
+	frame = sa.numeric.numeric_frame(["Revenue", "Growth"], ["2023", "2024"], [["1.5B", "-"], ["2B", "33.3%"]])
+	assert frame.loc["Revenue"].tolist() == [1500.0, 2000.0]
+	assert numpy.isnan(frame.loc["Growth", "2023"])
+	assert frame.loc["Growth", "2024"] == pytest.approx(0.333)
+
+def test_stock_normalize_num_uses_to_number():
+	stock = sa.Stock("aapl")
+	assert stock.normalize_num("7.89B") == 7890.0
+	assert numpy.isnan(stock.normalize_num("-"))
@@ -0,0 +1,21 @@
+# Standard Library Imports
+import json
+
+# Local Imports
+import stockanalysis as sa
+
+
+def test_resume_after_a_torn_line(server, tmp_path):
+	checkpoint = tmp_path / "checkpoint.jsonl"
+	assert [error for _, _, error in sa.run_watchlist(["aapl", "msft"], str(checkpoint))] == [None, None]
+
+	with open(checkpoint, "a") as file:
+		file.write('{"ticker": "AMZN", "time": ')
+	requests = server.requests
+	results = list(sa.run_watchlist(["aapl", "msft", "amzn"], str(checkpoint)))
+	assert [ticker for ticker, _, _ in results] == ["amzn"]
+	assert server.requests - requests == len(sa.ALL_DOCUMENTS)
+
+	records = [json.loads(line) for line in checkpoint.read_text().splitlines()]
+	assert [record["ticker"] for record in records] == ["AAPL", "MSFT", "AMZN"]
+	assert sa.load_checkpoint(str(checkpoint)).index.tolist() == ["AAPL", "MSFT", "AMZN"]
@@ -0,0 +1,29 @@
+# Third Party Imports
+import pytest
+
+# Local Imports
+import stockanalysis as sa
+from benchmarks import fixtures
+
+
+@pytest.mark.parametrize("document", sa.ALL_DOCUMENTS)
+def test_streamed_pages_parse_like_whole_pages(document):
+	page = fixtures.load("aapl", document)
+	whole = sa.scrape.parse_document(document, page)
+	streamed = sa.scrape.parse_document(document, (page[i:i + 1000] for i in range(0, len(page), 1000)))
+	if isinstance(whole, dict):
+		assert streamed == whole
+	else:
+		assert streamed.equals(whole)
+
+@pytest.mark.parametrize("page", [b"", "", iter([]), b"<html><body><p>Not found</p></body></html>"])
+def test_unexpected_pages_raise_parse_errors(page):
+	with pytest.raises(sa.scrape.ParseError) as error:
+		sa.scrape.parse_financials(page)
+	assert sa.dcf.error_kind(error.value) == "parse"
+
+def test_financials_are_numeric():
+	income = sa.scrape.parse_financials(fixtures.load("aapl", sa.INCOME_STATEMENT))
+	assert income.columns[0] == "TTM"
+	assert income.dtypes.eq(float).all()
+	assert "Revenue" in income.index
@@ -0,0 +1,66 @@
+# Standard Library Imports
+import datetime
+
+# Third Party Imports
+import pytest
+
+# Local Imports
+import stockanalysis as sa
+from benchmarks.run import loaded_stock
+
+TICKERS = ["aapl", "msft", "amzn", "avgo"]
+
+
+@pytest.fixture
+def stocks(tmp_path):
+	stocks = {}
+	for ticker in TICKERS:
+		stock = loaded_stock(ticker)
+		stock.gen_dcf(regen_data=False)
+		sa.store.save_stock(stock, tmp_path)
+		stocks[ticker.upper()] = stock
+	return stocks
+
+def test_store_universe_matches_gen_dcf(stocks, tmp_path):
+	universe = sa.screen.from_store(tmp_path)
+	for ticker, stock in stocks.items():
+		point_in_time = universe.loc[(ticker, "TTM")]
+		assert point_in_time["implied_price"] == stock.dcf_result
+		assert point_in_time["margin"] == stock.dcf_values["margin"]
+		assert point_in_time["price"] == stock.price
+		n_past = len(stock.financials[0].columns)
+		for year, fcf in zip(stock.dcf.columns[:n_past], stock.dcf.loc["Free Cash Flow"].iloc[:n_past]):
+			assert universe.loc[(ticker, year), "fcf"] == fcf
+
+def test_screen_filters_and_ranks(stocks, tmp_path):
+	universe = sa.screen.from_store(tmp_path)
+	ranked = sa.screen.screen(universe, "margin > -1", rank_by="margin", columns=["price"])
+	margins = {ticker: stock.dcf_values["margin"] for ticker, stock in stocks.items()}
+	assert ranked.index.tolist() == sorted(margins, key=margins.get, reverse=True)
+	assert ranked["score"].tolist() == sorted(margins.values(), reverse=True)
+	assert ranked.columns.tolist() == ["price", "score"]
+
+	cheap = sa.screen.screen(universe, "margin > 0", rank_by="margin", ascending=True, top=1)
+	assert cheap.index.tolist() == [min((ticker for ticker in margins if margins[ticker] > 0), key=margins.get)]
+
+	forecast = sa.screen.screen(universe, year="2026", columns=["revenue", "margin"])
+	assert forecast.loc["AAPL", "margin"] == margins["AAPL"]
+
+def test_latest_run_is_screened(tmp_path):
+	stock = loaded_stock("aapl")
+	first = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+	sa.store.save_stock(stock, tmp_path, first)
+	stock.statistics["price"] = 1.0
+	sa.store.save_stock(stock, tmp_path, first + datetime.timedelta(days=1))
+	assert sa.screen.from_store(tmp_path).loc[("AAPL", "TTM"), "price"] == 1.0
+
+def test_cache_universe_matches_the_store(server, tmp_path):
+	sa.fetch.configure_cache(tmp_path / "cache")
+	stock = sa.Stock("msft")
+	stock.gen_dcf()
+	sa.store.save_stock(stock, tmp_path / "store")
+
+	cached = sa.screen.from_cache(directory=tmp_path / "cache")
+	stored = sa.screen.from_store(tmp_path / "store")
+	assert cached["fcf"].equals(stored["fcf"])
+	assert "margin" not in cached
@@ -0,0 +1,46 @@
+# Third Party Imports
+import numpy
+import pytest
+
+# Local Imports
+import stockanalysis as sa
+from benchmarks.run import loaded_stock
+
+
+def test_grid_matches_value_dcf_at_every_rate():
+	stock = loaded_stock("aapl")
+	growth_rates = [0.01, 0.02, 0.03, 0.08]
+	discount_rates = [0.07, 0.08, 0.09]
+	grid = stock.gen_sensitivity(growth_rates, discount_rates)
+	margins = stock.gen_sensitivity(growth_rates, discount_rates, metric="margin")
+
+	assert grid.shape == (4, 3)
+	assert grid.index.tolist() == growth_rates
+	assert grid.columns.tolist() == discount_rates
+	inputs = sa.valuation.dcf_inputs(stock.financials, stock.forecast, stock.statistics)
+	for growth_rate in growth_rates:
+		for discount_rate in discount_rates:
+			if discount_rate <= growth_rate:
+				assert numpy.isnan(grid.loc[growth_rate, discount_rate])
+				continue
+			result = sa.valuation.value_dcf(inputs, discount_rate, growth_rate)
+			assert grid.loc[growth_rate, discount_rate] == result["implied_price"]
+			assert margins.loc[growth_rate, discount_rate] == result["margin"]
+
+def test_discount_rates_can_come_from_market_returns_and_betas():
+	stock = loaded_stock("aapl")
+	grid = stock.gen_sensitivity([0.02], market_returns=[0.08, 0.10], betas=[0.5, 1.5])
+	assert grid.columns.names == ["Market Return", "Beta"]
+	assert grid.shape == (1, 4)
+
+	stock.market_return, stock.beta = 0.10, 1.5
+	expected = stock.gen_sensitivity([0.02], [max(stock.risk_free_rate + 1.5*(0.10 - stock.risk_free_rate), 
+											  stock.min_discount_rate)])
+	assert grid[(0.10, 1.5)].item() == expected.iloc[0, 0]
+
+def test_a_metric_and_rates_are_required():
+	stock = loaded_stock("aapl")
+	with pytest.raises(ValueError, match="metric"):
+		stock.gen_sensitivity([0.02], [0.08], metric="value")
+	with pytest.raises(ValueError, match="discount_rates"):
+		stock.gen_sensitivity([0.02])
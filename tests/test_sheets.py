@@ -0,0 +1,51 @@
+# Third Party Imports
+import openpyxl
+import pytest
+
+# Local Imports
+import stockanalysis as sa
+from benchmarks.run import loaded_stock
+
+
+@pytest.fixture(scope="module")
+def dcf():
+	stock = loaded_stock("aapl")
+	stock.gen_dcf(regen_data=False)
+	return stock.dcf
+
+def read(path) -> dict:
+	workbook = openpyxl.load_workbook(path)
+	return {sheet.title: [[cell.value for cell in row] for row in sheet.iter_rows()] for sheet in workbook}
+
+def test_write_only_output_matches_the_in_memory_workbook(dcf, tmp_path):
+	for write_only in (False, True):
+		writer = sa.sheets.ExcelWriter(tmp_path / f"{write_only}.xlsx", write_only=write_only, first_sheet="Summary")
+		writer.write_sheet("AAPL", dcf)
+		writer.write_sheet("Summary", dcf.iloc[:2])
+		writer.save()
+	streamed = openpyxl.load_workbook(tmp_path / "True.xlsx")
+	in_memory = openpyxl.load_workbook(tmp_path / "False.xlsx")
+
+	assert read(tmp_path / "True.xlsx") == read(tmp_path / "False.xlsx")
+	assert streamed.sheetnames == ["Summary", "AAPL"]
+	for name in streamed.sheetnames:
+		for streamed_row, row in zip(streamed[name].iter_rows(), in_memory[name].iter_rows()):
+			assert [cell.font.b for cell in streamed_row] == [cell.font.b for cell in row]
+			assert [cell.alignment.horizontal for cell in streamed_row] == [cell.alignment.horizontal for cell in row]
+		assert streamed[name].column_dimensions["A"].width == in_memory[name].column_dimensions["A"].width
+
+	values = read(tmp_path / "True.xlsx")["AAPL"]
+	assert values[0][0] is None and values[0][1:] == dcf.columns.tolist()
+	assert [row[0] for row in values[1:]] == dcf.index.tolist()
+	assert values[-2][-1] == "$581.65"
+
+def test_write_only_replaces_an_existing_workbook(dcf, tmp_path):
+	path = tmp_path / "results.xlsx"
+	writer = sa.sheets.ExcelWriter(path)
+	writer.write_sheet("OLD", dcf)
+	writer.save()
+
+	writer = sa.sheets.ExcelWriter(path, write_only=True)
+	writer.write_sheet("AAPL", dcf)
+	writer.save()
+	assert openpyxl.load_workbook(path).sheetnames == ["AAPL"]
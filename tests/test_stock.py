@@ -0,0 +1,64 @@
+# Third Party Imports
+import pytest
+
+# Local Imports
+import stockanalysis as sa
+
+MAX_AGE = {document: 3600 for document in sa.ALL_DOCUMENTS}
+
+
+def test_incremental_price_change_only_updates_margin(server):
+	stock = sa.Stock("aapl")
+	stock.gen_dcf(incremental=True, max_age=MAX_AGE)
+	implied_price = stock.dcf_result
+	projection = stock._projection
+
+	stock._set_document(sa.STATISTICS, dict(stock.statistics, price=stock.price * 2))
+	stock.gen_dcf(incremental=True, max_age=MAX_AGE)
+	assert stock._projection is projection
+	assert stock.dcf_result == implied_price
+	assert stock.dcf_values["margin"] == sa.valuation.margin_of_safety(implied_price, stock.price)
+	assert server.requests == len(sa.ALL_DOCUMENTS)
+
+def test_failed_revaluation_stays_pending(server):
+	stock = sa.Stock("aapl")
+	stock.gen_dcf(incremental=True, max_age=MAX_AGE)
+	expected = stock.dcf_values
+	balance_sheet = stock.financials[sa.BALANCE_SHEET-1]
+
+	debt = balance_sheet.index.isin(["Long-Term Debt", "Total Debt"])
+	stock._set_document(sa.BALANCE_SHEET, balance_sheet[~debt])
+	for _ in range(2):
+		with pytest.raises(sa.scrape.MissingFieldError):
+			stock.gen_dcf(incremental=True, max_age=MAX_AGE)
+
+	stock._set_document(sa.BALANCE_SHEET, balance_sheet)
+	stock.gen_dcf(incremental=True, max_age=MAX_AGE)
+	assert stock.dcf_values["implied_price"] == expected["implied_price"]
+	assert server.requests == len(sa.ALL_DOCUMENTS)
+
+def test_generated_terminal_growth_rate_recovers(server):
+	stock = sa.Stock("msft")
+	stock.gen_dcf(incremental=True, max_age=MAX_AGE)
+	rate, margin = stock.terminal_growth_rate, stock.dcf_margin
+	forecast = stock.forecast
+
+	cut = forecast.copy()
+	cut.loc["Revenue Growth"] /= 5
+	stock._set_document(sa.FORECAST, cut)
+	stock.gen_dcf(incremental=True, max_age=MAX_AGE)
+	assert stock.terminal_growth_rate < rate
+
+	stock._set_document(sa.FORECAST, forecast)
+	stock.gen_dcf(incremental=True, max_age=MAX_AGE)
+	assert stock.terminal_growth_rate == rate
+	assert stock.dcf_margin == margin
+
+def test_daily_refresh_refetches_forecast_and_statistics(server):
+	stock = sa.Stock("aapl")
+	stock.gen_dcf(incremental=True)
+	stock.fetched = {document: fetched - 24*60*60 for document, fetched in stock.fetched.items()}
+	assert stock.refresh() == [sa.FORECAST, sa.STATISTICS]
+
+	stock.fetched = {document: fetched - 24*60*60 for document, fetched in stock.fetched.items()}
+	assert stock.refresh({sa.FORECAST: 7*24*60*60}) == [sa.STATISTICS]
@@ -0,0 +1,51 @@
+# Standard Library Imports
+import datetime
+
+# Third Party Imports
+import pandas
+import pytest
+
+# Local Imports
+import stockanalysis as sa
+from benchmarks.run import loaded_stock, store_snapshots
+
+
+def test_items_filter_datasets_that_have_items(tmp_path):
+	store_snapshots([loaded_stock("aapl"), loaded_stock("msft")], tmp_path, days=2)
+	financials = sa.store.load_dataset("financials", tmp_path, items=["Revenue", "Net Income"])
+	assert set(financials["item"]) == {"Revenue", "Net Income"}
+	assert set(financials["ticker"]) == {"AAPL", "MSFT"}
+
+@pytest.mark.parametrize("dataset", ["statistics", "dcf", "valuations"])
+def test_items_are_rejected_for_datasets_without_items(tmp_path, dataset):
+	store_snapshots([loaded_stock("aapl")], tmp_path, days=1)
+	with pytest.raises(ValueError, match="items"):
+		sa.store.load_dataset(dataset, tmp_path, items=["Revenue"])
+
+@pytest.mark.parametrize("format", ["parquet", "feather"])
+def test_saved_stocks_load_back(tmp_path, format):
+	stock = loaded_stock("aapl")
+	stock.gen_dcf(regen_data=False)
+	run = datetime.datetime(2024, 1, 2, tzinfo=datetime.timezone.utc)
+	sa.store.save_stock(stock, tmp_path, run, format)
+
+	financials = sa.store.load_dataset("financials", tmp_path)
+	income = financials[financials["document"] == "income-statement"]
+	revenue = income[income["item"] == "Revenue"].set_index("period")["value"]
+	assert revenue.to_dict() == stock.financials[0].loc["Revenue"].to_dict()
+	assert (financials["run"] == pandas.Timestamp(run)).all()
+
+	valuations = sa.store.load_dataset("valuations", tmp_path)
+	assert valuations[["ticker", "price", "implied_price", "margin"]].to_dict("records") == [
+		{"ticker": "AAPL", "price": stock.price, "implied_price": stock.dcf_result, "margin": 0.3351}]
+	dcf = sa.store.load_dataset("dcf", tmp_path)
+	assert dcf.loc[dcf["metric"] == "enterprise_value", "value"].item() == stock.dcf_values["enterprise_value"]
+
+def test_tickers_and_run_range_select_files(tmp_path):
+	store_snapshots([loaded_stock("aapl"), loaded_stock("msft")], tmp_path, days=5)
+	statistics = sa.store.load_dataset("statistics", tmp_path, ["msft"], start="2024-01-02", end="2024-01-04")
+	assert statistics["ticker"].tolist() == ["MSFT"] * 3
+	assert statistics["run"].dt.day.tolist() == [2, 3, 4]
+	assert sa.store.load_dataset("statistics", tmp_path / "missing").empty
+	with pytest.raises(ValueError, match="dataset"):
+		sa.store.load_dataset("prices", tmp_path)
@@ -0,0 +1,79 @@
+# Third Party Imports
+import pytest
+
+# Local Imports
+import stockanalysis as sa
+from benchmarks.run import loaded_stock
+
+
+def list_dcf(inputs: dict, discount_rate: float, terminal_growth_rate: float) -> dict:
+	"""
+	The list-based DCF Stock.gen_dcf() ran before the numeric engine, kept as a reference.
+	"""
+	revenue = inputs["revenue"].tolist()
+	past_revenue = inputs["past_revenue"].tolist()
+	past_da = inputs["past_da"].tolist()
+	past_capex = inputs["past_capex"].tolist()
+	past_net_income = inputs["past_net_income"].tolist()
+
+	net_income = [round(inputs["shares_outstanding"] * i) for i in inputs["eps"]]
+	past_da_margin = [round(past_da[i]/past_revenue[i], 6) for i in range(len(past_da))]
+	past_capex_margin = [round(past_capex[i]/past_revenue[i], 6) for i in range(len(past_capex))]
+	annualized_da_change = (past_da_margin[-1]/past_da_margin[0])**(1/6) - 1
+	annualized_capex_change = (past_capex_margin[-1]/past_capex_margin[0])**(1/6) - 1
+
+	da_margin = [round(past_da_margin[-1]*((1+annualized_da_change)**((i+1)/2)), 6) for i in range(len(net_income))]
+	da = [round(revenue[i]*da_margin[i]) for i in range(len(da_margin))]
+	capex_margin = [round(past_capex_margin[-1]*((1+annualized_capex_change)**((i+1)/2)), 6) 
+					for i in range(len(net_income))]
+	capex = [round(revenue[i]*capex_margin[i]) for i in range(len(capex_margin))]
+	free_cash_flow = [net_income[i] + da[i] - capex[i] for i in range(len(net_income))]
+
+	terminal_value = round(free_cash_flow[-1]*(1+terminal_growth_rate)/(discount_rate-terminal_growth_rate))
+	present_free_cash_flow = [round(free_cash_flow[i]/((1+discount_rate)**(i+1))) for i in range(len(free_cash_flow))]
+	present_terminal_value = round(terminal_value/((1+discount_rate)**len(free_cash_flow)))
+	enterprise_value = sum(present_free_cash_flow) + present_terminal_value
+	market_cap = enterprise_value + inputs["cash"] - inputs["debt"]
+	implied_price = round(market_cap / inputs["shares_outstanding"], 2)
+
+	return {
+		"net_income": net_income,
+		"da": da,
+		"capex": capex,
+		"free_cash_flow": free_cash_flow,
+		"present_free_cash_flow": present_free_cash_flow,
+		"terminal_value": terminal_value,
+		"present_terminal_value": present_terminal_value,
+		"enterprise_value": enterprise_value,
+		"implied_price": implied_price,
+		"margin": str(round(((implied_price/inputs["price"]) - 1) * 100, 2)) + "%",
+	}
+
+
+@pytest.mark.parametrize("ticker", ["aapl", "msft", "amzn", "avgo"])
+def test_value_dcf_matches_the_list_based_dcf(ticker):
+	stock = loaded_stock(ticker)
+	stock.gen_dcf(regen_data=False)
+	inputs = sa.valuation.dcf_inputs(stock.financials, stock.forecast, stock.statistics)
+	expected = list_dcf(inputs, stock.discount_rate, stock.terminal_growth_rate)
+
+	result = sa.valuation.value_dcf(inputs, stock.discount_rate, stock.terminal_growth_rate)
+	n_past = len(inputs["past_revenue"])
+	for key in ("net_income", "da", "capex", "free_cash_flow"):
+		assert result[key][n_past:].tolist() == expected[key]
+	assert result["present_free_cash_flow"].tolist() == expected["present_free_cash_flow"]
+	for key in ("terminal_value", "present_terminal_value", "enterprise_value", "implied_price"):
+		assert float(result[key]) == expected[key]
+
+	df = sa.valuation.dcf_frame(result)
+	assert df.loc["Implied Share Price"].iloc[-1] == "$" + str(expected["implied_price"])
+	assert df.loc["Margin of Safety"].iloc[-1] == expected["margin"]
+	assert df.loc["Free Cash Flow"].iloc[n_past:].tolist() == expected["free_cash_flow"]
+	assert stock.dcf.equals(df)
+	assert stock.dcf_result == expected["implied_price"]
+
+def test_aapl_dcf():
+	stock = loaded_stock("aapl")
+	stock.gen_dcf(regen_data=False)
+	assert stock.dcf_result == 581.65
+	assert stock.dcf_margin == "33.51%"